@@ -0,0 +1,116 @@
+"""
+Micro-benchmark of the employee output models of list responses.
+
+Compares building the output model for every item, as ``with_fields`` did before models
+were cached, with the cached ``with_fields``. Every item is converted with ``from_obj``
+and dumped to JSON, the time per item is printed. Run from the repository root with the
+application settings available in the environment:
+
+    python -m contrib.benchmarks.employee_output_model --employees 1000
+"""
+
+import argparse
+import timeit
+from datetime import date, datetime
+from types import SimpleNamespace
+from typing import Any
+
+from wb.schemas.employee.annotation import EMPLOYEE_FIELD_ANNOTATIONS
+from wb.schemas.employee.out_prototype import EmployeePublicOutPrototype
+
+FIELDS = (
+    'id',
+    'account',
+    'english_name',
+    'native_name',
+    'email',
+    'public_contacts',
+    'work_started',
+    'work_ended',
+    'projects',
+    'team_position',
+    'photo',
+    'skills',
+    'birthday',
+    'pararam',
+    'about',
+    'active',
+    'created',
+    'contract_date',
+    'dismissal_reason',
+)
+
+
+def generate(count: int) -> list[Any]:
+    return [
+        SimpleNamespace(
+            id=i,
+            account=f'user{i}',
+            english_name=f'User {i}',
+            native_name=None,
+            email=f'user{i}@example.com',
+            public_contacts=None,
+            work_started=date(2020, 1, 1),
+            work_ended=None,
+            projects=['wb', 'cvs'],
+            team_position='developer',
+            photo=None,
+            skills=['python'],
+            birthday=None,
+            pararam=f'user{i}',
+            about=None,
+            active=True,
+            created=datetime(2020, 1, 1),
+            contract_date=None,
+            dismissal_reason=None,
+        )
+        for i in range(count)
+    ]
+
+
+def dump_items(employees: list[Any], cached: bool) -> list[str]:
+    model_fields = [
+        (
+            EMPLOYEE_FIELD_ANNOTATIONS[field],
+            (EMPLOYEE_FIELD_ANNOTATIONS[field].type, ...),
+        )
+        for field in FIELDS
+    ]
+    results = []
+    for emp in employees:
+        if cached:
+            model = EmployeePublicOutPrototype.with_fields(model_fields)
+        else:
+            # pylint: disable=protected-access
+            model = EmployeePublicOutPrototype._make_with_fields(
+                model_fields, 'ModelOut'
+            )
+        results.append(model.from_obj(emp).model_dump_json())
+    return results
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.split('\n\n')[0])
+    parser.add_argument('--employees', type=int, default=1000)
+    parser.add_argument('--repeat', type=int, default=5)
+    args = parser.parse_args()
+
+    employees = generate(args.employees)
+    if dump_items(employees, cached=False) != dump_items(employees, cached=True):
+        raise RuntimeError('outputs differ')
+    for name, cached in (('model per item', False), ('cached model', True)):
+        best = min(
+            timeit.repeat(
+                lambda: dump_items(employees, cached),  # pylint: disable=cell-var-from-loop
+                number=1,
+                repeat=args.repeat,
+            )
+        )
+        print(
+            f'{name:>16}: {best * 1000:8.1f} ms, '
+            f'{best * 1_000_000 / args.employees:8.1f} us per item'
+        )
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,44 @@
+"""add api token digest
+
+Revision ID: cc79cc7bad60
+Revises: 8d2b6f3e1c47
+Create Date: 2026-10-18 15:02:41.538120
+
+"""
+import pickle
+
+from alembic import op
+import sqlalchemy as sa
+from cryptography.fernet import Fernet
+
+from wb.config import CONFIG
+from wb.models.api_token import make_api_token_digest
+
+
+# revision identifiers, used by Alembic.
+revision = 'cc79cc7bad60'
+down_revision = '8d2b6f3e1c47'
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    op.add_column('api_tokens', sa.Column('token_digest', sa.String(), nullable=True))
+    conn = op.get_bind()
+    fernet = Fernet(CONFIG.DB_ENCRYPT_KEY.encode())
+    tokens = conn.execute(sa.text('SELECT id, token FROM api_tokens')).all()
+    for token_id, token in tokens:
+        digest = make_api_token_digest(pickle.loads(fernet.decrypt(token)))  # nosec pickle
+        conn.execute(
+            sa.text('UPDATE api_tokens SET token_digest = :digest WHERE id = :id'),
+            {'digest': digest, 'id': token_id},
+        )
+    op.alter_column('api_tokens', 'token_digest', nullable=False)
+    op.create_unique_constraint(
+        'api_tokens_token_digest_key', 'api_tokens', ['token_digest']
+    )
+
+
+def downgrade() -> None:
+    op.drop_constraint('api_tokens_token_digest_key', 'api_tokens', type_='unique')
+    op.drop_column('api_tokens', 'token_digest')
@@ -2,12 +2,17 @@ from collections.abc import Callable
 from dataclasses import dataclass
 from typing import Generic, TypeVar
 
+from starlette_context import context
+
 __all__ = (
     'FieldACL',
+    'FieldACLEvaluator',
     'list_model_readable_fields',
+    'request_scoped',
 )
 
 ModelT = TypeVar('ModelT')
+T = TypeVar('T')
 
 
 @dataclass
@@ -56,3 +61,72 @@ def list_model_readable_fields(
         for field, acl in acls.items()
         if acl.can_view(related_roles_getter or set[str](), obj)
     ]
+
+
+class FieldACLEvaluator(Generic[ModelT]):
+    """
+    Evaluates field ACLs of a model for the current user.
+
+    Readable and editable fields depend on the roles of the user related to the object
+    only, so they are evaluated once per distinct set of roles. ACLs with callable viewers
+    or editors depend on the object itself and are evaluated on every call.
+    """
+
+    acls: dict[str, FieldACL[ModelT]]
+    roles_getter: Callable[[ModelT | None], frozenset[str]]
+    _readable: dict[frozenset[str], list[str]]
+    _viewable: dict[tuple[str, frozenset[str]], bool]
+    _editable: dict[tuple[str, frozenset[str]], bool]
+
+    def __init__(
+        self,
+        acls: dict[str, FieldACL[ModelT]],
+        roles_getter: Callable[[ModelT | None], frozenset[str]],
+    ) -> None:
+        self.acls = acls
+        self.roles_getter = roles_getter
+        self._readable = {}
+        self._viewable = {}
+        self._editable = {}
+
+    def can_view(self, field: str, obj: ModelT | None = None) -> bool:
+        if not (acl := self.acls.get(field)):
+            return False
+        roles = self.roles_getter(obj)
+        if callable(acl.view):
+            return acl.can_view(set(roles), obj)
+        if (res := self._viewable.get((field, roles))) is None:
+            res = self._viewable[(field, roles)] = acl.can_view(set(roles))
+        return res
+
+    def can_edit(self, field: str, obj: ModelT | None = None) -> bool:
+        if not (acl := self.acls.get(field)):
+            return False
+        roles = self.roles_getter(obj)
+        if callable(acl.edit):
+            return acl.can_edit(set(roles), obj)
+        if (res := self._editable.get((field, roles))) is None:
+            res = self._editable[(field, roles)] = acl.can_edit(set(roles))
+        return res
+
+    def readable_fields(self, obj: ModelT | None = None) -> list[str]:
+        roles = self.roles_getter(obj)
+        if (fields := self._readable.get(roles)) is None:
+            if any(callable(acl.view) for acl in self.acls.values()):
+                return [field for field in self.acls if self.can_view(field, obj)]
+            fields = self._readable[roles] = [
+                field for field, acl in self.acls.items() if acl.can_view(set(roles))
+            ]
+        return list(fields)
+
+
+def request_scoped(key: str, factory: Callable[[], T]) -> T:
+    """
+    Get the object stored under ``key`` in the request context, the object is created
+    with ``factory`` on the first call of the request.
+    """
+    if not context.exists():
+        return factory()
+    if (value := context.get(key)) is None:
+        value = context[key] = factory()
+    return value
@@ -1,6 +1,12 @@
 import wb.models as m
 
-from ._base import FieldACL
+from ._base import FieldACL, FieldACLEvaluator, request_scoped
+from .employee import get_employee_related_roles
+
+__all__ = (
+    'COUNTERAGENT_FIELD_ACL',
+    'get_counteragent_acl',
+)
 
 COUNTERAGENT_FIELD_ACL: dict[str, FieldACL[m.CounterAgent]] = {
     'id': FieldACL(
@@ -56,3 +62,10 @@ COUNTERAGENT_FIELD_ACL: dict[str, FieldACL[m.CounterAgent]] = {
         view=frozenset({'all'}),
     ),
 }
+
+
+def get_counteragent_acl() -> FieldACLEvaluator[m.Employee]:
+    return request_scoped(
+        'counteragent_acl',
+        lambda: FieldACLEvaluator(COUNTERAGENT_FIELD_ACL, get_employee_related_roles()),
+    )
@@ -1,13 +1,19 @@
 import wb.models as m
-from wb.utils.current_user import get_current_roles_employee_related
+from wb.utils.current_user import current_user
+from wb.utils.principal import Principal
+from wb.utils.service_user import ServiceUser
 
-from ._base import FieldACL, list_model_readable_fields
+from ._base import FieldACL, FieldACLEvaluator, request_scoped
 
 __all__ = (
     'EMPLOYEE_FIELD_ACL',
+    'EmployeeRelatedRoles',
+    'get_employee_related_roles',
+    'get_employee_acl',
     'is_employee_field_viewable',
     'is_employee_field_editable',
     'list_employee_readable_fields',
+    'list_employee_any_readable_fields',
 )
 
 
@@ -230,22 +236,70 @@ EMPLOYEE_FIELD_ACL: dict[str, FieldACL[m.Employee]] = {
     ),
 }
 
+EMPLOYEE_RELATION_ROLES = frozenset({'self', 'team_lead', 'manager'})
+
+
+class EmployeeRelatedRoles:
+    """
+    Roles of the user related to employees, as ``get_current_roles_employee_related``.
+
+    The user roles are read once, the relation roles (self, team_lead, manager) are
+    resolved with id comparisons on every call.
+    """
+
+    user_id: int | None
+    roles: frozenset[str]
+
+    def __init__(self, user: Principal | ServiceUser) -> None:
+        self.roles = frozenset(user.roles)
+        self.user_id = None if isinstance(user, ServiceUser) else user.id
+
+    def __call__(self, emp: m.Employee | None = None) -> frozenset[str]:
+        if self.user_id is None or not emp:
+            return self.roles
+        related = set()
+        if emp.id == self.user_id:
+            related.add('self')
+        if emp.team and emp.team.manager_id == self.user_id:
+            related.add('team_lead')
+        if emp.managers and any(man.id == self.user_id for man in emp.managers):
+            related.add('manager')
+        return self.roles.union(related) if related else self.roles
+
+    def any_employee_roles(self) -> frozenset[str]:
+        """
+        Roles the user may have for at least one employee.
+        """
+        if self.user_id is None:
+            return self.roles
+        return self.roles.union(EMPLOYEE_RELATION_ROLES)
+
+
+def get_employee_related_roles() -> EmployeeRelatedRoles:
+    return request_scoped(
+        'employee_related_roles', lambda: EmployeeRelatedRoles(current_user())
+    )
+
+
+def get_employee_acl() -> FieldACLEvaluator[m.Employee]:
+    return request_scoped(
+        'employee_acl',
+        lambda: FieldACLEvaluator(EMPLOYEE_FIELD_ACL, get_employee_related_roles()),
+    )
+
 
 def is_employee_field_viewable(field: str, emp: m.Employee | None = None) -> bool:
-    if not (acl := EMPLOYEE_FIELD_ACL.get(field)):
-        return False
-    return acl.can_view(get_current_roles_employee_related, emp)
+    return get_employee_acl().can_view(field, emp)
 
 
 def is_employee_field_editable(field: str, emp: m.Employee | None = None) -> bool:
-    if not (acl := EMPLOYEE_FIELD_ACL.get(field)):
-        return False
-    return acl.can_edit(get_current_roles_employee_related, emp)
+    return get_employee_acl().can_edit(field, emp)
 
 
 def list_employee_readable_fields(emp: m.Employee | None = None) -> list[str]:
-    return list_model_readable_fields(
-        acls=EMPLOYEE_FIELD_ACL,
-        obj=emp,
-        related_roles_getter=get_current_roles_employee_related,
-    )
+    return get_employee_acl().readable_fields(emp)
+
+
+def list_employee_any_readable_fields() -> list[str]:
+    roles = set(get_employee_related_roles().any_employee_roles())
+    return [field for field, acl in EMPLOYEE_FIELD_ACL.items() if acl.can_view(roles)]
@@ -0,0 +1,91 @@
+import json
+from dataclasses import dataclass
+from typing import Any, Sequence
+
+import sqlalchemy as sa
+from sqlalchemy.dialects.postgresql import JSONB
+from sqlalchemy.ext.asyncio import AsyncSession
+
+import wb.models as m
+
+__all__ = (
+    'BulkInsertResult',
+    'bulk_insert',
+)
+
+
+@dataclass
+class BulkInsertResult:
+    total: int = 0
+    inserted: int = 0
+
+    @property
+    def deduplicated(self) -> int:
+        return self.total - self.inserted
+
+    def __iadd__(self, other: 'BulkInsertResult') -> 'BulkInsertResult':
+        self.total += other.total
+        self.inserted += other.inserted
+        return self
+
+    def __str__(self) -> str:
+        return f'inserted {self.inserted}, deduplicated {self.deduplicated}'
+
+
+def _to_record(obj: m.Activity | m.DoneTask, columns: Sequence[sa.Column]) -> tuple:
+    values: list[Any] = []
+    for col in columns:
+        val = getattr(obj, col.key)
+        if val is None and col.default is not None and col.default.is_scalar:
+            val = col.default.arg  # type: ignore[attr-defined]
+        if isinstance(col.type, JSONB):
+            val = json.dumps(val if val is not None else {})
+        values.append(val)
+    return tuple(values)
+
+
+async def bulk_insert(
+    session: AsyncSession,
+    model: type[m.Activity] | type[m.DoneTask],
+    objects: Sequence[m.Activity] | Sequence[m.DoneTask],
+) -> BulkInsertResult:
+    """
+    Insert a batch of partitioned rows with a single COPY and a single INSERT ... SELECT.
+
+    Rows are copied into a session-local temporary staging table and then moved into
+    the partitioned parent table with ON CONFLICT DO NOTHING, postgres routes every row
+    to its monthly partition. The caller is responsible for committing the session.
+
+    :param session: session to execute in, the staging table lives in its transaction
+    :param model: target partitioned model (Activity or DoneTask)
+    :param objects: not persisted model instances to insert
+    :return: number of processed and actually inserted rows
+    """
+    if not objects:
+        return BulkInsertResult()
+    table: sa.Table = model.__table__  # type: ignore[assignment]
+    columns = list(table.columns)
+    column_names = [col.name for col in columns]
+    staging_name = f'_bulk_{table.name}'
+    columns_sql = ', '.join(f'"{name}"' for name in column_names)
+    await session.execute(
+        sa.text(
+            f'CREATE TEMP TABLE IF NOT EXISTS {staging_name} '
+            f'(LIKE {table.name}) ON COMMIT DELETE ROWS'
+        )
+    )
+    conn = await session.connection()
+    raw_conn = await conn.get_raw_connection()
+    await raw_conn.driver_connection.copy_records_to_table(  # type: ignore[union-attr]
+        staging_name,
+        records=[_to_record(obj, columns) for obj in objects],
+        columns=column_names,
+    )
+    result = await session.execute(
+        sa.text(
+            f'INSERT INTO {table.name} ({columns_sql}) '  # nosec hardcoded_sql_expressions
+            f'SELECT {columns_sql} FROM {staging_name} ON CONFLICT DO NOTHING'
+        )
+    )
+    await session.execute(sa.text(f'TRUNCATE {staging_name}'))
+    return BulkInsertResult(total=len(objects), inserted=max(result.rowcount, 0))  # type: ignore[attr-defined]
@@ -1,21 +1,25 @@
 import asyncio
+from collections import defaultdict
 from datetime import datetime, timedelta, timezone
 from typing import TYPE_CHECKING, Sequence
 
 import sqlalchemy as sa
-from sqlalchemy.dialects.postgresql import insert
+from sqlalchemy.exc import DBAPIError
 from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker
 
 import wb.models as m
 from wb.activity_collector.connectors import create_connector
 from wb.log import log
+from wb.services.activity import refresh_activity_daily_summary
 
+from .bulk import BulkInsertResult, bulk_insert
 from .models import EmployeeActivitySourceAlias
 
 if TYPE_CHECKING:
     from wb.activity_collector.connectors.base import Connector
 
 LOADING_LAG_MINUTES = 30
+SOURCE_TYPE_CONCURRENCY = 2
 
 
 __all__ = (
@@ -65,45 +69,96 @@ async def update_users(session_maker: async_sessionmaker[AsyncSession]) -> None:
         await session.commit()
 
 
-async def load_all_activities(session_maker: async_sessionmaker[AsyncSession]) -> None:
+async def stream_source_activities(
+    session_maker: async_sessionmaker[AsyncSession],
+    conn: 'Connector',
+    aliases: dict[str, int],
+    collect_until: datetime,
+    semaphore: asyncio.Semaphore,
+) -> BulkInsertResult:
+    """
+    Load activities of one source page by page.
+
+    Every page is written as soon as it arrives and `activity_collected` is moved
+    to the page boundary in the same transaction, so a failed run resumes from
+    the last written page. The daily activity rollup of the days touched by the page
+    is refreshed in the same transaction too, in a savepoint, so a failed refresh is
+    logged and does not lose the page.
+    """
+    stats = BulkInsertResult()
+    async with semaphore, session_maker() as session:
+        pages = conn.iter_activities(
+            conn.source.activity_collected.replace(tzinfo=timezone.utc).timestamp(),
+            collect_until.replace(tzinfo=timezone.utc).timestamp(),
+            aliases=aliases,
+        )
+        async for page in pages:
+            stats += await bulk_insert(session, m.Activity, page.activities)
+            if page.activities:
+                days = [act.time.date() for act in page.activities]
+                try:
+                    async with session.begin_nested():
+                        await refresh_activity_daily_summary(
+                            {act.employee_id for act in page.activities},
+                            min(days),
+                            max(days),
+                            session=session,
+                        )
+                except DBAPIError as err:
+                    log.warning(
+                        f'failed to refresh activity daily summary of {conn.source.id} '
+                        f'source ({min(days)} - {max(days)}), rebuild it with '
+                        f'maintenance_rebuild_activity_daily_summary: {err}'
+                    )
+            await session.execute(
+                sa.update(m.ActivitySource)
+                .where(m.ActivitySource.id == conn.source.id)
+                .values(
+                    activity_collected=datetime.utcfromtimestamp(page.collected_until)
+                )
+            )
+            await session.commit()
+    return stats
+
+
+async def load_all_activities(
+    session_maker: async_sessionmaker[AsyncSession],
+) -> dict[int, BulkInsertResult]:
     await update_users(session_maker=session_maker)
     shifted_now = datetime.utcnow() - timedelta(minutes=LOADING_LAG_MINUTES)
     connectors = await create_connectors(session_maker, updated_before=shifted_now)
+    semaphores: defaultdict[m.ActivitySourceType, asyncio.Semaphore] = defaultdict(
+        lambda: asyncio.Semaphore(SOURCE_TYPE_CONCURRENCY)
+    )
     results = await asyncio.gather(
         *[
-            conn.get_activities(
-                conn.source.activity_collected.replace(tzinfo=timezone.utc).timestamp(),
-                shifted_now.replace(tzinfo=timezone.utc).timestamp(),
-                aliases=aliases,
+            stream_source_activities(
+                session_maker,
+                conn,
+                aliases,
+                collect_until=shifted_now,
+                semaphore=semaphores[conn.source.type],
             )
             for conn, aliases in connectors
         ],
         return_exceptions=True,
     )
-    async with session_maker() as session:
-        for conn_, r in zip(connectors, results):  # type: tuple[Connector, dict[str, int]], list[m.Activity]
-            conn, _ = conn_
-            if isinstance(r, BaseException):
-                log.error(
-                    f'[{conn.source.name}({conn.source.id})] load activities error: {r}'
-                )
-                continue
-            source = await session.scalar(
-                sa.select(m.ActivitySource).where(m.ActivitySource.id == conn.source.id)
+    stats: dict[int, BulkInsertResult] = {}
+    for conn_, r in zip(connectors, results):  # type: tuple[Connector, dict[str, int]], BulkInsertResult
+        conn, _ = conn_
+        if isinstance(r, BaseException):
+            log.error(
+                f'[{conn.source.name}({conn.source.id})] load activities error: {r}'
             )
-            if not source:
-                continue
-            for act in r:
-                await session.execute(
-                    insert(m.Activity)
-                    .values(act.to_insert_values())
-                    .on_conflict_do_nothing()
-                )
-            source.activity_collected = shifted_now
-            await session.commit()
+            continue
+        stats[conn.source.id] = r
+        log.info(f'[{conn.source.name}({conn.source.id})] activities: {r}')
+    return stats
 
 
-async def update_done_tasks(session_maker: async_sessionmaker[AsyncSession]) -> None:
+async def update_done_tasks(
+    session_maker: async_sessionmaker[AsyncSession],
+) -> dict[int, BulkInsertResult]:
     await update_users(session_maker=session_maker)
     shifted_now = datetime.utcnow() - timedelta(minutes=LOADING_LAG_MINUTES)
     connectors = await create_connectors(session_maker, updated_before=shifted_now)
@@ -120,6 +175,7 @@ async def update_done_tasks(session_maker: async_sessionmaker[AsyncSession]) ->
         ],
         return_exceptions=True,
     )
+    stats: dict[int, BulkInsertResult] = {}
     async with session_maker() as session:
         for conn_, r in zip(connectors, results):  # type: tuple[Connector, dict[str, int]], list[m.DoneTask]
             conn, _ = conn_
@@ -133,11 +189,8 @@ async def update_done_tasks(session_maker: async_sessionmaker[AsyncSession]) ->
             )
             if not source:
                 continue
-            for task in r:
-                await session.execute(
-                    insert(m.DoneTask)
-                    .values(task.to_insert_values())
-                    .on_conflict_do_nothing()
-                )
+            stats[source.id] = await bulk_insert(session, m.DoneTask, r)
+            log.info(f'[{source.name}({source.id})] done tasks: {stats[source.id]}')
             source.done_tasks_collected = shifted_now
             await session.commit()
+    return stats
@@ -2,6 +2,7 @@ import typing as t
 
 from wb.models.activity import ActivitySource, ActivitySourceType
 
+from .base import ActivitiesPage
 from .base import Connector as ActivitySourceConnector
 from .cvs import *
 from .discord import *
@@ -13,6 +14,7 @@ from .zendesk import *
 
 __all__ = (
     'create_connector',
+    'ActivitiesPage',
     'ActivitySourceConnector',
 )
 
@@ -1,5 +1,6 @@
 from abc import ABC, abstractmethod
-from typing import Any, Dict, List, Sequence
+from dataclasses import dataclass
+from typing import Any, AsyncIterator, ClassVar, Dict, List, Sequence
 
 import sqlalchemy as sa
 from sqlalchemy.ext.asyncio import AsyncSession
@@ -8,11 +9,21 @@ import wb.models as m
 from wb.activity_collector.models import EmployeeActivitySourceAlias
 from wb.models.activity import Activity, ActivitySource
 
-__all__ = ('Connector',)
+__all__ = (
+    'ActivitiesPage',
+    'Connector',
+)
+
+
+@dataclass
+class ActivitiesPage:
+    activities: List[Activity]
+    collected_until: float
 
 
 class Connector(ABC):
     source: ActivitySource
+    stream_page_seconds: ClassVar[float | None] = None
 
     @classmethod
     @abstractmethod
@@ -37,6 +48,27 @@ class Connector(ABC):
     ) -> List[Activity]:
         pass
 
+    async def iter_activities(
+        self, start: float, end: float, aliases: Dict[str, int]
+    ) -> AsyncIterator[ActivitiesPage]:
+        """
+        Stream activities page by page.
+
+        Every page is complete up to its `collected_until` timestamp, so it can be used
+        as a checkpoint. By default, the range is split into windows of
+        `stream_page_seconds` (or a single window if it is not set), connectors which
+        can page natively may override this method.
+        """
+        step = self.stream_page_seconds or (end - start)
+        page_start = start
+        while page_start < end:
+            page_end = min(page_start + step, end)
+            yield ActivitiesPage(
+                activities=await self.get_activities(page_start, page_end, aliases),
+                collected_until=page_end,
+            )
+            page_start = page_end
+
     @abstractmethod
     async def get_users(self, employees: Sequence[m.Employee]) -> Dict[int, str]:
         pass
@@ -1,21 +1,22 @@
 import datetime
-import json
 from hashlib import sha1
 from typing import Any, Dict, List, Sequence
 
-import aiohttp
-
 import wb.models as m
 from wb.log import log
 from wb.models.activity import Activity, ActivitySource
+from wb.utils.http_client import connectors_http_client
 
 from .base import Connector
 
 __all__ = ('CVSConnector',)
 
+STREAM_PAGE_SECONDS = 60 * 60
+
 
 class CVSConnector(Connector):
     __api_url: str
+    stream_page_seconds = STREAM_PAGE_SECONDS
 
     @classmethod
     def validate_config(cls, conf: Any) -> None:
@@ -39,9 +40,7 @@ class CVSConnector(Connector):
             f'{self.__api_url}/commit?start_ts={start_ts}&end_ts={end_ts}&changes=false'
         )
         try:
-            async with aiohttp.ClientSession() as session:
-                async with session.get(url, ssl=False) as response:
-                    cvs_data = json.loads(await response.read())
+            cvs_data = await connectors_http_client.json('GET', url, ssl=False)
         except Exception as err:  # pylint: disable=broad-exception-caught
             print(
                 f'{self.get_activities.__name__}: get activities from {url} failed with error = {err}'
@@ -82,9 +81,7 @@ class CVSConnector(Connector):
             f'{self.__api_url}/commit?start_ts={start_ts}&end_ts={end_ts}&changes=false'
         )
         try:
-            async with aiohttp.ClientSession() as session:
-                async with session.get(url) as response:
-                    cvs_data = json.loads(await response.read())
+            cvs_data = await connectors_http_client.json('GET', url)
         except Exception as err:  # pylint: disable=broad-exception-caught
             log.error(
                 f'[{self.source.name}] Getting done tasks failed with error = {err}'
@@ -5,11 +5,11 @@ from http import HTTPMethod
 from typing import Any
 from urllib.parse import quote, urljoin
 
-import aiohttp
 import jwt
 
 import wb.models as m
 from wb.models.activity import Activity, ActivitySource
+from wb.utils.http_client import connectors_http_client
 
 from .base import Connector
 
@@ -70,9 +70,10 @@ class DiscordConnector(Connector):
         if params:
             url += '?' + '&'.join([f'{k}={quote(str(v))}' for k, v in params.items()])
         try:
-            async with aiohttp.ClientSession(headers=headers) as session:
-                async with session.request(method, url, json=data) as response:
-                    result = await response.json()
+            async with connectors_http_client.request(
+                method, url, headers=headers, json=data
+            ) as response:
+                result = await response.json()
             if not isinstance(result, dict):
                 raise ValueError('API response is not a dict')
             if 'payload' not in result:
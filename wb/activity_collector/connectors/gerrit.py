@@ -11,6 +11,7 @@ import aiohttp
 import wb.models as m
 from wb.log import log
 from wb.models.activity import Activity, ActivitySource
+from wb.utils.http_client import connectors_http_client
 
 from .base import Connector
 
@@ -64,14 +65,12 @@ class GerritRestAPI:
         url = urljoin(self.base, f'{GERRIT_AUTH_SUFFIX}{endpoint}')
         headers = {'Accept': 'application/json', 'Content-Type': 'application/json'}
         try:
-            async with aiohttp.ClientSession(
-                headers=headers, auth=self._auth
-            ) as session:
-                async with session.get(url, ssl=False) as response:
-                    data = await response.read()
-                    if data.startswith(GERRIT_MAGIC_JSON_PREFIX):
-                        data = data[len(GERRIT_MAGIC_JSON_PREFIX) :]
-                    return json.loads(data)
+            data = await connectors_http_client.read(
+                'GET', url, headers=headers, auth=self._auth, ssl=False
+            )
+            if data.startswith(GERRIT_MAGIC_JSON_PREFIX):
+                data = data[len(GERRIT_MAGIC_JSON_PREFIX) :]
+            return json.loads(data)
         except Exception as err:  # pylint: disable=broad-exception-caught
             print(f'{err}')
             logging.error(f'request to {url} failed with error={err}')
@@ -1,4 +1,3 @@
-import json
 import logging
 from datetime import datetime
 from typing import Any, Dict, List, Optional, Sequence, Union
@@ -9,6 +8,7 @@ import aiohttp
 import wb.models as m
 from wb.log import log
 from wb.models.activity import Activity, ActivitySource
+from wb.utils.http_client import connectors_http_client
 
 from .base import Connector
 
@@ -16,6 +16,7 @@ __all__ = ('YoutrackConnector',)
 
 
 YOUTRACK_TIMEOUT = 60
+STREAM_PAGE_SECONDS = 60 * 60
 
 
 async def json_request(url: str, token: str, base: str) -> Union[Dict, List]:
@@ -26,11 +27,13 @@ async def json_request(url: str, token: str, base: str) -> Union[Dict, List]:
     }
     url = urljoin(base, url)
     try:
-        async with aiohttp.ClientSession(headers=headers) as session:
-            async with session.get(
-                url, ssl=False, timeout=YOUTRACK_TIMEOUT
-            ) as response:
-                return json.loads(await response.read())  # type: ignore
+        return await connectors_http_client.json(  # type: ignore
+            'GET',
+            url,
+            headers=headers,
+            ssl=False,
+            timeout=aiohttp.ClientTimeout(total=YOUTRACK_TIMEOUT),
+        )
     except Exception as err:  # pylint: disable=broad-exception-caught
         print(f'{err}')
         logging.error(f'request to {url} failed with error={err}')
@@ -85,6 +88,7 @@ class IssueActivity:
 class YoutrackConnector(Connector):
     __url: str
     __token: str
+    stream_page_seconds = STREAM_PAGE_SECONDS
 
     @classmethod
     def validate_config(cls, conf: Any) -> None:
@@ -1,15 +1,13 @@
 import asyncio
 import base64
-import json
 import logging
 from datetime import datetime, timedelta
 from typing import Any, Dict, List, Sequence
 from urllib.parse import quote
 
-import aiohttp
-
 import wb.models as m
 from wb.models.activity import Activity, ActivitySource
+from wb.utils.http_client import connectors_http_client
 
 from .base import Connector
 
@@ -69,9 +67,9 @@ class ZendeskConnector(Connector):
         if args:
             url += '?' + '&'.join([encode_arg(k, v) for k, v in args.items()])
         try:
-            async with aiohttp.ClientSession() as session:
-                async with session.get(url, headers=headers, ssl=False) as response:
-                    return json.loads(await response.read())
+            return await connectors_http_client.json(
+                'GET', url, headers=headers, ssl=False
+            )
         except Exception as err:  # pylint: disable=broad-exception-caught
             print(f'{err}')
             logging.error(f'request to {url} failed with error={err}')
@@ -14,6 +14,7 @@ from starsol_fastapi_jwt_auth.exceptions import AuthJWTException
 
 from wb.config import CONFIG
 from wb.utils.current_user import current_user_context_dependency
+from wb.utils.query_count import QueryCountMiddleware
 
 VERSION = os.environ.get('APP_VERSION', '__DEV__')
 
@@ -45,6 +46,9 @@ instrumentator = Instrumentator(
     should_group_untemplated=True,
 ).instrument(app)
 
+# outermost, so the queries of the whole request are counted
+app.add_middleware(QueryCountMiddleware)
+
 
 @app.on_event('startup')
 async def app_init() -> None:
@@ -53,6 +57,15 @@ async def app_init() -> None:
     instrumentator.expose(app=app)
 
 
+@app.on_event('shutdown')
+async def app_shutdown() -> None:
+    from wb.services.youtrack.utils import (  # pylint: disable=import-outside-toplevel
+        youtrack_http_client,
+    )
+
+    await youtrack_http_client.close()
+
+
 @AuthJWT.load_config
 def get_config() -> 'BaseModel':
     class Settings(BaseModel):
@@ -13,6 +13,7 @@ celery_app.autodiscover_tasks(
     [
         'wb.tasks',
         'wb.tasks.scheduled',
+        'wb.tasks.reports',
     ]
 )
 celery_app.conf.beat_schedule = {
@@ -52,6 +53,10 @@ celery_app.conf.beat_schedule = {
         'task': 'tm_auto_leave',
         'schedule': crontab(hour='*/2', minute='55'),
     },
+    'task-maintenance-check-tm-current': {
+        'task': 'maintenance_check_tm_current',
+        'schedule': crontab(hour='5', minute='40'),
+    },
     'task-monthly-team-changes-report': {
         'task': 'monthly_team_changes_report',
         'schedule': crontab(hour='5', minute='17', day_of_month='1'),
@@ -88,6 +88,9 @@ CONFIG = Dynaconf(
         ),
         Validator('DB_URI', default='postgresql+asyncpg://me:me@127.0.0.1:5432/me'),
         Validator('DB_ENCRYPT_KEY', required=True),
+        Validator('DB_STRICT_LOADING', cast=bool, default=False),
+        Validator('DB_QUERY_COUNT_WARN', cast=int, default=50),
+        Validator('PRINCIPAL_CACHE_TTL', cast=int, default=60),
         Validator(
             'LDAP_URI',
             is_type_of=str,
@@ -118,6 +121,7 @@ CONFIG = Dynaconf(
         Validator('BBOT_API_URL', 'BBOT_API_TOKEN', cast=str),
         Validator('CELERY_BROKER_URL', cast=str, default='redis://localhost:6379'),
         Validator('REDIS_URL', cast=str, default='redis://localhost:6379'),
+        Validator('PUSH_STREAM_MAXLEN', cast=int, default=10000),
         Validator('YOUTRACK_URL', is_type_of=str, default=''),
         Validator(
             'YOUTRACK_API_TOKEN',
@@ -210,6 +214,20 @@ CONFIG = Dynaconf(
             when=Validator('TM_CLIENT_ENABLE', condition=bool),
         ),
         Validator('PASSWORD_MIN_LENGTH', cast=int, default=11),
+        Validator('HTTP_CLIENT_LIMIT', cast=int, default=100),
+        Validator('HTTP_CLIENT_LIMIT_PER_HOST', cast=int, default=10),
+        Validator('HTTP_CLIENT_TIMEOUT', cast=int, default=60),
+        Validator('HTTP_CLIENT_RETRIES', cast=int, default=3),
+        Validator(
+            'REPORT_JOB_TTL',
+            cast=int,
+            default=int(datetime.timedelta(hours=1).total_seconds()),
+        ),
+        Validator(
+            'REPORT_JOB_HEARTBEAT_TIMEOUT',
+            cast=int,
+            default=int(datetime.timedelta(minutes=5).total_seconds()),
+        ),
     ],
 )
 CONFIG.configure()
@@ -1,9 +1,10 @@
 from typing import Any, AsyncGenerator, ClassVar, Dict, Tuple
 
 from sqlalchemy import MetaData
+from sqlalchemy.event import listens_for
 from sqlalchemy.exc import ProgrammingError
 from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker, create_async_engine
-from sqlalchemy.orm import DeclarativeBase
+from sqlalchemy.orm import DeclarativeBase, ORMExecuteState, Session, raiseload
 from sqlalchemy.pool import NullPool
 from sqlalchemy.schema import CreateTable
 from sqlalchemy.sql.ddl import DDL
@@ -34,6 +35,19 @@ multithreading_safe_async_session = async_sessionmaker(
 )
 
 
+if CONFIG.DB_STRICT_LOADING:
+
+    @listens_for(Session, 'do_orm_execute')
+    def _raise_on_default_loads(state: ORMExecuteState) -> None:
+        """
+        Make the relationships not named in the options of a query raise on access
+        instead of being loaded by their ``lazy`` default, so a query without a load
+        profile fails in development and tests rather than fans out.
+        """
+        if state.is_select and not (state.is_column_load or state.is_relationship_load):
+            state.statement = state.statement.options(raiseload('*', sql_only=True))
+
+
 class BaseDBModel(DeclarativeBase):
     __abstract__ = True
     metadata = MetaData()
@@ -3,9 +3,8 @@ from collections.abc import Sequence
 from http import HTTPMethod
 from typing import TYPE_CHECKING, Any, Literal
 
-import aiohttp
-
 from wb.log import log
+from wb.utils.http_client import connectors_http_client
 
 from .base import AccountData, ConfigValidationError, Connector
 
@@ -69,9 +68,15 @@ class RestAPIConnector(Connector):
             data = {self.search_field_name: search_field_value}
         log.debug(f'Requesting {url} with data: {data}')
         log.debug(f'Headers: {headers}')
-        async with aiohttp.ClientSession(headers=headers) as session:
-            async with session.request(self.request_method, url, data=data) as response:
-                return await response.json()
+        # the lookup is read-only, so it is safe to retry POST requests as well
+        async with connectors_http_client.request(
+            self.request_method,
+            url,
+            retries=connectors_http_client.retries,
+            headers=headers,
+            data=data,
+        ) as response:
+            return await response.json()
 
     def _parse_status(self, data: dict) -> bool:
         if self.status_field_name is None:
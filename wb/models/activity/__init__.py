@@ -1,3 +1,4 @@
 from .activity import *
+from .daily_summary import *
 from .done_task import *
 from .source import *
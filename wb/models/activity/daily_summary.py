@@ -0,0 +1,58 @@
+from datetime import date
+
+import sqlalchemy as sa
+from sqlalchemy.orm import Mapped, mapped_column
+
+from wb.db import BaseMonthPartitionedModel, BaseMonthPartitionMixin
+
+__all__ = (
+    'ActivityDailySummary',
+    'ACTIVITY_SUMMARY_LOCK_NAMESPACE',
+)
+
+ACTIVITY_SUMMARY_LOCK_NAMESPACE = 0x0AC7
+
+
+class ActivityDailySummaryMixin:
+    employee_id: Mapped[int] = mapped_column(
+        sa.ForeignKey(
+            'employees.id',
+            ondelete='CASCADE',
+            name='activity_daily_summary_employee_id_fkey',
+        ),
+        primary_key=True,
+    )
+    day: Mapped[date] = mapped_column(primary_key=True)
+    activities: Mapped[int] = mapped_column(default=0)
+    youtrack: Mapped[int] = mapped_column(default=0)
+    gerrit_merged: Mapped[int] = mapped_column(default=0)
+    gerrit_new: Mapped[int] = mapped_column(default=0)
+    gerrit_reviewed: Mapped[int] = mapped_column(default=0)
+    gerrit_comments: Mapped[int] = mapped_column(default=0)
+    cvs: Mapped[int] = mapped_column(default=0)
+    google_meet: Mapped[int] = mapped_column(default=0)
+    discord_call: Mapped[int] = mapped_column(default=0)
+    pararam: Mapped[int] = mapped_column(default=0)
+    google_drive: Mapped[int] = mapped_column(default=0)
+    zendesk: Mapped[int] = mapped_column(default=0)
+
+
+class ActivityDailySummaryPartMixin(ActivityDailySummaryMixin, BaseMonthPartitionMixin):
+    pass
+
+
+class ActivityDailySummary(ActivityDailySummaryMixin, BaseMonthPartitionedModel):
+    """
+    Daily rollup of employee activities.
+
+    There is a column per ``ActivitySummaryItem`` field, durations are stored in seconds,
+    ``activities`` is the number of all activities of the day. Rows are upserted by the
+    activity collector and can be rebuilt with ``maintenance_rebuild_activity_daily_summary``.
+    """
+
+    __tablename__ = 'activity_daily_summary'
+    __part_mixin__ = ActivityDailySummaryPartMixin
+    __partitions__ = {}
+    __table_args__ = {
+        'postgresql_partition_by': 'RANGE(day)',
+    }
@@ -1,5 +1,7 @@
 import base64
 import binascii
+import hashlib
+import hmac
 import secrets
 import typing as t
 from datetime import datetime, timedelta
@@ -14,11 +16,20 @@ from wb.db import BaseDBModel
 if t.TYPE_CHECKING:
     from .employee import Employee
 
-__all__ = ('APIToken', 'APITokenParseException')
+__all__ = ('APIToken', 'APITokenParseException', 'make_api_token_digest')
 
 ALT_CHARS = b'-:'
 
 
+def make_api_token_digest(token: str) -> str:
+    """
+    Keyed hash of a token, tokens are looked up by it without decryption.
+    """
+    return hmac.new(
+        CONFIG.DB_ENCRYPT_KEY.encode(), token.encode(), hashlib.sha256
+    ).hexdigest()
+
+
 class APITokenParseException(Exception):
     msg = 'failed to parse token'
 
@@ -39,6 +50,7 @@ class APIToken(BaseDBModel):
     token: Mapped[str] = mapped_column(
         EncryptedObject['str'](str, passphrase=CONFIG.DB_ENCRYPT_KEY)
     )
+    token_digest: Mapped[str] = mapped_column(unique=True)
 
     @property
     def is_expired(self) -> bool:
@@ -75,10 +87,12 @@ class APIToken(BaseDBModel):
         created: datetime,
         expires_in: int | None = None,
     ) -> t.Self:
+        token = cls._gen_token(owner.id)
         return cls(
             name=name,
             owner_id=owner.id,
             created=created,
             expires_in=expires_in,
-            token=cls._gen_token(owner.id),
+            token=token,
+            token_digest=make_api_token_digest(token),
         )
@@ -2,11 +2,22 @@ from __future__ import annotations
 
 import re
 from datetime import date, datetime, timezone
-from typing import TYPE_CHECKING, List, Optional
+from enum import StrEnum
+from typing import TYPE_CHECKING, Any, List, Optional
 
 import sqlalchemy as sa
+from sqlalchemy.engine import Connection
+from sqlalchemy.event import listens_for
 from sqlalchemy.ext.associationproxy import AssociationProxy, association_proxy
-from sqlalchemy.orm import Mapped, column_property, mapped_column, relationship
+from sqlalchemy.orm import (
+    Mapped,
+    column_property,
+    mapped_column,
+    raiseload,
+    relationship,
+    selectinload,
+)
+from sqlalchemy.orm.strategy_options import _AbstractLoad
 from sqlalchemy.sql import expression
 
 from wb.config import CONFIG
@@ -15,6 +26,7 @@ from ._base import BaseDBModel
 from .cooperation_type import CooperationType
 from .organization import Organization
 from .position import Position
+from .schedule.day_status import invalidate_days_status
 from .schedule.schedule import EmployeeSchedule
 
 if TYPE_CHECKING:
@@ -28,10 +40,12 @@ VALID_LOGIN = re.compile(r'^[\w.-@_0-9]{2,64}$', re.IGNORECASE)
 
 __all__ = (
     'Employee',
+    'EmployeeLoadProfile',
     'EmployeeRole',
     'ROLES',
     'Team',
     'TeamTag',
+    'employee_load_options',
 )
 
 ROLES = [
@@ -397,6 +411,19 @@ class Employee(BaseDBModel):
         self.revision += 1
 
 
+# noinspection PyUnusedLocal
+@listens_for(Employee, 'after_update')
+def _invalidate_days_status_on_work_dates_change(
+    mapper: Any, connection: Connection, target: Employee
+) -> None:
+    state = sa.inspect(target)
+    if (
+        state.attrs.work_started.history.has_changes()
+        or state.attrs.work_ended.history.has_changes()
+    ):
+        invalidate_days_status(connection, [target.id])
+
+
 association_table__team__team_tag = sa.Table(
     'asc__team__team_tag',
     BaseDBModel.metadata,
@@ -489,3 +516,75 @@ class TeamTag(BaseDBModel):
     def up_revision(self) -> None:
         self.updated = datetime.utcnow()
         self.revision += 1
+
+
+class EmployeeLoadProfile(StrEnum):
+    AUTH = 'auth'
+    LIST = 'list'
+    DETAIL = 'detail'
+    REPORT = 'report'
+
+
+def _raise_nested(load: _AbstractLoad) -> _AbstractLoad:
+    return load.raiseload('*', sql_only=True)
+
+
+def employee_load_options(profile: EmployeeLoadProfile) -> tuple[_AbstractLoad, ...]:
+    """
+    Loader options of the ``Employee`` relationships used by a kind of request.
+
+    Only the relationships of the profile are loaded, the related objects get their
+    plain columns. Any other relationship raises on access instead of being loaded by
+    the ``selectin`` default with its own relationships in turn.
+
+    :param profile: ``AUTH`` for the current user (roles, work notification chats and
+        the team with its manager), ``LIST`` for list outputs and exports, ``DETAIL`` for
+        a single employee to show or update, ``REPORT`` for the employee columns of reports.
+    :type profile: EmployeeLoadProfile
+    :return: Options for ``Select.options``.
+    :rtype: tuple[_AbstractLoad, ...]
+    """
+    # pylint: disable=protected-access
+    team_with_manager = selectinload(Employee.team).options(
+        _raise_nested(selectinload(Team.manager)), raiseload('*', sql_only=True)
+    )
+    catalogs = tuple(
+        _raise_nested(selectinload(rel))
+        for rel in (
+            Employee.position,
+            Employee.organization,
+            Employee.cooperation_type,
+        )
+    )
+    if profile == EmployeeLoadProfile.AUTH:
+        options: tuple[_AbstractLoad, ...] = (
+            selectinload(Employee._roles),
+            selectinload(Employee._work_notifications_chats),
+            team_with_manager,
+        )
+    elif profile == EmployeeLoadProfile.REPORT:
+        options = (
+            *catalogs,
+            _raise_nested(selectinload(Employee.managers)),
+            _raise_nested(selectinload(Employee.team)),
+        )
+    else:
+        options = (
+            *catalogs,
+            _raise_nested(selectinload(Employee.pool)),
+            selectinload(Employee._projects),
+            selectinload(Employee._roles),
+            selectinload(Employee._skills),
+            selectinload(Employee._work_notifications_chats),
+            _raise_nested(selectinload(Employee.tm)),
+            selectinload(Employee.linked_accounts),
+            _raise_nested(selectinload(Employee.managers)),
+            _raise_nested(selectinload(Employee.mentors)),
+            _raise_nested(selectinload(Employee.watchers)),
+            (
+                team_with_manager
+                if profile == EmployeeLoadProfile.DETAIL
+                else _raise_nested(selectinload(Employee.team))
+            ),
+        )
+    return *options, raiseload('*', sql_only=True)
@@ -1,4 +1,5 @@
 from ._base import *
+from .day_status import *
 from .exclusion import *
 from .holiday import *
 from .schedule import *
@@ -0,0 +1,148 @@
+from datetime import date
+from typing import Any, Iterable
+
+import sqlalchemy as sa
+from sqlalchemy.dialects.postgresql import ARRAY
+from sqlalchemy.engine import Connection
+from sqlalchemy.event import listens_for
+from sqlalchemy.orm import Mapped, mapped_column
+
+from wb.db import BaseDBModel
+
+from ._base import DayType
+from .exclusion import EmployeeScheduleExclusion
+from .holiday import Holiday
+from .schedule import EmployeeSchedule
+
+__all__ = (
+    'EmployeeDayStatusMonth',
+    'DAY_TYPE_CODES',
+    'DAY_TYPE_BY_CODE',
+    'DAY_STATUS_LOCK_NAMESPACE',
+    'invalidate_days_status',
+)
+
+DAY_STATUS_LOCK_NAMESPACE = 0x0DA7
+
+DAY_TYPE_CODES: dict[DayType, str] = {
+    DayType.WORKING_DAY: 'w',
+    DayType.WEEKEND: 'e',
+    DayType.WORKING_DAY_PERSONAL: 'W',
+    DayType.WEEKEND_PERSONAL: 'E',
+    DayType.HOLIDAY: 'h',
+    DayType.VACATION: 'v',
+    DayType.UNPAID_LEAVE: 'u',
+    DayType.SICK_DAY: 's',
+    DayType.BEFORE_EMPLOYMENT: 'b',
+    DayType.AFTER_DISMISSAL: 'a',
+    DayType.BUSINESS_TRIP: 't',
+}
+DAY_TYPE_BY_CODE: dict[str, DayType] = {v: k for k, v in DAY_TYPE_CODES.items()}
+
+
+class EmployeeDayStatusMonth(BaseDBModel):
+    """
+    Materialized day statuses of an employee for a month.
+
+    ``days`` holds one ``DAY_TYPE_CODES`` character per day of the month. Rows are deleted
+    in the transaction changing schedules, exclusions, holidays or work dates and
+    are recalculated on the next read.
+    """
+
+    __tablename__ = 'employee__day_status'
+
+    employee_id: Mapped[int] = mapped_column(
+        sa.ForeignKey(
+            'employees.id',
+            ondelete='CASCADE',
+            name='employee__day_status_employee_id_fkey',
+        ),
+        primary_key=True,
+    )
+    month: Mapped[date] = mapped_column(primary_key=True)
+    days: Mapped[str] = mapped_column(sa.String(31), nullable=False)
+
+
+def invalidate_days_status(
+    connection: Connection,
+    employees_ids: Iterable[int],
+    start: date | None = None,
+    end: date | None = None,
+) -> None:
+    """
+    Drop materialized months of the employees intersecting with the ``start``-``end`` range.
+
+    An exclusive advisory lock is taken for every employee till the end of the transaction,
+    so readers do not materialize months from the data being changed.
+    """
+    ids = sorted(set(employees_ids))
+    if not ids:
+        return
+    connection.execute(
+        sa.text(
+            'SELECT pg_advisory_xact_lock(:ns, id) '
+            'FROM unnest(CAST(:ids AS integer[])) AS id ORDER BY id'
+        ).bindparams(
+            sa.bindparam('ns', DAY_STATUS_LOCK_NAMESPACE),
+            sa.bindparam('ids', ids, type_=ARRAY(sa.Integer)),
+        )
+    )
+    q = sa.delete(EmployeeDayStatusMonth).where(
+        EmployeeDayStatusMonth.employee_id.in_(ids)
+    )
+    if start:
+        q = q.where(EmployeeDayStatusMonth.month >= start.replace(day=1))
+    if end:
+        q = q.where(EmployeeDayStatusMonth.month <= end)
+    connection.execute(q)
+
+
+def _history_values(target: Any, key: str) -> list[Any]:
+    hist = sa.inspect(target).attrs[key].history
+    return [v for v in (*hist.added, *hist.unchanged, *hist.deleted) if v is not None]
+
+
+# noinspection PyUnusedLocal
+@listens_for(EmployeeSchedule, 'after_insert')
+@listens_for(EmployeeSchedule, 'after_update')
+@listens_for(EmployeeSchedule, 'after_delete')
+def _invalidate_on_schedule_change(
+    mapper: Any, connection: Connection, target: EmployeeSchedule
+) -> None:
+    # an open ended schedule affects all the following months
+    invalidate_days_status(
+        connection, [target.employee_id], start=min(_history_values(target, 'start'))
+    )
+
+
+# noinspection PyUnusedLocal
+@listens_for(EmployeeScheduleExclusion, 'after_insert')
+@listens_for(EmployeeScheduleExclusion, 'after_update')
+@listens_for(EmployeeScheduleExclusion, 'after_delete')
+def _invalidate_on_exclusion_change(
+    mapper: Any, connection: Connection, target: EmployeeScheduleExclusion
+) -> None:
+    days = _history_values(target, 'day')
+    invalidate_days_status(
+        connection, [target.employee_id], start=min(days), end=max(days)
+    )
+
+
+# noinspection PyUnusedLocal
+@listens_for(Holiday, 'after_insert')
+@listens_for(Holiday, 'after_update')
+@listens_for(Holiday, 'after_delete')
+def _invalidate_on_holiday_change(
+    mapper: Any, connection: Connection, target: Holiday
+) -> None:
+    days = _history_values(target, 'day')
+    employees_ids = connection.scalars(
+        sa.select(EmployeeSchedule.employee_id)
+        .where(
+            EmployeeSchedule.holiday_set_id == target.holiday_set_id,
+            EmployeeSchedule.start <= max(days),
+            sa.or_(EmployeeSchedule.end.is_(None), EmployeeSchedule.end >= min(days)),
+        )
+        .distinct()
+    ).all()
+    invalidate_days_status(connection, employees_ids, start=min(days), end=max(days))
@@ -1,2 +1,4 @@
+from .current import *
 from .key import *
 from .logs import *
+from .presence import *
@@ -0,0 +1,175 @@
+from datetime import datetime
+from typing import Any, Iterable, Protocol
+
+import sqlalchemy as sa
+from sqlalchemy.dialects.postgresql import Insert
+from sqlalchemy.dialects.postgresql import insert as pg_insert
+from sqlalchemy.orm import Mapped, mapped_column
+
+from shared_utils.sql import StringEnum
+from wb.db import BaseDBModel
+
+from .logs import TMRecord, TMRecordType
+
+__all__ = (
+    'EmployeeTMCurrent',
+    'is_manual_tm_record',
+    'make_tm_current_upsert',
+    'make_tm_current_query',
+    'make_tm_current_rebuild',
+)
+
+
+class EmployeeTMCurrent(BaseDBModel):
+    """
+    The last ``TMRecord`` of an employee, and the last manual one.
+
+    A manual record is a come or leave record made by the employee, i.e. with a
+    source other than ``auto``. Rows are upserted in the transaction adding the
+    records and only move forward in time, an employee without records has no row.
+    """
+
+    __tablename__ = 'employee__tm_current'
+
+    employee_id: Mapped[int] = mapped_column(
+        sa.ForeignKey(
+            'employees.id',
+            ondelete='CASCADE',
+            name='employee__tm_current_employee_id_fkey',
+        ),
+        primary_key=True,
+    )
+    status: Mapped[TMRecordType] = mapped_column(
+        StringEnum['TMRecordType'](TMRecordType, 8)
+    )
+    time: Mapped[datetime]
+    manual_status: Mapped[TMRecordType | None] = mapped_column(
+        StringEnum['TMRecordType'](TMRecordType, 8)
+    )
+    manual_time: Mapped[datetime | None]
+
+
+class _TMRecordLike(Protocol):
+    employee_id: int
+    status: TMRecordType
+    time: datetime
+    source: str | None
+
+
+def is_manual_tm_record(status: TMRecordType, source: str | None) -> bool:
+    # the same as `source != 'auto'` in sql, which is false for a null source
+    return (
+        status in (TMRecordType.COME, TMRecordType.LEAVE)
+        and source is not None
+        and source != 'auto'
+    )
+
+
+def _later(time_col: Any, current_col: Any) -> Any:
+    return sa.and_(
+        time_col.is_not(None), sa.or_(current_col.is_(None), time_col >= current_col)
+    )
+
+
+def make_tm_current_upsert(records: Iterable[_TMRecordLike]) -> Insert | None:
+    """
+    Upsert the current statuses of the employees with the added records, only the
+    changed rows are returned with ``returning``.
+
+    :param records: the added records, e.g. returned by the insert
+    :return: the statement, ``None`` if there are no records
+    """
+    rows: dict[int, dict[str, Any]] = {}
+    for rec in records:
+        row = rows.setdefault(
+            rec.employee_id,
+            {
+                'employee_id': rec.employee_id,
+                'status': rec.status,
+                'time': rec.time,
+                'manual_status': None,
+                'manual_time': None,
+            },
+        )
+        if rec.time >= row['time']:
+            row['status'], row['time'] = rec.status, rec.time
+        if is_manual_tm_record(rec.status, rec.source) and (
+            row['manual_time'] is None or rec.time >= row['manual_time']
+        ):
+            row['manual_status'], row['manual_time'] = rec.status, rec.time
+    if not rows:
+        return None
+    cur = EmployeeTMCurrent.__table__.c
+    stmt = pg_insert(EmployeeTMCurrent).values(list(rows.values()))
+    new = stmt.excluded
+    is_later = _later(new.time, cur.time)
+    is_later_manual = _later(new.manual_time, cur.manual_time)
+    return stmt.on_conflict_do_update(
+        index_elements=[cur.employee_id],
+        where=sa.or_(is_later, is_later_manual),
+        set_={
+            'status': sa.case((is_later, new.status), else_=cur.status),
+            'time': sa.case((is_later, new.time), else_=cur.time),
+            'manual_status': sa.case(
+                (is_later_manual, new.manual_status), else_=cur.manual_status
+            ),
+            'manual_time': sa.case(
+                (is_later_manual, new.manual_time), else_=cur.manual_time
+            ),
+        },
+    )
+
+
+def make_tm_current_query(employees_ids: Iterable[int] | None = None) -> sa.Select:
+    """
+    The current statuses of the employees calculated from their records.
+
+    :param employees_ids: all the employees by default, employees without records
+        are skipped
+    """
+    employees = sa.table('employees', sa.column('id'))
+    ids = sa.select(employees.c.id.label('employee_id'))
+    if employees_ids is not None:
+        ids = ids.where(employees.c.id.in_(list(employees_ids)))
+    ids_subq = ids.subquery('ids')
+    last = (
+        sa.select(TMRecord.status, TMRecord.time)
+        .where(TMRecord.employee_id == ids_subq.c.employee_id)
+        .order_by(TMRecord.time.desc())
+        .limit(1)
+    )
+    last_lat = last.lateral('last')
+    manual_lat = last.where(
+        TMRecord.status.in_((TMRecordType.COME, TMRecordType.LEAVE)),
+        TMRecord.source != 'auto',
+    ).lateral('last_manual')
+    return (
+        sa.select(
+            ids_subq.c.employee_id,
+            last_lat.c.status,
+            last_lat.c.time,
+            manual_lat.c.status.label('manual_status'),
+            manual_lat.c.time.label('manual_time'),
+        )
+        .select_from(ids_subq)
+        .join(last_lat, sa.true())
+        .outerjoin(manual_lat, sa.true())
+    )
+
+
+def make_tm_current_rebuild(employees_ids: Iterable[int] | None = None) -> Insert:
+    """
+    Rewrite the current statuses of the employees from their records, see
+    ``make_tm_current_query``.
+    """
+    stmt = pg_insert(EmployeeTMCurrent).from_select(
+        ['employee_id', 'status', 'time', 'manual_status', 'manual_time'],
+        make_tm_current_query(employees_ids),
+    )
+    return stmt.on_conflict_do_update(
+        index_elements=[EmployeeTMCurrent.__table__.c.employee_id],
+        set_={
+            col: stmt.excluded[col]
+            for col in ('status', 'time', 'manual_status', 'manual_time')
+        },
+    )
@@ -0,0 +1,100 @@
+from datetime import date, datetime, timedelta
+from typing import Any, Iterable
+
+import sqlalchemy as sa
+from sqlalchemy.dialects.postgresql import ARRAY
+from sqlalchemy.engine import Connection
+from sqlalchemy.event import listens_for
+from sqlalchemy.orm import Mapped, mapped_column
+
+from shared_utils.sql import StringEnum
+from wb.db import BaseDBModel
+
+from .logs import TMRecord, TMRecordType
+
+__all__ = (
+    'EmployeeTMPresenceDay',
+    'TM_PRESENCE_LOCK_NAMESPACE',
+    'invalidate_tm_presence',
+)
+
+TM_PRESENCE_LOCK_NAMESPACE = 0x7E5D
+
+
+class EmployeeTMPresenceDay(BaseDBModel):
+    """
+    Presence summary of an employee for a closed (past) day, from the records of the day.
+
+    ``first_time`` and ``last_time`` are the times of the first record and of the last
+    one, or of the leave closing the day at the next midnight, ``last_status`` is the
+    status of the last record. All of them are null if there are no records.
+    A presence carried over from the previous day is not included. Rows are deleted
+    in the transaction changing the records of the day and recalculated on the next read.
+    """
+
+    __tablename__ = 'employee__tm_presence_day'
+
+    employee_id: Mapped[int] = mapped_column(
+        sa.ForeignKey(
+            'employees.id',
+            ondelete='CASCADE',
+            name='employee__tm_presence_day_employee_id_fkey',
+        ),
+        primary_key=True,
+    )
+    day: Mapped[date] = mapped_column(primary_key=True)
+    first_time: Mapped[datetime | None]
+    last_time: Mapped[datetime | None]
+    last_status: Mapped[TMRecordType | None] = mapped_column(
+        StringEnum['TMRecordType'](TMRecordType, 8)
+    )
+    away: Mapped[timedelta] = mapped_column(sa.Interval, default=timedelta(0))
+
+
+def invalidate_tm_presence(
+    connection: Connection, employees_days: Iterable[tuple[int, date]]
+) -> None:
+    """
+    Drop the presence summaries of the days of the employees.
+
+    An exclusive advisory lock is taken for every employee till the end of the transaction,
+    so readers do not store summaries calculated from the records being changed.
+    """
+    keys = sorted(set(employees_days))
+    if not keys:
+        return
+    connection.execute(
+        sa.text(
+            'SELECT pg_advisory_xact_lock(:ns, id) '
+            'FROM unnest(CAST(:ids AS integer[])) AS id ORDER BY id'
+        ).bindparams(
+            sa.bindparam('ns', TM_PRESENCE_LOCK_NAMESPACE),
+            sa.bindparam(
+                'ids', sorted({emp_id for emp_id, _ in keys}), type_=ARRAY(sa.Integer)
+            ),
+        )
+    )
+    connection.execute(
+        sa.delete(EmployeeTMPresenceDay).where(
+            sa.tuple_(EmployeeTMPresenceDay.employee_id, EmployeeTMPresenceDay.day).in_(
+                keys
+            )
+        )
+    )
+
+
+def _history_days(target: TMRecord) -> list[date]:
+    hist = sa.inspect(target).attrs.time.history
+    return [v.date() for v in (*hist.added, *hist.unchanged, *hist.deleted) if v]
+
+
+# noinspection PyUnusedLocal
+@listens_for(TMRecord, 'after_insert')
+@listens_for(TMRecord, 'after_update')
+@listens_for(TMRecord, 'after_delete')
+def _invalidate_on_tm_record_change(
+    mapper: Any, connection: Connection, target: TMRecord
+) -> None:
+    invalidate_tm_presence(
+        connection, [(target.employee_id, day) for day in _history_days(target)]
+    )
@@ -1,3 +1,4 @@
+import os
 import typing as t
 
 from redis.asyncio import ConnectionPool
@@ -9,6 +10,7 @@ __all__ = (
     'get_redis_session',
     'session_maker',
     'multithreading_safe_session_maker',
+    'choose_session_maker',
     'AsyncRedis',
 )
 
@@ -24,6 +26,16 @@ def multithreading_safe_session_maker() -> AsyncRedis:
     return AsyncRedis.from_url(CONFIG.REDIS_URL)
 
 
+def choose_session_maker() -> t.Callable[[], AsyncRedis]:
+    """
+    Choose the session maker for the current process, in multithreading mode (celery
+    workers) every task runs its own event loop and can not share the pool.
+    """
+    if os.getenv('MULTITHREADING_ENABLED', 'False') == 'True':
+        return multithreading_safe_session_maker
+    return session_maker
+
+
 async def get_redis_session() -> t.AsyncGenerator[AsyncRedis, None]:
     async with session_maker() as session:
         yield session
@@ -4,6 +4,7 @@ from .catalog import __routers__ as __catalog__routers__
 from .changelog import __routers__ as __changelog_router__
 from .counteragent import __routers__ as __counteragent__routers__
 from .employee import __routers__ as __employee__routers__
+from .events import __routers__ as __events__routers__
 from .group import __routers__ as __group__routers__
 from .help_center import __routers__ as __help_center__routers__
 from .linked_account import __routers__ as __linked_account__routers__
@@ -32,6 +33,7 @@ __routers__ = [
     *__changelog_router__,
     *__counteragent__routers__,
     *__employee__routers__,
+    *__events__routers__,
     *__group__routers__,
     *__help_center__routers__,
     *__linked_account__routers__,
@@ -1,6 +1,4 @@
 import asyncio
-import csv
-import io
 import os
 import re
 import secrets
@@ -38,13 +36,12 @@ from wb.schemas import (
     SelectOutput,
     SelectParams,
     ShortEmployeeOut,
-    get_employee_csv_fields,
     get_employee_output_model_class,
 )
 from wb.services import (
     get_employee_days_status,
     get_employees,
-    get_employees_days_status,
+    get_employees_days_status_range,
 )
 from wb.services.employee import check_similar_usernames
 from wb.services.notifications import (
@@ -55,7 +52,7 @@ from wb.services.notifications import (
     NotificationMessage,
 )
 from wb.tasks.send import task_send_email
-from wb.utils.current_user import current_employee
+from wb.utils.current_user import current_employee, load_current_employee
 from wb.utils.db import count_select_query_results, resolve_db_id, resolve_db_ids
 from wb.utils.email import check_email_domain
 from wb.utils.notifications import send_notification_to_people_project
@@ -68,6 +65,7 @@ from wb.utils.query import (
     make_success_output,
 )
 from wb.utils.search import sort_to_query
+from wb.utils.streaming import make_csv_streaming_response
 
 from .schemas import (
     EmployeeCreate,
@@ -82,6 +80,7 @@ from .utils import (
     build_hierarchy,
     get_manager_chain,
     get_subordinates_on_update_query,
+    iter_employees_csv,
     resolve_employee_id_param,
 )
 
@@ -199,7 +198,7 @@ async def list_employees(
         session=session,
     )
     today = date.today()
-    employees_days = await get_employees_days_status(
+    employees_days = await get_employees_days_status_range(
         employees, today, today, session=session
     )
     items = []
@@ -207,7 +206,7 @@ async def list_employees(
         output_model_class = get_employee_output_model_class(emp)
         emp_out = output_model_class.from_obj(
             emp,
-            today_schedule_status=employees_days[emp.id][today],
+            today_schedule_status=employees_days.get(emp.id, today),
         )
         items.append(emp_out)
     return make_list_output(
@@ -267,38 +266,15 @@ async def list_employees_day_status(
 @router.get('/export')
 async def export_list(
     query: ListFilterParams = Depends(ListFilterParams),
-    session: AsyncSession = Depends(get_db_session),
 ) -> StreamingResponse:
-    _, employees = await get_employees(
-        employee_filter=query.filter,
-        sort_by=query.sort_by,
-        sort_direction=query.direction,  # type: ignore
-        readable_fields=list_employee_readable_fields(),
-        session=session,
-    )
-    fields = {emp.id: get_employee_csv_fields(emp) for emp in employees}
-    _seen = set()
-    all_fields = list(
-        k
-        for emp_fields in fields.values()
-        for k in emp_fields
-        if not (k in _seen or _seen.add(k))  # type: ignore[func-returns-value]
+    return make_csv_streaming_response(
+        iter_employees_csv(
+            query.filter,
+            sort_by=query.sort_by,
+            sort_direction=query.direction,  # type: ignore
+        )
     )
 
-    output = io.StringIO()
-    writer = csv.writer(output)
-    writer.writerow(all_fields)
-    for emp in employees:
-        row = []
-        for field in all_fields:
-            if field not in fields[emp.id]:
-                row.append('N/A')
-            else:
-                row.append(fields[emp.id][field].csv_getter(emp))
-        writer.writerow(row)
-    export_media_type = 'text/csv'
-    return StreamingResponse(iter([output.getvalue()]), media_type=export_media_type)
-
 
 @router.get('/select')
 async def employee_select(
@@ -718,7 +694,7 @@ async def select_subordinates_on_update(
 async def watch_employee(
     employee_id: EmployeeIDParamT, session: AsyncSession = Depends(get_db_session)
 ) -> BaseModelIdOutput:
-    curr_user = current_employee()
+    curr_user = await load_current_employee(session)
     emp = await resolve_employee_id_param(employee_id, session=session)
     if len(list(filter(lambda u: u.id == curr_user.id, emp.watchers))) > 0:
         raise HTTPException(422, detail='user already watched')
@@ -21,7 +21,7 @@ from wb.schemas import (
     ShortEmployeeOut,
 )
 from wb.services import (
-    calc_employee_vacation_days,
+    calc_employees_vacation_days,
     get_employee_scheduled_holidays_and_weekends,
 )
 from wb.services.notifications import (
@@ -30,7 +30,11 @@ from wb.services.notifications import (
     NotificationDestinationRole,
     NotificationMessage,
 )
-from wb.utils.current_user import current_employee, get_current_roles_employee_related
+from wb.utils.current_user import (
+    current_employee,
+    get_current_roles_employee_related,
+    load_current_employee,
+)
 from wb.utils.db import count_select_query_results, resolve_db_ids
 from wb.utils.query import (
     get_select_value,
@@ -164,7 +168,7 @@ async def update_employee_schedule(
     body: EmployeeScheduleUpdate,
     session: AsyncSession = Depends(get_db_session),
 ) -> BaseModelIdOutput:
-    curr_user = current_employee()
+    curr_user = await load_current_employee(session)
     if not curr_user.is_hr:
         raise HTTPException(HTTPStatus.FORBIDDEN, detail='denied')
     emp = await resolve_employee_id_param(employee_id, session=session)
@@ -444,7 +448,7 @@ async def create_schedule_exclusion(
     ):
         raise HTTPException(422, detail="can't be set earlier today, contact hr")
     guid = await gen_new_exclusion_guid(emp, gen_guid, session=session)
-    curr_user = current_employee()
+    curr_user = await load_current_employee(session)
     msg = (
         f'Schedule exclusion from {format_date(body.start)} to {format_date(body.end)} ({humanize_day_type(body.type)}) '
         f'for {emp.link_pararam} has been added by {curr_user.link_pararam}'
@@ -550,7 +554,7 @@ async def create_move_exclusion(
     ):
         raise HTTPException(422, detail='all dates must be at least today')
     guid = await gen_new_exclusion_guid(emp, gen_guid, session=session)
-    curr_user = current_employee()
+    curr_user = await load_current_employee(session)
     days: List[date] = list(filter(lambda x: x, [body.weekend, body.working_day]))  # type: ignore
     holidays, weekends = await get_employee_scheduled_holidays_and_weekends(
         emp, min(days), max(days), session=session
@@ -650,7 +654,7 @@ async def update_move_exclusion(
         and body.weekend < date.today()
     ):
         raise HTTPException(422, detail='all dates must be at least today')
-    curr_user = current_employee()
+    curr_user = await load_current_employee(session)
     days: List[date] = list(filter(lambda x: x, [body.weekend, body.working_day]))  # type: ignore
     holidays, weekends = await get_employee_scheduled_holidays_and_weekends(
         emp, min(days), max(days), session=session
@@ -864,7 +868,7 @@ async def cancel_one_day_in_schedule_exclusion(
         ),
         session=session,
     )
-    curr_user = current_employee()
+    curr_user = await load_current_employee(session)
     now = datetime.utcnow()
     if cnt > 1:
 
@@ -954,7 +958,7 @@ async def cancel_schedule_exclusion(
             m.EmployeeScheduleExclusion.guid == guid
         )
     )
-    curr_user = current_employee()
+    curr_user = await load_current_employee(session)
     now = datetime.utcnow()
     exclusion_start, exclusion_end, exclusion_type = None, None, None
     for excl in exclusions_raw.all():
@@ -1023,7 +1027,7 @@ async def add_vacation_correction(
     body: EmployeeVacationCorrectionCreate,
     session: AsyncSession = Depends(get_db_session),
 ) -> BaseModelIdOutput:
-    curr_user = current_employee()
+    curr_user = await load_current_employee(session)
     if not curr_user.is_hr and 'finance' not in curr_user.roles:
         raise HTTPException(403, detail='only hr can correct vacations days')
     emp = await resolve_employee_id_param(employee_id, session=session)
@@ -1115,7 +1119,7 @@ async def delete_vacation_correction(
     correction_id: int,
     session: AsyncSession = Depends(get_db_session),
 ) -> BaseModelIdOutput:
-    curr_user = current_employee()
+    curr_user = await load_current_employee(session)
     if not curr_user.is_hr:
         raise HTTPException(403, detail='only hr can correct vacations days')
     emp = await resolve_employee_id_param(employee_id, session=session)
@@ -1170,7 +1174,7 @@ async def get_free_vacation_days(
     session: AsyncSession = Depends(get_db_session),
 ) -> BasePayloadOutput[EmployeeFreeVacationDays]:
     emp = await resolve_employee_id_param(employee_id, session=session)
-    res = await calc_employee_vacation_days(emp, session=session)
+    res = (await calc_employees_vacation_days([emp], session=session))[emp.id]
     return make_success_output(
         payload=EmployeeFreeVacationDays(
             free_vacation_days_current=res.free_vacation_days_current,
@@ -1,6 +1,7 @@
 from collections import defaultdict
+from collections.abc import AsyncIterator
 from http import HTTPStatus
-from typing import Literal
+from typing import Any, Literal
 
 import sqlalchemy as sa
 from fastapi import HTTPException
@@ -8,8 +9,14 @@ from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.sql.selectable import Select
 
 import wb.models as m
-from wb.schemas import SelectEmployeeField
-from wb.services import get_employee_by_id
+from wb.acl import list_employee_readable_fields
+from wb.db import async_session
+from wb.schemas import (
+    SelectEmployeeField,
+    get_employee_csv_fields,
+    get_employee_csv_header,
+)
+from wb.services import get_employee_by_id, get_employees, get_employees_ids
 from wb.utils.current_user import current_employee
 
 from .schemas import EmployeeHierarchy
@@ -20,8 +27,11 @@ __all__ = (
     'EmployeeIDParamT',
     'get_manager_chain',
     'build_hierarchy',
+    'iter_employees_csv',
 )
 
+EMPLOYEES_CSV_CHUNK_SIZE = 200
+
 EmployeeIDParamT = int | Literal['me']
 
 
@@ -116,3 +126,48 @@ def build_hierarchy(employees: list[m.Employee]) -> EmployeeHierarchy:
             hierarchy['children'].append(build_tree(top_employee_id))
 
     return hierarchy
+
+
+async def iter_employees_csv(
+    employee_filter: str | Any | None,
+    sort_by: str | None = None,
+    sort_direction: Literal['asc', 'desc'] = 'asc',
+    chunk_size: int = EMPLOYEES_CSV_CHUNK_SIZE,
+) -> AsyncIterator[list[list[str]]]:
+    """
+    Yield the csv header and then the rows of the employees chunk by chunk.
+
+    Employees are read with a separate session, since the request session is closed
+    before a streaming response is sent. Only the ordered ids are selected up front,
+    the employees are loaded chunk by chunk, the header is evaluated by the field ACLs,
+    fields not readable for an employee are filled with ``N/A``.
+    """
+    async with async_session() as session:
+        employees_ids = await get_employees_ids(
+            employee_filter=employee_filter,
+            sort_by=sort_by,
+            sort_direction=sort_direction,
+            readable_fields=list_employee_readable_fields(),
+            session=session,
+        )
+        header = get_employee_csv_header()
+        yield [header]
+        for idx in range(0, len(employees_ids), chunk_size):
+            chunk_ids = employees_ids[idx : idx + chunk_size]
+            _, employees = await get_employees(
+                employee_filter=m.Employee.id.in_(chunk_ids), session=session
+            )
+            employees_by_id = {emp.id: emp for emp in employees}
+            rows = []
+            for emp_id in chunk_ids:
+                if (emp := employees_by_id.get(emp_id)) is None:
+                    continue
+                fields = get_employee_csv_fields(emp)
+                rows.append(
+                    [
+                        fields[field].csv_getter(emp) if field in fields else 'N/A'
+                        for field in header
+                    ]
+                )
+            session.expunge_all()
+            yield rows
@@ -0,0 +1,3 @@
+from .router import router as events_router
+
+__routers__ = (events_router,)
@@ -0,0 +1,47 @@
+from collections.abc import AsyncIterator
+
+import orjson
+from fastapi import APIRouter, Header
+from fastapi.responses import StreamingResponse
+
+from wb.utils.current_user import current_employee
+from wb.utils.push import PushEvent, subscribe_events
+
+__all__ = ('router',)
+
+
+router = APIRouter(prefix='/api/v1/events', tags=['v1', 'events'])
+
+SSE_RETRY_MS = 3000
+SSE_KEEPALIVE = 15
+
+
+def _format_event(event: PushEvent) -> bytes:
+    lines = [f'event: {event.type}', f'data: {orjson.dumps(event.data).decode()}']
+    if event.id:
+        lines.insert(0, f'id: {event.id}')
+    return ('\n'.join(lines) + '\n\n').encode()
+
+
+@router.get('')
+async def stream_events(
+    last_event_id: str | None = Header(default=None),
+) -> StreamingResponse:
+    """
+    Server-sent events of tm statuses, schedule exclusions and notifications of the
+    current user, resumed after the ``Last-Event-ID`` on reconnect.
+    """
+    curr_user_id = current_employee().id
+
+    async def body() -> AsyncIterator[bytes]:
+        yield f'retry: {SSE_RETRY_MS}\n\n'.encode()
+        async for event in subscribe_events(
+            curr_user_id, last_event_id=last_event_id, keepalive=SSE_KEEPALIVE
+        ):
+            yield b': keepalive\n\n' if event is None else _format_event(event)
+
+    return StreamingResponse(
+        body(),
+        media_type='text/event-stream',
+        headers={'Cache-Control': 'no-cache', 'X-Accel-Buffering': 'no'},
+    )
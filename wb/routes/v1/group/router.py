@@ -17,6 +17,7 @@ from wb.schemas import (
 )
 from wb.utils.current_user import current_employee, current_user
 from wb.utils.db import count_select_query_results, resolve_db_ids
+from wb.utils.principal import Principal
 from wb.utils.query import (
     get_select_value,
     make_id_output,
@@ -41,7 +42,7 @@ async def list_groups(
 ) -> BaseListOutput[GroupListItemOut]:
     curr_user = current_user()
     owner_filters = [m.Group.owner_id.is_(None)]
-    if isinstance(curr_user, m.Employee):
+    if isinstance(curr_user, Principal):
         owner_filters.append(m.Group.owner_id == curr_user.id)
     q = sa.select(m.Group).where(sa.or_(*owner_filters))
     if query.filter:
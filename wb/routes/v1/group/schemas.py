@@ -5,6 +5,7 @@ from pydantic import BaseModel
 import wb.models as m
 from wb.schemas import BaseOutModel, SelectEmployeeField
 from wb.utils.current_user import current_user
+from wb.utils.principal import Principal
 
 
 class GroupOut(BaseOutModel['m.Group']):
@@ -24,7 +25,7 @@ class GroupOut(BaseOutModel['m.Group']):
             public=obj.owner_id is None,
             editable=curr_user.is_admin
             and obj.owner_id is None
-            or (isinstance(curr_user, m.Employee) and obj.owner_id == curr_user.id),
+            or (isinstance(curr_user, Principal) and obj.owner_id == curr_user.id),
         )
 
 
@@ -43,7 +44,7 @@ class GroupListItemOut(BaseOutModel['m.Group']):
             public=obj.owner_id is None,
             editable=curr_user.is_admin
             and obj.owner_id is None
-            or (isinstance(curr_user, m.Employee) and obj.owner_id == curr_user.id),
+            or (isinstance(curr_user, Principal) and obj.owner_id == curr_user.id),
         )
 
 
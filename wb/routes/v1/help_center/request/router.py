@@ -1,11 +1,17 @@
 import json
+from collections.abc import AsyncIterator
+from contextlib import AsyncExitStack
 from http import HTTPStatus
 from typing import Any, List
+from urllib.parse import quote
 
+import aiohttp
 import sqlalchemy as sa
 from fastapi import APIRouter, Depends, HTTPException, UploadFile
+from fastapi.responses import StreamingResponse
 from sqlalchemy.exc import IntegrityError
 from sqlalchemy.ext.asyncio import AsyncSession
+from starlette.background import BackgroundTask
 
 import wb.models as m
 from wb.db import get_db_session
@@ -17,7 +23,7 @@ from wb.schemas import (
 )
 from wb.services.youtrack.utils import YoutrackException
 from wb.services.youtrack.youtrack import YoutrackProcessor
-from wb.utils.current_user import current_employee
+from wb.utils.current_user import load_current_employee
 from wb.utils.query import make_list_output, make_success_output
 
 from .schemas import IssueOut, RequestComment, RequestCreate, RequestOut
@@ -59,7 +65,7 @@ async def list_requests(
     params: RequestQueryParams = Depends(RequestQueryParams),
     session: AsyncSession = Depends(get_db_session),
 ) -> BaseListOutput[IssueOut]:
-    user = current_employee()
+    user = await load_current_employee(session)
     youtrack_processor = YoutrackProcessor(session=session)
     user_requests_query = sa.select(m.HelpCenterRequest).where(
         m.HelpCenterRequest.created_by_id == user.id
@@ -106,7 +112,7 @@ async def list_requests(
 async def get_request(
     issue_id: str, session: AsyncSession = Depends(get_db_session)
 ) -> BasePayloadOutput[RequestOut]:
-    curr_user = current_employee()
+    curr_user = await load_current_employee(session)
     youtrack_processor = YoutrackProcessor(session=session)
     obj: m.HelpCenterRequest | None = await session.scalar(
         sa.select(m.HelpCenterRequest).where(m.HelpCenterRequest.issue_id == issue_id)
@@ -126,7 +132,7 @@ async def get_request(
 async def create_request(
     body: RequestCreate, session: AsyncSession = Depends(get_db_session)
 ) -> BasePayloadOutput[Any]:
-    user = current_employee()
+    user = await load_current_employee(session)
     youtrack_account: m.YoutrackAccount | None = await session.scalar(
         sa.select(m.YoutrackAccount).where(
             m.YoutrackAccount.employee_id == user.id,
@@ -139,7 +145,7 @@ async def create_request(
     if not service:
         raise HTTPException(404, detail='Service not found')
     youtrack_processor = YoutrackProcessor(session=session)
-    project_fields: list[Any] = youtrack_processor.get_project_fields(
+    project_fields: list[Any] = await youtrack_processor.get_project_fields(
         project_id=service.group.portal.youtrack_project,
         fields=['id', 'field(id,name)'],
     )
@@ -195,7 +201,7 @@ async def upload_request_attachments(
     files: List[UploadFile],
     session: AsyncSession = Depends(get_db_session),
 ) -> BasePayloadOutput[Any]:
-    user = current_employee()
+    user = await load_current_employee(session)
     youtrack_processor = YoutrackProcessor(session=session)
     try:
         await youtrack_processor.upload_issue_attachments(
@@ -206,13 +212,70 @@ async def upload_request_attachments(
         raise HTTPException(HTTPStatus.INTERNAL_SERVER_ERROR, detail=str(err)) from err
 
 
+def _content_disposition(filename: str) -> str:
+    fallback = (
+        filename.encode('ascii', 'replace')
+        .decode()
+        .replace('"', '_')
+        .replace('\\', '_')
+    )
+    return f'attachment; filename="{fallback}"; filename*=UTF-8\'\'{quote(filename)}'
+
+
+async def _iter_attachment_content(
+    stack: AsyncExitStack, response: aiohttp.ClientResponse
+) -> AsyncIterator[bytes]:
+    async with stack:
+        async for chunk in YoutrackProcessor.iter_attachment_content(response):
+            yield chunk
+
+
+@router.get('/{issue_id}/attachments/{attachment_id}/content')
+async def download_request_attachment(
+    issue_id: str,
+    attachment_id: str,
+    session: AsyncSession = Depends(get_db_session),
+) -> StreamingResponse:
+    user = await load_current_employee(session)
+    youtrack_processor = YoutrackProcessor(session=session)
+    # the content is opened here, the db session is closed when the body is sent,
+    # the stack is closed by the body or after the response, whichever comes first
+    stack = AsyncExitStack()
+    try:
+        try:
+            attachment = await youtrack_processor.get_issue_attachment(
+                user=user,
+                issue_id=issue_id,
+                attachment_id=attachment_id,
+                fields=[ATTACHMENTS_FIELDS],
+            )
+            response = await stack.enter_async_context(
+                youtrack_processor.open_attachment_content(
+                    user=user, attachment=attachment
+                )
+            )
+        except YoutrackException as err:
+            raise HTTPException(
+                HTTPStatus.INTERNAL_SERVER_ERROR, detail=str(err)
+            ) from err
+        return StreamingResponse(
+            _iter_attachment_content(stack, response),
+            media_type=attachment['mimeType'] or 'application/octet-stream',
+            headers={'Content-Disposition': _content_disposition(attachment['name'])},
+            background=BackgroundTask(stack.aclose),
+        )
+    except BaseException:
+        await stack.aclose()
+        raise
+
+
 @router.delete('/{issue_id}/attachments/{attachment_id}')
 async def delete_request_attachment(
     issue_id: str,
     attachment_id: str,
     session: AsyncSession = Depends(get_db_session),
 ) -> BasePayloadOutput[Any]:
-    user = current_employee()
+    user = await load_current_employee(session)
     youtrack_processor = YoutrackProcessor(session=session)
     try:
         attachment = await youtrack_processor.get_issue_attachment(
@@ -237,7 +300,7 @@ async def delete_request_attachment(
 async def change_request_state(
     issue_id: str, state: str, session: AsyncSession
 ) -> SuccessPayloadOutput:
-    user = current_employee()
+    user = await load_current_employee(session)
     cannot_change = not (user.is_admin or user.is_hr)
     youtrack_processor = YoutrackProcessor(session=session)
     request: m.HelpCenterRequest | None = await session.scalar(
@@ -270,7 +333,7 @@ async def resolve_request(
     if not obj:
         raise HTTPException(404, detail='Request not found')
     fields = ['id', 'field(id,name)', 'bundle(id,name,values(name,isResolved))']
-    project_fields: list[Any] = youtrack_processor.get_project_fields(
+    project_fields: list[Any] = await youtrack_processor.get_project_fields(
         project_id=obj.service.group.portal.youtrack_project, fields=fields
     )
     states = []
@@ -300,7 +363,7 @@ async def create_request_comment(
     body: RequestComment,
     session: AsyncSession = Depends(get_db_session),
 ) -> BasePayloadOutput[Any]:
-    user = current_employee()
+    user = await load_current_employee(session)
     youtrack_processor = YoutrackProcessor(session=session)
     try:
         comment = await youtrack_processor.create_issue_comment(
@@ -318,7 +381,7 @@ async def update_request_comment(
     body: RequestComment,
     session: AsyncSession = Depends(get_db_session),
 ) -> BasePayloadOutput[Any]:
-    user = current_employee()
+    user = await load_current_employee(session)
     youtrack_processor = YoutrackProcessor(session=session)
     try:
         comment = await youtrack_processor.get_issue_comment(
@@ -344,7 +407,7 @@ async def delete_request_comment(
     comment_id: str,
     session: AsyncSession = Depends(get_db_session),
 ) -> BasePayloadOutput[Any]:
-    user = current_employee()
+    user = await load_current_employee(session)
     youtrack_processor = YoutrackProcessor(session=session)
     try:
         comment = await youtrack_processor.get_issue_comment(
@@ -367,7 +430,7 @@ async def upload_request_comment_attachments(
     files: List[UploadFile],
     session: AsyncSession = Depends(get_db_session),
 ) -> BasePayloadOutput[Any]:
-    user = current_employee()
+    user = await load_current_employee(session)
     youtrack_processor = YoutrackProcessor(session=session)
     try:
         await youtrack_processor.upload_issue_comment_attachments(
@@ -85,7 +85,7 @@ async def list_project(
         raise HTTPException(403, detail='Forbidden')
     youtrack_processor = YoutrackProcessor(session=session)
     fields = ['id', 'name', 'shortName']
-    results = youtrack_processor.list_project(fields=fields)
+    results = await youtrack_processor.list_project(fields=fields)
     return make_success_output(payload=results)
 
 
@@ -98,7 +98,7 @@ async def project_select(
         raise HTTPException(403, detail='Forbidden')
     youtrack_processor = YoutrackProcessor(session=session)
     fields = ['id', 'name', 'shortName']
-    results = youtrack_processor.list_project(fields=fields)
+    results = await youtrack_processor.list_project(fields=fields)
     return make_select_output(
         items=[
             SelectField(label=obj['name'], value=obj['shortName']) for obj in results
@@ -116,7 +116,7 @@ async def get_project_fields(
         raise HTTPException(403, detail='Forbidden')
     youtrack_processor = YoutrackProcessor(session=session)
     fields = ['id', 'field(id,name,fieldDefaults(defaultValues(id,name)))']
-    raw_results = youtrack_processor.get_project_fields(
+    raw_results = await youtrack_processor.get_project_fields(
         project_id=project_id, fields=fields
     )
     results = [transform_youtrack_project_field(obj) for obj in raw_results]
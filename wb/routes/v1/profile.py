@@ -1,7 +1,9 @@
-from fastapi import APIRouter
+from fastapi import APIRouter, Depends
+from sqlalchemy.ext.asyncio import AsyncSession
 
+from wb.db import get_db_session
 from wb.schemas import SuccessPayloadOutput, UserProfile
-from wb.utils.current_user import current_employee
+from wb.utils.current_user import load_current_employee
 from wb.utils.query import make_success_output
 
 __all__ = ('router',)
@@ -11,8 +13,10 @@ router = APIRouter(prefix='/api/v1/profile', tags=['profile'])
 
 
 @router.get('')
-async def get_profile() -> SuccessPayloadOutput[UserProfile]:
-    user = current_employee()
+async def get_profile(
+    session: AsyncSession = Depends(get_db_session),
+) -> SuccessPayloadOutput[UserProfile]:
+    user = await load_current_employee(session)
     return make_success_output(
         payload=UserProfile(
             id=user.id,
@@ -1,15 +1,17 @@
 import re
 from datetime import date, datetime
+from functools import partial
 from http import HTTPStatus
-from typing import Any, Dict
+from typing import Dict
 
 import sqlalchemy as sa
 from fastapi import APIRouter, Depends, HTTPException, Query
-from fastapi.responses import StreamingResponse
+from fastapi.responses import Response, StreamingResponse
 from sqlalchemy.ext.asyncio import AsyncSession
 
 import wb.models as m
 from wb.db import get_db_session
+from wb.redis_db import AsyncRedis, get_redis_session
 from wb.schemas import (
     BaseListOutput,
     ListFilterParams,
@@ -18,25 +20,41 @@ from wb.schemas import (
     SelectParams,
 )
 from wb.schemas.output import BasePayloadOutput, SuccessPayloadOutput
+from wb.services.reports.employee import (
+    WORKING_TIME_REPORT_MAX_MONTHS,
+    XLSX_MEDIA_TYPE,
+    generate_activity_details_report,
+    generate_activity_summary_report,
+    generate_activity_total_by_range_report,
+    generate_day_off_details_report,
+    generate_day_off_summary_report,
+    generate_done_tasks_summary_report,
+    generate_done_tasks_summary_total_report,
+    generate_due_date_report,
+    generate_free_days_report,
+    generate_presence_report,
+    generate_presence_summary_report,
+    generate_working_time_month_report,
+    get_employee_filter,
+    iter_report_csv,
+)
+from wb.services.reports.jobs import (
+    ReportJob,
+    ReportJobParams,
+    ReportJobStatus,
+    create_report_job,
+    get_report_job,
+    get_report_job_artifact,
+    get_report_job_scope,
+)
+from wb.tasks.reports import task_run_report_job
 from wb.utils.current_user import current_employee
 from wb.utils.query import make_select_output, make_success_output
 from wb.utils.search import filter_to_query
+from wb.utils.streaming import iter_file, make_csv_streaming_response
 
-from .activity_details import generate_activity_details_report
-from .activity_summary import generate_activity_summary_report
-from .activity_total_by_range import generate_activity_total_by_range_report
-from .day_off import generate_day_off_details_report, generate_day_off_summary_report
-from .done_tasks_report.summary import generate_done_tasks_summary_report
-from .done_tasks_report.summary_total import generate_done_tasks_summary_total_report
-from .due_date import generate_due_date_report
-from .free_vacation_days import generate_free_days_report
-from .presence import generate_presence_report
-from .presence_summary import generate_presence_summary_report
-from .schemas import IssuesSettingsOut, IssuesSettingsUpdate
-from .working_time_month_report import generate_working_time_month_report
-
-__all__ = ('router',)
-
+from .jobs import validate_report_job_params
+from .schemas import IssuesSettingsOut, IssuesSettingsUpdate, ReportJobOut
 
 router = APIRouter(prefix='/api/v1/report/employee', tags=['v1', 'report'])
 
@@ -61,28 +79,6 @@ REPORT_FORMATS = (
 )
 
 
-def _get_employee_filter(query_filter: str | None) -> Any:
-    if not query_filter:
-        return sa.sql.true()
-    return filter_to_query(
-        query_filter,
-        m.Employee,
-        available_fields=[
-            'id',
-            'uuid',
-            'english_name',
-            'native_name',
-            'email',
-            'account',
-            'active',
-            'team_id',
-            'organization_id',
-            'managers',
-            'work_started',
-        ],
-    )  # type: ignore
-
-
 @router.get('/select')
 async def list_report_type(query: SelectParams = Depends(SelectParams)) -> SelectOutput:
     return make_select_output(
@@ -101,7 +97,7 @@ async def get_vacation_free_dats_report(
     query: ListFilterParams = Depends(ListFilterParams),
     session: AsyncSession = Depends(get_db_session),
 ) -> BaseListOutput:
-    flt = _get_employee_filter(query.filter)
+    flt = get_employee_filter(query.filter)
     report = await generate_free_days_report(flt, session=session)
     return report.make_list_output()
 
@@ -109,25 +105,39 @@ async def get_vacation_free_dats_report(
 @router.get('/vacation-free-days-report/csv')
 async def get_vacation_free_dats_report_csv(
     query: ListFilterParams = Depends(ListFilterParams),
-    session: AsyncSession = Depends(get_db_session),
 ) -> StreamingResponse:
-    flt = _get_employee_filter(query.filter)
-    report = await generate_free_days_report(flt, session=session)
-    output = report.make_csv()
-    return StreamingResponse(iter([output.getvalue()]), media_type='text/csv')
+    flt = get_employee_filter(query.filter)
+    return make_csv_streaming_response(iter_report_csv(generate_free_days_report, flt))
 
 
 @router.get('/working-time-month-report')
 async def get_working_time_month_report(
+    start: date | None = None,
+    end: date | None = None,
+    by_team: bool = False,
     query: ListFilterParams = Depends(ListFilterParams),
     session: AsyncSession = Depends(get_db_session),
 ) -> StreamingResponse:
-    flt = _get_employee_filter(query.filter)
-    res = await generate_working_time_month_report(flt, date.today(), session=session)
+    start = start or date.today()
+    end = end or start
+    months = (end.year - start.year) * 12 + end.month - start.month + 1
+    if months < 1:
+        raise HTTPException(HTTPStatus.BAD_REQUEST, detail='start must be before end')
+    if months > WORKING_TIME_REPORT_MAX_MONTHS:
+        raise HTTPException(
+            HTTPStatus.BAD_REQUEST,
+            detail=f'max {WORKING_TIME_REPORT_MAX_MONTHS} months per report',
+        )
+    flt = get_employee_filter(query.filter)
+    res = await generate_working_time_month_report(
+        flt, start, end, session=session, by_team=by_team
+    )
     headers = {
         'Content-Disposition': 'attachment; filename="working_time_month_report.xlsx"'
     }
-    return StreamingResponse(iter([res]), headers=headers)
+    return StreamingResponse(
+        iter_file(res), media_type=XLSX_MEDIA_TYPE, headers=headers
+    )
 
 
 @router.get('/activity-summary-report')
@@ -137,7 +147,7 @@ async def get_activity_summary_report(
     query: ListFilterParams = Depends(ListFilterParams),
     session: AsyncSession = Depends(get_db_session),
 ) -> BaseListOutput:
-    flt = _get_employee_filter(query.filter)
+    flt = get_employee_filter(query.filter)
     report = await generate_activity_summary_report(flt, start, end, session=session)
     return report.make_list_output()
 
@@ -147,12 +157,13 @@ async def get_activity_summary_report_csv(
     start: date,
     end: date,
     query: ListFilterParams = Depends(ListFilterParams),
-    session: AsyncSession = Depends(get_db_session),
 ) -> StreamingResponse:
-    flt = _get_employee_filter(query.filter)
-    report = await generate_activity_summary_report(flt, start, end, session=session)
-    output = report.make_csv()
-    return StreamingResponse(iter([output.getvalue()]), media_type='text/csv')
+    flt = get_employee_filter(query.filter)
+    return make_csv_streaming_response(
+        iter_report_csv(
+            partial(generate_activity_summary_report, start=start, end=end), flt
+        )
+    )
 
 
 @router.get('/activity-details-report')
@@ -180,18 +191,23 @@ async def get_activity_details_report_csv(
     end: date,
     query: ListFilterParams = Depends(ListFilterParams),
     activity_filter: str | None = Query(None, description='activity filter'),
-    session: AsyncSession = Depends(get_db_session),
 ) -> StreamingResponse:
     activity_flt = None
     if activity_filter:
         activity_flt = filter_to_query(
             activity_filter, m.Activity, available_fields=['source_id', 'action']
         )
-    report = await generate_activity_details_report(
-        query.filter, start, end, activity_filter=activity_flt, session=session
+    return make_csv_streaming_response(
+        iter_report_csv(
+            partial(
+                generate_activity_details_report,
+                start=start,
+                end=end,
+                activity_filter=activity_flt,
+            ),
+            query.filter,
+        )
     )
-    output = report.make_csv()
-    return StreamingResponse(iter([output.getvalue()]), media_type='text/csv')
 
 
 @router.get('/presence')
@@ -201,7 +217,7 @@ async def get_presence_report(
     query: ListFilterParams = Depends(ListFilterParams),
     session: AsyncSession = Depends(get_db_session),
 ) -> BaseListOutput:
-    flt = _get_employee_filter(query.filter)
+    flt = get_employee_filter(query.filter)
     report = await generate_presence_report(flt, start, end, session=session)
     aa = report.make_list_output()
     return aa
@@ -212,12 +228,11 @@ async def get_presence_report_csv(
     start: date,
     end: date,
     query: ListFilterParams = Depends(ListFilterParams),
-    session: AsyncSession = Depends(get_db_session),
 ) -> StreamingResponse:
-    flt = _get_employee_filter(query.filter)
-    report = await generate_presence_report(flt, start, end, session=session)
-    output = report.make_csv()
-    return StreamingResponse(iter([output.getvalue()]), media_type='text/csv')
+    flt = get_employee_filter(query.filter)
+    return make_csv_streaming_response(
+        iter_report_csv(partial(generate_presence_report, start=start, end=end), flt)
+    )
 
 
 @router.get('/presence-summary-report')
@@ -227,7 +242,7 @@ async def get_presence_summary_report(
     query: ListFilterParams = Depends(ListFilterParams),
     session: AsyncSession = Depends(get_db_session),
 ) -> BaseListOutput:
-    flt = _get_employee_filter(query.filter)
+    flt = get_employee_filter(query.filter)
     report = await generate_presence_summary_report(flt, start, end, session=session)
     return report.make_list_output()
 
@@ -237,12 +252,13 @@ async def get_presence_summary_report_csv(
     start: date,
     end: date,
     query: ListFilterParams = Depends(ListFilterParams),
-    session: AsyncSession = Depends(get_db_session),
 ) -> StreamingResponse:
-    flt = _get_employee_filter(query.filter)
-    report = await generate_presence_summary_report(flt, start, end, session=session)
-    output = report.make_csv()
-    return StreamingResponse(iter([output.getvalue()]), media_type='text/csv')
+    flt = get_employee_filter(query.filter)
+    return make_csv_streaming_response(
+        iter_report_csv(
+            partial(generate_presence_summary_report, start=start, end=end), flt
+        )
+    )
 
 
 @router.get('/activity-summary-total-report')
@@ -252,7 +268,7 @@ async def get_activity_total_report(
     query: ListFilterParams = Depends(ListFilterParams),
     session: AsyncSession = Depends(get_db_session),
 ) -> BaseListOutput:
-    flt = _get_employee_filter(query.filter)
+    flt = get_employee_filter(query.filter)
     report = await generate_activity_total_by_range_report(
         flt, start, end, session=session
     )
@@ -264,14 +280,13 @@ async def get_activity_total_report_csv(
     start: date,
     end: date,
     query: ListFilterParams = Depends(ListFilterParams),
-    session: AsyncSession = Depends(get_db_session),
 ) -> StreamingResponse:
-    flt = _get_employee_filter(query.filter)
-    report = await generate_activity_total_by_range_report(
-        flt, start, end, session=session
+    flt = get_employee_filter(query.filter)
+    return make_csv_streaming_response(
+        iter_report_csv(
+            partial(generate_activity_total_by_range_report, start=start, end=end), flt
+        )
     )
-    output = report.make_csv()
-    return StreamingResponse(iter([output.getvalue()]), media_type='text/csv')
 
 
 @router.get('/day-off-summary-report')
@@ -281,7 +296,7 @@ async def get_day_off_summary_report(
     query: ListFilterParams = Depends(ListFilterParams),
     session: AsyncSession = Depends(get_db_session),
 ) -> BaseListOutput:
-    flt = _get_employee_filter(query.filter)
+    flt = get_employee_filter(query.filter)
     report = await generate_day_off_summary_report(flt, start, end, session=session)
     return report.make_list_output()
 
@@ -291,12 +306,13 @@ async def get_day_off_summary_report_csv(
     start: date,
     end: date,
     query: ListFilterParams = Depends(ListFilterParams),
-    session: AsyncSession = Depends(get_db_session),
 ) -> StreamingResponse:
-    flt = _get_employee_filter(query.filter)
-    report = await generate_day_off_summary_report(flt, start, end, session=session)
-    output = report.make_csv()
-    return StreamingResponse(iter([output.getvalue()]), media_type='text/csv')
+    flt = get_employee_filter(query.filter)
+    return make_csv_streaming_response(
+        iter_report_csv(
+            partial(generate_day_off_summary_report, start=start, end=end), flt
+        )
+    )
 
 
 @router.get('/day-off-details-report')
@@ -306,7 +322,7 @@ async def get_day_off_details_report(
     query: ListFilterParams = Depends(ListFilterParams),
     session: AsyncSession = Depends(get_db_session),
 ) -> BaseListOutput:
-    flt = _get_employee_filter(query.filter)
+    flt = get_employee_filter(query.filter)
     report = await generate_day_off_details_report(flt, start, end, session=session)
     return report.make_list_output()
 
@@ -316,12 +332,13 @@ async def get_day_off_details_report_csv(
     start: date,
     end: date,
     query: ListFilterParams = Depends(ListFilterParams),
-    session: AsyncSession = Depends(get_db_session),
 ) -> StreamingResponse:
-    flt = _get_employee_filter(query.filter)
-    report = await generate_day_off_details_report(flt, start, end, session=session)
-    output = report.make_csv()
-    return StreamingResponse(iter([output.getvalue()]), media_type='text/csv')
+    flt = get_employee_filter(query.filter)
+    return make_csv_streaming_response(
+        iter_report_csv(
+            partial(generate_day_off_details_report, start=start, end=end), flt
+        )
+    )
 
 
 @router.get('/due-date-report')
@@ -331,7 +348,7 @@ async def get_due_date_report(
     query: ListFilterParams = Depends(ListFilterParams),
     session: AsyncSession = Depends(get_db_session),
 ) -> BaseListOutput:
-    flt = _get_employee_filter(query.filter)
+    flt = get_employee_filter(query.filter)
     report = await generate_due_date_report(flt, start, end, session=session)
     return report.make_list_output()
 
@@ -341,12 +358,11 @@ async def get_due_date_report_csv(
     start: date,
     end: date,
     query: ListFilterParams = Depends(ListFilterParams),
-    session: AsyncSession = Depends(get_db_session),
 ) -> StreamingResponse:
-    flt = _get_employee_filter(query.filter)
-    report = await generate_due_date_report(flt, start, end, session=session)
-    output = report.make_csv()
-    return StreamingResponse(iter([output.getvalue()]), media_type='text/csv')
+    flt = get_employee_filter(query.filter)
+    return make_csv_streaming_response(
+        iter_report_csv(partial(generate_due_date_report, start=start, end=end), flt)
+    )
 
 
 @router.get('/done-tasks-summary-report')
@@ -356,7 +372,7 @@ async def get_done_tasks_summary_report(
     query: ListFilterParams = Depends(ListFilterParams),
     session: AsyncSession = Depends(get_db_session),
 ) -> BaseListOutput:
-    flt = _get_employee_filter(query.filter)
+    flt = get_employee_filter(query.filter)
     report = await generate_done_tasks_summary_report(flt, start, end, session=session)
     return report.make_list_output()
 
@@ -366,12 +382,13 @@ async def get_done_tasks_summary_report_csv(
     start: date,
     end: date,
     query: ListFilterParams = Depends(ListFilterParams),
-    session: AsyncSession = Depends(get_db_session),
 ) -> StreamingResponse:
-    flt = _get_employee_filter(query.filter)
-    report = await generate_done_tasks_summary_report(flt, start, end, session=session)
-    output = report.make_csv()
-    return StreamingResponse(iter([output.getvalue()]), media_type='text/csv')
+    flt = get_employee_filter(query.filter)
+    return make_csv_streaming_response(
+        iter_report_csv(
+            partial(generate_done_tasks_summary_report, start=start, end=end), flt
+        )
+    )
 
 
 @router.get('/done-tasks-summary-total-report')
@@ -381,7 +398,7 @@ async def get_done_tasks_summary_total_report(
     query: ListFilterParams = Depends(ListFilterParams),
     session: AsyncSession = Depends(get_db_session),
 ) -> BaseListOutput:
-    flt = _get_employee_filter(query.filter)
+    flt = get_employee_filter(query.filter)
     report = await generate_done_tasks_summary_total_report(
         flt, start, end, session=session
     )
@@ -393,14 +410,56 @@ async def get_done_tasks_summary_total_report_csv(
     start: date,
     end: date,
     query: ListFilterParams = Depends(ListFilterParams),
-    session: AsyncSession = Depends(get_db_session),
 ) -> StreamingResponse:
-    flt = _get_employee_filter(query.filter)
-    report = await generate_done_tasks_summary_total_report(
-        flt, start, end, session=session
+    flt = get_employee_filter(query.filter)
+    return make_csv_streaming_response(
+        iter_report_csv(
+            partial(generate_done_tasks_summary_total_report, start=start, end=end), flt
+        )
     )
-    output = report.make_csv()
-    return StreamingResponse(iter([output.getvalue()]), media_type='text/csv')
+
+
+async def _get_viewer_report_job(job_id: str, redis: AsyncRedis) -> ReportJob:
+    job = await get_report_job(job_id, redis)
+    if not job or job.scope != get_report_job_scope(current_employee()):
+        raise HTTPException(HTTPStatus.NOT_FOUND, detail='Report job not found')
+    return job
+
+
+@router.post('/jobs')
+async def start_report_job(
+    body: ReportJobParams,
+    redis: AsyncRedis = Depends(get_redis_session),
+) -> BasePayloadOutput[ReportJobOut]:
+    curr_user = current_employee()
+    params = validate_report_job_params(body)
+    job, created = await create_report_job(params, curr_user, redis=redis)
+    if created:
+        task_run_report_job.delay(job.id, curr_user.id)
+    return make_success_output(payload=ReportJobOut.from_obj(job))
+
+
+@router.get('/jobs/{job_id}')
+async def get_report_job_status(
+    job_id: str,
+    redis: AsyncRedis = Depends(get_redis_session),
+) -> BasePayloadOutput[ReportJobOut]:
+    job = await _get_viewer_report_job(job_id, redis)
+    return make_success_output(payload=ReportJobOut.from_obj(job))
+
+
+@router.get('/jobs/{job_id}/download')
+async def download_report_job(
+    job_id: str,
+    redis: AsyncRedis = Depends(get_redis_session),
+) -> Response:
+    job = await _get_viewer_report_job(job_id, redis)
+    if job.status != ReportJobStatus.DONE:
+        raise HTTPException(HTTPStatus.CONFLICT, detail=f'Report job is {job.status}')
+    if (artifact := await get_report_job_artifact(job_id, redis)) is None:
+        raise HTTPException(HTTPStatus.NOT_FOUND, detail='Report job result expired')
+    headers = {'Content-Disposition': f'attachment; filename="{job.filename}"'}
+    return Response(artifact, media_type=job.media_type, headers=headers)
 
 
 @router.get('/issues-settings')
@@ -0,0 +1,52 @@
+from datetime import date
+from http import HTTPStatus
+from typing import Any
+
+from fastapi import HTTPException
+
+from wb.services.reports.employee import WORKING_TIME_REPORT_MAX_MONTHS
+from wb.services.reports.jobs import REPORT_JOB_TYPES, ReportJobParams
+
+__all__ = ('validate_report_job_params',)
+
+
+def validate_report_job_params(params: ReportJobParams) -> ReportJobParams:
+    """
+    Check the parameters against the report type and drop the ones it does not use,
+    so requests of the same report share a job.
+    """
+    if not (job_type := REPORT_JOB_TYPES.get(params.report_type)):
+        raise HTTPException(
+            HTTPStatus.BAD_REQUEST, detail=f'unknown report {params.report_type}'
+        )
+    if params.format not in job_type.formats:
+        raise HTTPException(
+            HTTPStatus.BAD_REQUEST,
+            detail=f'{params.report_type} is not available as {params.format}',
+        )
+    update: dict[str, Any] = {}
+    if params.report_type != 'activity-details-report':
+        update['activity_filter'] = None
+    if params.report_type != 'working-time-month-report':
+        update['by_team'] = False
+    if not job_type.date_range:
+        update['start'] = update['end'] = None
+    elif params.report_type == 'working-time-month-report':
+        start = (params.start or date.today()).replace(day=1)
+        end = (params.end or start).replace(day=1)
+        months = (end.year - start.year) * 12 + end.month - start.month + 1
+        if months < 1 or months > WORKING_TIME_REPORT_MAX_MONTHS:
+            raise HTTPException(
+                HTTPStatus.BAD_REQUEST,
+                detail=f'1 to {WORKING_TIME_REPORT_MAX_MONTHS} months per report',
+            )
+        update['start'], update['end'] = start, end
+    elif not params.start or not params.end or params.start > params.end:
+        raise HTTPException(
+            HTTPStatus.BAD_REQUEST, detail='start and end are required, start <= end'
+        )
+    params = params.model_copy(update=update)
+    # fail on a malformed filter now, not in the worker
+    job_type.employee_filter(params.filter)
+    job_type.kwargs(params)
+    return params
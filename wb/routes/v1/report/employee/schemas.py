@@ -4,14 +4,17 @@ from datetime import datetime
 from pydantic import BaseModel
 
 from wb.schemas import BaseOutModel
+from wb.services.reports.jobs import ReportJobParams
 
 if t.TYPE_CHECKING:
     import wb.models as m
+    from wb.services.reports.jobs import ReportJob
 
 
 __all__ = (
     'IssuesSettingsOut',
     'IssuesSettingsUpdate',
+    'ReportJobOut',
 )
 
 
@@ -23,3 +26,14 @@ class IssuesSettingsOut(BaseOutModel['m.IssueSettings']):
 
 class IssuesSettingsUpdate(BaseModel):
     projects: list[str] | None = None
+
+
+class ReportJobOut(BaseOutModel['ReportJob']):
+    id: str
+    status: str
+    params: ReportJobParams
+    progress: int
+    error: str | None
+    created: datetime
+    started: datetime | None
+    finished: datetime | None
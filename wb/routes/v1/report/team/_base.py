@@ -6,13 +6,13 @@ from dataclasses import dataclass
 from pydantic import BaseModel, PrivateAttr
 
 import wb.models as m
-from wb.routes.v1.report.base import BaseReportItem, ReportItemT
 from wb.schemas import (  # ModelOutPrototype,
     BaseListOutput,
     ReportFieldMetadata,
     ShortTeamOut,
     get_employee_csv_fields,
 )
+from wb.services.reports.base import BaseReportItem, ReportItemT
 from wb.utils.query import make_list_output
 
 __all__ = (
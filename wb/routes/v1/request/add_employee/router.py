@@ -28,7 +28,7 @@ from wb.services.employee import check_similar_usernames
 from wb.services.youtrack.utils import YoutrackException
 from wb.services.youtrack.youtrack import YoutrackProcessor
 from wb.tasks.send.bbot import task_send_bbot_message
-from wb.utils.current_user import current_employee
+from wb.utils.current_user import current_employee, load_current_employee
 from wb.utils.db import count_select_query_results
 from wb.utils.query import make_id_output, make_list_output, make_success_output
 from wb.utils.search import filter_to_query, sort_to_query
@@ -198,7 +198,7 @@ async def create_add_employee_request(  # pylint: disable=too-many-locals, too-m
     session: AsyncSession = Depends(get_db_session),
     calendar: CalDAVClient | None = Depends(get_calendar_client),
 ) -> BaseModelIdOutput:
-    curr_user = current_employee()
+    curr_user = await load_current_employee(session)
     user_roles = set(curr_user.roles)
     has_access = bool({'super_hr', 'hr', 'recruiter'}.intersection(user_roles))
     if not has_access:
@@ -333,7 +333,7 @@ async def update_add_employee_request(  # pylint: disable=too-many-locals, too-m
     session: AsyncSession = Depends(get_db_session),
     calendar: CalDAVClient | None = Depends(get_calendar_client),
 ) -> BaseModelIdOutput:
-    curr_user = current_employee()
+    curr_user = await load_current_employee(session)
     user_roles = set(curr_user.roles)
     has_access = bool({'super_hr', 'hr', 'recruiter'}.intersection(user_roles))
     if not has_access:
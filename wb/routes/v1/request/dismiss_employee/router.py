@@ -22,7 +22,7 @@ from wb.services.confluence import confluence_api, confluence_xml_converter
 from wb.services.employee import get_employee_by_id
 from wb.services.youtrack.youtrack import YoutrackProcessor
 from wb.tasks.send.bbot import task_send_bbot_message
-from wb.utils.current_user import current_employee
+from wb.utils.current_user import current_employee, load_current_employee
 from wb.utils.db import count_select_query_results
 from wb.utils.query import make_id_output, make_list_output, make_success_output
 from wb.utils.search import filter_to_query, sort_to_query
@@ -95,7 +95,7 @@ async def create_dismiss_employee_request(  # pylint: disable=too-many-locals
     body: DismissEmployeeRequestCreate,
     session: AsyncSession = Depends(get_db_session),
 ) -> BaseModelIdOutput:
-    curr_user = current_employee()
+    curr_user = await load_current_employee(session)
     user_roles = set(curr_user.roles)
     has_access = bool({'admin', 'hr', 'recruiter', 'super_hr'}.intersection(user_roles))
     if not has_access:
@@ -212,7 +212,7 @@ async def update_dismiss_employee_request(  # pylint: disable=too-many-locals
     body: DismissEmployeeRequestUpdate,
     session: AsyncSession = Depends(get_db_session),
 ) -> BaseModelIdOutput:
-    curr_user = current_employee()
+    curr_user = await load_current_employee(session)
     user_roles = set(curr_user.roles)
     has_access = bool({'super_hr', 'hr', 'recruiter'}.intersection(user_roles))
     if not has_access:
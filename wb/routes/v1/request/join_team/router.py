@@ -21,7 +21,7 @@ from wb.services.notifications import (
     NotificationDestinationTeam,
     NotificationMessage,
 )
-from wb.utils.current_user import current_employee
+from wb.utils.current_user import current_employee, load_current_employee
 from wb.utils.db import count_select_query_results, resolve_db_id
 from wb.utils.notifications import send_notification_to_people_project
 from wb.utils.query import make_id_output, make_list_output, make_success_output
@@ -100,7 +100,7 @@ async def create_join_team_request(
     body: RequestCreate[JoinTeamRequestCreatePayload],
     session: AsyncSession = Depends(get_db_session),
 ) -> BaseModelIdOutput:
-    curr_user = current_employee()
+    curr_user = await load_current_employee(session)
     team = await resolve_db_id(m.Team, body.data.team.value, session=session)
     applicant = await resolve_db_id(
         m.Employee, body.data.employee.value, session=session
@@ -174,7 +174,7 @@ async def approve_join_team_request(
     )
     if not req:
         raise HTTPException(404, detail='request not found')
-    curr_user = current_employee()
+    curr_user = await load_current_employee(session)
     if req.status in (
         'APPROVED',
         'CLOSED',
@@ -191,7 +191,7 @@ async def bulk_close_team_request_request(
     results = await session.scalars(
         sa.select(m.JoinTeamRequest).where(m.JoinTeamRequest.id.in_(body.ids))
     )
-    curr_user = current_employee()
+    curr_user = await load_current_employee(session)
     for req in results.all():
         req.updated = datetime.utcnow()
         req.status = 'CLOSED'
@@ -214,7 +214,7 @@ async def cancel_join_team_request(
         raise HTTPException(404, detail='request not found')
     if req.status == 'CLOSED':
         raise HTTPException(400, f'request already {req.status}')
-    curr_user = current_employee()
+    curr_user = await load_current_employee(session)
     req.updated = datetime.utcnow()
     req.status = 'CLOSED'
     req.closed_by = curr_user
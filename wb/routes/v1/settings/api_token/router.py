@@ -12,7 +12,7 @@ from wb.schemas import (
     BasePayloadOutput,
     ListFilterParams,
 )
-from wb.utils.current_user import current_employee
+from wb.utils.current_user import current_employee, load_current_employee
 from wb.utils.db import count_select_query_results
 from wb.utils.query import make_id_output, make_list_output, make_success_output
 from wb.utils.search import filter_to_query, sort_to_query
@@ -62,7 +62,7 @@ async def create_api_token(
     body: APITokenCreate,
     session: AsyncSession = Depends(get_db_session),
 ) -> BasePayloadOutput[APITokenCreatedOut]:
-    curr_user = current_employee()
+    curr_user = await load_current_employee(session)
     obj = m.APIToken.create(
         name=body.name,
         owner=curr_user,
@@ -9,7 +9,7 @@ import wb.models as m
 from wb.config import CONFIG, AuthModeT
 from wb.db import get_db_session
 from wb.schemas import SuccessOutput
-from wb.utils.current_user import current_employee
+from wb.utils.current_user import load_current_employee
 from wb.utils.password import validate_password_strength
 
 __all__ = ('router',)
@@ -37,7 +37,7 @@ async def set_password(
         )
     if errors := validate_password_strength(body.password):
         raise HTTPException(HTTPStatus.BAD_REQUEST, detail=errors)
-    curr_user = current_employee()
+    curr_user = await load_current_employee(session)
     if not (
         user := await session.scalar(
             sa.select(m.User).where(m.User.username == curr_user.account)
@@ -20,7 +20,7 @@ from wb.acl import list_employee_readable_fields
 from wb.db import get_db_session
 from wb.routes.v1.counteragent.schemas import CounterAgentOut
 from wb.routes.v1.employee.schemas import EmployeeHierarchyOut
-from wb.routes.v1.employee.utils import build_hierarchy
+from wb.routes.v1.employee.utils import build_hierarchy, iter_employees_csv
 from wb.schemas import (
     BaseListOutput,
     BaseModelIdOutput,
@@ -30,12 +30,11 @@ from wb.schemas import (
     SelectFieldInt,
     SelectOutput,
     SelectParams,
-    get_employee_csv_fields,
     get_employee_output_model_class,
 )
 from wb.services import (
     get_employees,
-    get_employees_days_status,
+    get_employees_days_status_range,
     get_teams_members_history,
 )
 from wb.services.counteragent import list_counteragents_by_team
@@ -48,6 +47,7 @@ from wb.utils.query import (
     make_success_output,
 )
 from wb.utils.search import filter_to_query, sort_to_query
+from wb.utils.streaming import make_csv_streaming_response
 
 from .schemas import (
     TeamCreate,
@@ -348,7 +348,7 @@ async def get_team_members(
         session=session,
     )
     today = date.today()
-    employees_days = await get_employees_days_status(
+    employees_days = await get_employees_days_status_range(
         employees, today, today, session=session
     )
     items = []
@@ -356,7 +356,7 @@ async def get_team_members(
         output_model_class = get_employee_output_model_class(emp)
         emp_out = output_model_class.from_obj(
             emp,
-            today_schedule_status=employees_days[emp.id][today],
+            today_schedule_status=employees_days.get(emp.id, today),
         )
         items.append(emp_out)
     return make_list_output(count=count, limit=count, offset=0, items=items)
@@ -416,32 +416,7 @@ async def export_team_members(
     team = await session.scalar(sa.select(m.Team).where(m.Team.id == team_id))
     if not team:
         raise HTTPException(HTTPStatus.NOT_FOUND, detail='Not Found')
-    _, employees = await get_employees(
-        employee_filter=f'team_id:{team.id}',
-        readable_fields=list_employee_readable_fields(),
-        session=session,
-    )
-    fields = {emp.id: get_employee_csv_fields(emp) for emp in employees}
-    _seen = set()
-    all_fields = list(
-        k
-        for emp_fields in fields.values()
-        for k in emp_fields
-        if not (k in _seen or _seen.add(k))  # type: ignore[func-returns-value]
-    )
-    output = io.StringIO()
-    writer = csv.writer(output)
-    writer.writerow(all_fields)
-    for emp in employees:
-        row = []
-        for field in all_fields:
-            if field not in fields[emp.id]:
-                row.append('N/A')
-            else:
-                row.append(fields[emp.id][field].csv_getter(emp))
-        writer.writerow(row)
-    export_media_type = 'text/csv'
-    return StreamingResponse(iter([output.getvalue()]), media_type=export_media_type)
+    return make_csv_streaming_response(iter_employees_csv(f'team_id:{team.id}'))
 
 
 @router.delete('/{team_id}')
@@ -12,6 +12,7 @@ from wb.schemas import (
     ShortEmployeeOut,
 )
 from wb.utils.current_user import current_user
+from wb.utils.principal import Principal
 
 __all__ = (
     'TeamOut',
@@ -62,7 +63,7 @@ class TeamOut(BaseOutModel['m.Team']):
             'is_archived': obj.is_archived,
         }
         curr = current_user()
-        current_user_team_id = curr.team_id if isinstance(curr, m.Employee) else None
+        current_user_team_id = curr.team_id if isinstance(curr, Principal) else None
         data['is_current_user_member'] = (
             bool(current_user_team_id) and current_user_team_id == obj.id
         )
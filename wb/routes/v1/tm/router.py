@@ -7,16 +7,18 @@ from sqlalchemy.ext.asyncio import AsyncSession
 
 import wb.models as m
 from wb.db import get_db_session
-from wb.schemas import BasePayloadOutput
+from wb.schemas import BaseListOutput, BasePayloadOutput
 from wb.services import get_employee_by_id
 from wb.services.tm import (
     get_employee_tm_current_status,
+    get_employee_tm_manual_status,
+    get_team_tm_current_status,
     set_employee_tm_current_status,
 )
-from wb.utils.current_user import current_employee
-from wb.utils.query import make_success_output
+from wb.utils.current_user import load_current_employee
+from wb.utils.query import make_list_output, make_success_output
 
-from .schemas import TMSetStatus, TMStatusOut
+from .schemas import TMEmployeeStatusOut, TMSetStatus, TMStatusOut
 
 __all__ = ('router',)
 
@@ -32,27 +34,8 @@ async def get_employee_status_manual(
     emp = await get_employee_by_id(employee_id, session=session)
     if not emp:
         raise HTTPException(HTTPStatus.NOT_FOUND, detail='employee not found')
-    last_log: m.TMRecord | None = await session.scalar(
-        sa.select(m.TMRecord)
-        .where(
-            m.TMRecord.employee_id == emp.id,
-            m.TMRecord.status.in_((m.TMRecordType.LEAVE, m.TMRecordType.COME)),
-            m.TMRecord.source != 'auto',
-        )
-        .order_by(m.TMRecord.time.desc())
-        .limit(1)
-    )
-    if not last_log:
-        payload = TMStatusOut(
-            status=m.TMRecordType.LEAVE,
-            updated=None,
-        )
-    else:
-        payload = TMStatusOut(
-            status=last_log.status,
-            updated=last_log.time,
-        )
-    return make_success_output(payload=payload)
+    status, updated = await get_employee_tm_manual_status(emp, session=session)
+    return make_success_output(payload=TMStatusOut(status=status, updated=updated))
 
 
 @router.get('/status/{employee_id}')
@@ -72,12 +55,28 @@ async def get_employee_status(
     )
 
 
+@router.get('/status/team/{team_id}')
+async def get_team_status(
+    team_id: int,
+    session: AsyncSession = Depends(get_db_session),
+) -> BaseListOutput[TMEmployeeStatusOut]:
+    team = await session.scalar(sa.select(m.Team.id).where(m.Team.id == team_id))
+    if not team:
+        raise HTTPException(HTTPStatus.NOT_FOUND, detail='team not found')
+    statuses = await get_team_tm_current_status(team_id, session=session)
+    results = [
+        TMEmployeeStatusOut(employee_id=emp_id, status=status, updated=updated)
+        for emp_id, (status, updated) in sorted(statuses.items())
+    ]
+    return make_list_output(count=len(results), limit=0, offset=0, items=results)
+
+
 @router.post('/status')
 async def set_status(
     body: TMSetStatus,
     session: AsyncSession = Depends(get_db_session),
 ) -> BasePayloadOutput[TMStatusOut]:
-    curr_user = current_employee()
+    curr_user = await load_current_employee(session)
     await session.execute(
         sa.update(m.EmployeeTM)
         .where(m.EmployeeTM.employee_id == curr_user.id)
@@ -7,6 +7,7 @@ from wb.models import TMRecordType
 __all__ = (
     'TMSetStatus',
     'TMStatusOut',
+    'TMEmployeeStatusOut',
 )
 
 
@@ -18,3 +19,7 @@ class TMSetStatus(BaseModel):
 class TMStatusOut(BaseModel):
     status: TMRecordType
     updated: datetime | None
+
+
+class TMEmployeeStatusOut(TMStatusOut):
+    employee_id: int
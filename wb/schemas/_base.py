@@ -1,5 +1,7 @@
+import threading
 import typing as t
 from abc import ABC
+from collections import OrderedDict
 from dataclasses import dataclass
 from types import UnionType
 
@@ -19,6 +21,8 @@ __all__ = (
 
 T = t.TypeVar('T')
 
+WITH_FIELDS_CACHE_SIZE = 256
+
 
 class BaseOutModel(BaseModel, ABC, t.Generic[T]):
     @classmethod
@@ -124,6 +128,44 @@ class ModelOutPrototype(BaseModel, t.Generic[T]):
         cls,
         fields_annotations: list[tuple[ModelFieldAnnotation[T], t.Any]],
         model_name: str = 'ModelOut',
+    ) -> t.Type[t.Self]:
+        """
+        Make a subclass of the prototype with the given fields.
+
+        Models are cached by (prototype, model name, set of fields), so a list response
+        builds a model once per distinct set of readable fields instead of once per item.
+        A cached model keeps the fields order of the call that created it.
+        """
+        # pylint: disable=protected-access
+        try:
+            key = (
+                cls,
+                model_name,
+                frozenset(
+                    (fa.name, fa._getter, fa.extra, pydantic_annotation)
+                    for fa, pydantic_annotation in fields_annotations
+                ),
+            )
+        except TypeError:
+            # an annotation is not hashable, e.g. a field with a mutable default
+            return cls._make_with_fields(fields_annotations, model_name)
+        with _with_fields_lock:
+            if (model := _with_fields_models.get(key)) is not None:
+                _with_fields_models.move_to_end(key)
+                return model  # type: ignore
+        model = cls._make_with_fields(fields_annotations, model_name)
+        with _with_fields_lock:
+            model = _with_fields_models.setdefault(key, model)
+            _with_fields_models.move_to_end(key)
+            while len(_with_fields_models) > WITH_FIELDS_CACHE_SIZE:
+                _with_fields_models.popitem(last=False)
+        return model  # type: ignore
+
+    @classmethod
+    def _make_with_fields(
+        cls,
+        fields_annotations: list[tuple[ModelFieldAnnotation[T], t.Any]],
+        model_name: str,
     ) -> t.Type[t.Self]:
         model = create_model(
             model_name,
@@ -138,3 +180,7 @@ class ModelOutPrototype(BaseModel, t.Generic[T]):
             **{fa.name: fa.getter for fa, _ in fields_annotations},
         }
         return model  # type: ignore
+
+
+_with_fields_models: OrderedDict[t.Hashable, type[ModelOutPrototype]] = OrderedDict()
+_with_fields_lock = threading.Lock()
@@ -4,9 +4,8 @@ from datetime import datetime
 from pydantic import EmailStr
 
 import wb.models as m
-from wb.acl.counteragent import COUNTERAGENT_FIELD_ACL
+from wb.acl.counteragent import get_counteragent_acl
 from wb.schemas._base import ModelFieldAnnotation, SelectFieldInt
-from wb.utils.current_user import get_current_roles_employee_related
 
 from ._base import SelectField
 from .employee.base_schemas import SelectEmployeeField
@@ -37,9 +36,7 @@ def catalog_attr_getter(
 
 
 def is_employee_field_viewable(field: str, emp: m.Employee | None = None) -> bool:
-    if not (acl := COUNTERAGENT_FIELD_ACL.get(field)):
-        return False
-    return acl.can_view(get_current_roles_employee_related, emp)
+    return get_counteragent_acl().can_view(field, emp)
 
 
 COUNTERAGENT_FIELD_ANNOTATIONS: dict[str, ModelFieldAnnotation[m.Employee]] = {
@@ -1,3 +1,3 @@
-from .annotation import get_employee_csv_fields
+from .annotation import get_employee_csv_fields, get_employee_csv_header
 from .base_schemas import *
 from .out_prototype import *
@@ -3,7 +3,7 @@ from datetime import date, datetime
 from pydantic import EmailStr
 
 import wb.models as m
-from wb.acl import is_employee_field_viewable
+from wb.acl import is_employee_field_viewable, list_employee_any_readable_fields
 from wb.schemas._base import ModelFieldAnnotation, SelectField, SelectFieldInt
 
 from .base_schemas import SelectEmployeeField
@@ -27,6 +27,7 @@ from .fields import (
 __all__ = (
     'EMPLOYEE_FIELD_ANNOTATIONS',
     'get_employee_csv_fields',
+    'get_employee_csv_header',
 )
 
 
@@ -279,3 +280,16 @@ def get_employee_csv_fields(
         for annotation in EMPLOYEE_FIELD_ANNOTATIONS.values()
         if annotation.csv_include and is_employee_field_viewable(annotation.name, emp)
     }
+
+
+def get_employee_csv_header() -> list[str]:
+    """
+    Csv fields readable for at least one employee, evaluated by the field ACLs and
+    the roles of the current user without loading the employees.
+    """
+    readable = set(list_employee_any_readable_fields())
+    return [
+        annotation.name
+        for annotation in EMPLOYEE_FIELD_ANNOTATIONS.values()
+        if annotation.csv_include and annotation.name in readable
+    ]
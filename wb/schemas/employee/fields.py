@@ -6,6 +6,7 @@ from pydantic import BaseModel, Field
 import wb.models as m
 from wb.schemas._base import SelectField, SelectFieldInt
 from wb.utils.current_user import current_user
+from wb.utils.principal import Principal
 
 from .base_schemas import SelectEmployeeField
 
@@ -143,7 +144,7 @@ def list_attr_getter(field: str) -> Callable[['m.Employee'], Optional[List]]:
 def is_current_user_in_list_field_getter(field: str) -> Callable[['m.Employee'], bool]:
     def _get(obj: 'm.Employee') -> bool:
         curr_user = current_user()
-        if not isinstance(curr_user, m.Employee):
+        if not isinstance(curr_user, Principal):
             return False
         for w in getattr(obj, field):
             if w.id == curr_user.id:
@@ -157,6 +158,6 @@ def is_current_user_team_lead(obj: 'm.Employee') -> bool:
     if not obj.team:
         return False
     curr_user = current_user()
-    if not isinstance(curr_user, m.Employee):
+    if not isinstance(curr_user, Principal):
         return False
     return bool(obj.team.manager_id == curr_user.id)
@@ -1,22 +1,30 @@
-from collections.abc import Callable, Sequence
+from collections.abc import AsyncIterator, Iterable, Mapping, Sequence
 from dataclasses import dataclass
-from datetime import date, timedelta
+from datetime import date, datetime, timedelta
 from enum import Enum
-from typing import Any, ClassVar, TypedDict
+from typing import Any, ClassVar, NamedTuple, TypedDict
 
 import sqlalchemy as sa
+from sqlalchemy.dialects.postgresql import ARRAY
+from sqlalchemy.dialects.postgresql import insert as pg_insert
 from sqlalchemy.ext.asyncio import AsyncSession
 
 import wb.models as m
 from shared_utils.dateutils import date_range
-from shared_utils.dict_utils import is_dict_nested_subset
 
 __all__ = (
-    'calc_activity_summary',
     'ActivitySummaryItem',
     'get_employees_days_activity_status',
     'get_employees_activities',
     'get_employees_activities_by_day',
+    'ActivityRecord',
+    'stream_employees_activities',
+    'iter_employees_activities_by_day',
+    'get_activity_sources',
+    'get_employees_activity_summary',
+    'get_employees_activity_summary_by_day',
+    'refresh_activity_daily_summary',
+    'rebuild_activity_daily_summary',
 )
 
 
@@ -25,27 +33,6 @@ class ActivitySummaryFieldType(str, Enum):
     COUNT_DISTINCT = 'count_distinct'
     DURATION = 'duration'
 
-    @staticmethod
-    def __calc_count(acts: Sequence[m.Activity]) -> int:
-        return len(acts)
-
-    @staticmethod
-    def __calc_duration(acts: Sequence[m.Activity]) -> timedelta:
-        return timedelta(seconds=sum(map(lambda a: a.duration, acts)))
-
-    @staticmethod
-    def __calc_count_distinct(acts: Sequence[m.Activity]) -> int:
-        return len({act.target_id for act in acts})
-
-    def get_calc_function(self) -> Callable[[Sequence[m.Activity]], Any]:
-        if self.value == self.__class__.COUNT:
-            return self.__calc_count
-        if self.value == self.__class__.DURATION:
-            return self.__calc_duration
-        if self.value == self.__class__.COUNT_DISTINCT:
-            return self.__calc_count_distinct
-        raise ValueError('wrong field type')
-
 
 class ActivitySummaryField(TypedDict):
     name: str
@@ -150,25 +137,240 @@ class ActivitySummaryItem:
     }
 
 
-def calc_activity_summary(activities: list[m.Activity]) -> ActivitySummaryItem:
+def _summary_field_filter(annotation: ActivitySummaryField) -> sa.ColumnElement[bool]:
+    conditions = [m.ActivitySource.type == annotation['source_type']]
+    if annotation['actions']:
+        conditions.append(m.Activity.action.in_(annotation['actions']))
+    if annotation['meta']:
+        conditions.append(m.Activity.meta.contains(annotation['meta']))
+    return sa.and_(*conditions)
+
+
+def _summary_field_aggregate(annotation: ActivitySummaryField) -> sa.ColumnElement:
+    # pylint: disable=not-callable
+    flt = _summary_field_filter(annotation)
+    if annotation['type'] == ActivitySummaryFieldType.COUNT:
+        return sa.func.count().filter(flt)
+    if annotation['type'] == ActivitySummaryFieldType.COUNT_DISTINCT:
+        return sa.func.count(sa.distinct(m.Activity.target_id)).filter(flt)
+    if annotation['type'] == ActivitySummaryFieldType.DURATION:
+        return sa.func.coalesce(sa.func.sum(m.Activity.duration).filter(flt), 0)
+    raise ValueError('wrong field type')
+
+
+def _summary_from_values(values: Mapping[str, int | None]) -> ActivitySummaryItem:
     results: dict[str, Any] = {}
     for field, annotation in ActivitySummaryItem.__fields_annotation__.items():
-        val = annotation['type'].get_calc_function()(
-            [
-                act
-                for act in activities
-                if act.source.type == annotation['source_type']
-                and (not annotation['actions'] or act.action in annotation['actions'])
-                and (
-                    not annotation['meta']
-                    or is_dict_nested_subset(annotation['meta'], act.meta)
-                )
-            ]
-        )
+        val = values.get(field) or 0
+        if annotation['type'] == ActivitySummaryFieldType.DURATION:
+            val = timedelta(seconds=val)
         results[field] = val
     return ActivitySummaryItem(**results)
 
 
+def _summary_from_row(row: m.ActivityDailySummary) -> ActivitySummaryItem:
+    return _summary_from_values(
+        {
+            field: getattr(row, field)
+            for field in ActivitySummaryItem.__fields_annotation__
+        }
+    )
+
+
+async def refresh_activity_daily_summary(
+    employees_ids: Iterable[int], start: date, end: date, session: AsyncSession
+) -> None:
+    """
+    Recalculate the daily activity rollup of the employees for the days from ``start`` to ``end``.
+
+    The rollup rows are upserted from the activities visible to the session, an exclusive
+    advisory lock per employee is held till the end of the transaction, so concurrent
+    refreshes of the same employee see the activities committed by each other.
+    The caller is responsible for committing the session.
+
+    :param employees_ids: Ids of the employees to refresh.
+    :type employees_ids: Iterable[int]
+    :param start: The first day to refresh.
+    :type start: date
+    :param end: The last day to refresh.
+    :type end: date
+    :param session: The AsyncSession object for database operations.
+    :type session: AsyncSession
+    """
+    ids = sorted(set(employees_ids))
+    if not ids:
+        return
+    await session.execute(
+        sa.text(
+            'SELECT pg_advisory_xact_lock(:ns, id) '
+            'FROM unnest(CAST(:ids AS integer[])) AS id ORDER BY id'
+        ).bindparams(
+            sa.bindparam('ns', m.ACTIVITY_SUMMARY_LOCK_NAMESPACE),
+            sa.bindparam('ids', ids, type_=ARRAY(sa.Integer)),
+        )
+    )
+    day = sa.cast(m.Activity.time, sa.Date)
+    fields = list(ActivitySummaryItem.__fields_annotation__)
+    q = (
+        sa.select(
+            m.Activity.employee_id,
+            day,
+            sa.func.count(),  # pylint: disable=not-callable
+            *(
+                _summary_field_aggregate(annotation)
+                for annotation in ActivitySummaryItem.__fields_annotation__.values()
+            ),
+        )
+        .join(m.ActivitySource, m.ActivitySource.id == m.Activity.source_id)
+        .where(
+            m.Activity.employee_id.in_(ids),
+            m.Activity.time >= start,
+            m.Activity.time < end + timedelta(days=1),
+        )
+        .group_by(m.Activity.employee_id, day)
+    )
+    stmt = pg_insert(m.ActivityDailySummary).from_select(
+        ['employee_id', 'day', 'activities', *fields], q
+    )
+    stmt = stmt.on_conflict_do_update(
+        index_elements=['employee_id', 'day'],
+        set_={col: stmt.excluded[col] for col in ('activities', *fields)},
+    )
+    await session.execute(stmt)
+
+
+async def rebuild_activity_daily_summary(
+    start: date, end: date, session: AsyncSession
+) -> None:
+    """
+    Rebuild the daily activity rollup of all the employees for the days from ``start`` to ``end``.
+
+    Partitions of the range have to exist. The caller is responsible for committing the session.
+    """
+    await session.execute(
+        sa.delete(m.ActivityDailySummary).where(
+            m.ActivityDailySummary.day >= start,
+            m.ActivityDailySummary.day <= end,
+        )
+    )
+    employees_ids = await session.scalars(sa.select(m.Employee.id))
+    await refresh_activity_daily_summary(employees_ids.all(), start, end, session)
+
+
+async def get_employees_activity_summary_by_day(
+    employees: Sequence[m.Employee], start: date, end: date, session: AsyncSession
+) -> dict[int, dict[date, ActivitySummaryItem]]:
+    """
+    Retrieve activity summaries of employees for every day of the range from the daily rollup.
+
+    :param employees: A sequence of Employee objects.
+    :type employees: Sequence[m.Employee]
+    :param start: The start date of the date range.
+    :type start: date
+    :param end: The end date of the date range.
+    :type end: date
+    :param session: The AsyncSession object for database operations.
+    :type session: AsyncSession
+    :return: A dictionary mapping employee IDs to the dictionary of the employee summaries by day.
+    :rtype: dict[int, dict[date, ActivitySummaryItem]]
+    """
+    results: dict[int, dict[date, ActivitySummaryItem]] = {
+        emp.id: {day: _summary_from_values({}) for day in date_range(start, end)}
+        for emp in employees
+    }
+    rows = await session.scalars(
+        sa.select(m.ActivityDailySummary).where(
+            m.ActivityDailySummary.employee_id.in_([emp.id for emp in employees]),
+            m.ActivityDailySummary.day >= start,
+            m.ActivityDailySummary.day <= end,
+        )
+    )
+    for row in rows.all():
+        results[row.employee_id][row.day] = _summary_from_row(row)
+    return results
+
+
+async def get_employees_activity_summary(
+    employees: Sequence[m.Employee], start: date, end: date, session: AsyncSession
+) -> dict[int, ActivitySummaryItem]:
+    """
+    Retrieve activity summaries of employees for the whole range.
+
+    Counters and durations are summed up from the daily rollup. Distinct counters can not
+    be summed up across days, they are counted over the matching activities of the range.
+
+    :param employees: A sequence of Employee objects.
+    :type employees: Sequence[m.Employee]
+    :param start: The start date of the date range.
+    :type start: date
+    :param end: The end date of the date range.
+    :type end: date
+    :param session: The AsyncSession object for database operations.
+    :type session: AsyncSession
+    :return: A dictionary mapping employee IDs to the employee summary.
+    :rtype: dict[int, ActivitySummaryItem]
+    """
+    employees_ids = [emp.id for emp in employees]
+    values: dict[int, dict[str, int | None]] = {emp_id: {} for emp_id in employees_ids}
+    additive = [
+        field
+        for field, annotation in ActivitySummaryItem.__fields_annotation__.items()
+        if annotation['type'] != ActivitySummaryFieldType.COUNT_DISTINCT
+    ]
+    distinct = {
+        field: annotation
+        for field, annotation in ActivitySummaryItem.__fields_annotation__.items()
+        if annotation['type'] == ActivitySummaryFieldType.COUNT_DISTINCT
+    }
+    rows = await session.execute(
+        sa.select(
+            m.ActivityDailySummary.employee_id,
+            *(
+                sa.func.sum(getattr(m.ActivityDailySummary, field)).label(field)
+                for field in additive
+            ),
+        )
+        .where(
+            m.ActivityDailySummary.employee_id.in_(employees_ids),
+            m.ActivityDailySummary.day >= start,
+            m.ActivityDailySummary.day <= end,
+        )
+        .group_by(m.ActivityDailySummary.employee_id)
+    )
+    for row in rows.all():
+        values[row.employee_id].update(
+            {field: getattr(row, field) for field in additive}
+        )
+    if distinct:
+        rows = await session.execute(
+            sa.select(
+                m.Activity.employee_id,
+                *(
+                    _summary_field_aggregate(annotation).label(field)
+                    for field, annotation in distinct.items()
+                ),
+            )
+            .join(m.ActivitySource, m.ActivitySource.id == m.Activity.source_id)
+            .where(
+                m.Activity.employee_id.in_(employees_ids),
+                m.Activity.time >= start,
+                m.Activity.time < end + timedelta(days=1),
+                m.ActivitySource.type.in_(
+                    {annotation['source_type'] for annotation in distinct.values()}
+                ),
+            )
+            .group_by(m.Activity.employee_id)
+        )
+        for row in rows.all():
+            values[row.employee_id].update(
+                {field: getattr(row, field) for field in distinct}
+            )
+    return {
+        emp_id: _summary_from_values(emp_values)
+        for emp_id, emp_values in values.items()
+    }
+
+
 async def get_employees_days_activity_status(
     employees: Sequence[m.Employee], start: date, end: date, session: AsyncSession
 ) -> dict[int, dict[date, bool]]:
@@ -177,18 +379,13 @@ async def get_employees_days_activity_status(
     }
     results_raw = await session.execute(
         sa.select(
-            m.Activity.employee_id,
-            sa.func.date(m.Activity.time),
-            sa.func.count(),  # pylint: disable=not-callable
-        )
-        .group_by(
-            m.Activity.employee_id,
-            sa.func.date(m.Activity.time),
-        )
-        .where(
-            m.Activity.time >= start,
-            m.Activity.time < end + timedelta(days=1),
-            m.Activity.employee_id.in_([emp.id for emp in employees]),
+            m.ActivityDailySummary.employee_id,
+            m.ActivityDailySummary.day,
+            m.ActivityDailySummary.activities,
+        ).where(
+            m.ActivityDailySummary.day >= start,
+            m.ActivityDailySummary.day <= end,
+            m.ActivityDailySummary.employee_id.in_([emp.id for emp in employees]),
         )
     )
     for emp_id, day, cnt in results_raw.all():
@@ -269,3 +466,117 @@ async def get_employees_activities_by_day(
         for act in emp_acts:
             results[emp_id][act.time.date()].append(act)
     return results
+
+
+ACTIVITIES_STREAM_CHUNK_SIZE = 5000
+
+
+class ActivityRecord(NamedTuple):
+    employee_id: int
+    source_id: int
+    action: str
+    time: datetime
+    target_id: str
+    target_name: str | None
+    target_link: str | None
+    duration: int
+
+
+ACTIVITY_RECORD_COLUMNS = tuple(
+    getattr(m.Activity, field) for field in ActivityRecord._fields
+)
+
+
+async def get_activity_sources(session: AsyncSession) -> dict[int, m.ActivitySource]:
+    sources = await session.scalars(sa.select(m.ActivitySource))
+    return {source.id: source for source in sources.all()}
+
+
+async def stream_employees_activities(
+    employees: Sequence[m.Employee],
+    start: date,
+    end: date,
+    session: AsyncSession,
+    activity_filter: Any = None,
+    chunk_size: int = ACTIVITIES_STREAM_CHUNK_SIZE,
+) -> AsyncIterator[list[ActivityRecord]]:
+    """
+    Stream activities of employees within a specified time range with a server side cursor.
+
+    Only the ``ActivityRecord`` columns are selected, no ORM objects and relationships are
+    loaded, sources can be resolved with ``get_activity_sources``. Activities are sorted
+    by employee and time.
+
+    :param employees: A sequence of Employee objects.
+    :type employees: Sequence[m.Employee]
+    :param start: The start date of the time range.
+    :type start: date
+    :param end: The end date of the time range.
+    :type end: date
+    :param session: The AsyncSession object for database operations.
+    :type session: AsyncSession
+    :param activity_filter: An optional filter to apply on activities.
+    :type activity_filter: Any, defaults to None
+    :param chunk_size: The number of rows fetched at once.
+    :type chunk_size: int
+    :return: An async iterator of activity chunks.
+    :rtype: AsyncIterator[list[ActivityRecord]]
+    """
+    q = sa.select(*ACTIVITY_RECORD_COLUMNS).filter(
+        m.Activity.employee_id.in_([emp.id for emp in employees]),
+        m.Activity.time >= start,
+        m.Activity.time < end + timedelta(days=1),
+    )
+    if activity_filter is not None:
+        q = q.filter(activity_filter)
+    result = await session.stream(
+        q.order_by(m.Activity.employee_id, m.Activity.time).execution_options(
+            yield_per=chunk_size
+        )
+    )
+    async for rows in result.partitions():
+        yield [ActivityRecord._make(row) for row in rows]
+
+
+async def iter_employees_activities_by_day(
+    employees: Sequence[m.Employee],
+    start: date,
+    end: date,
+    session: AsyncSession,
+    activity_filter: Any = None,
+) -> AsyncIterator[tuple[m.Employee, dict[date, list[ActivityRecord]]]]:
+    """
+    Iterate over employees with their activities by day within a specified date range.
+
+    Employees are yielded ordered by id as soon as all their activities are read, so only
+    the activities of one employee are kept in memory. Activities for every day is sorted by asc.
+
+    :param employees: A sequence of Employee objects.
+    :type employees: Sequence[m.Employee]
+    :param start: The start date of the date range.
+    :type start: date
+    :param end: The end date of the date range.
+    :type end: date
+    :param session: The AsyncSession object for database operations.
+    :type session: AsyncSession
+    :param activity_filter: Optional filter for specific activities. Defaults to None.
+    :type activity_filter: Any, optional
+    :return: An async iterator of employees and the dictionaries of their activities by day.
+    :rtype: AsyncIterator[tuple[m.Employee, dict[date, list[ActivityRecord]]]]
+    """
+    ordered = iter(sorted(employees, key=lambda e: e.id))
+    emp = next(ordered, None)
+    days: dict[date, list[ActivityRecord]] = {day: [] for day in date_range(start, end)}
+    async for chunk in stream_employees_activities(
+        employees, start, end, session=session, activity_filter=activity_filter
+    ):
+        for act in chunk:
+            while emp is not None and emp.id != act.employee_id:
+                yield emp, days
+                emp = next(ordered, None)
+                days = {day: [] for day in date_range(start, end)}
+            days[act.time.date()].append(act)
+    while emp is not None:
+        yield emp, days
+        emp = next(ordered, None)
+        days = {day: [] for day in date_range(start, end)}
@@ -2,7 +2,6 @@ import typing as t
 
 import sqlalchemy as sa
 from sqlalchemy.ext.asyncio import AsyncSession
-from sqlalchemy.orm import selectinload
 
 import wb.models as m
 from wb.utils.db import count_select_query_results
@@ -11,6 +10,7 @@ from wb.utils.search import filter_to_query, sort_to_query
 __all__ = (
     'get_employee_by_id',
     'get_employees',
+    'get_employees_ids',
     'check_similar_usernames',
 )
 
@@ -46,27 +46,18 @@ async def get_employee_by_id(
     emp: m.Employee | None = await session.scalar(
         sa.select(m.Employee)
         .where(m.Employee.id == employee_id)
-        .options(
-            selectinload(m.Employee.managers),
-            selectinload(m.Employee.mentors),
-            selectinload(m.Employee.team).selectinload(m.Team.manager),
-            selectinload(m.Employee.watchers),
-            selectinload(m.Employee.tm),
-        )
+        .options(*m.employee_load_options(m.EmployeeLoadProfile.DETAIL))
     )
     return emp
 
 
-async def get_employees(
-    session: AsyncSession,
+def _employees_query(
+    q: sa.Select,
     employee_filter: str | t.Any | None = None,
-    limit: int | None = None,
-    offset: int = 0,
     sort_by: str | None = None,
     sort_direction: t.Literal['asc', 'desc'] = 'asc',
     readable_fields: t.Iterable[str] | None = None,
-) -> t.Tuple[int, t.Sequence['m.Employee']]:
-    q = sa.select(m.Employee)
+) -> tuple[sa.Select, t.Sequence[t.Any]]:
     if readable_fields is None:
         readable_fields = set()
     if employee_filter is not None:
@@ -99,20 +90,56 @@ async def get_employees(
                 'created',
             ],
         )
+    return q, sorts
+
+
+async def get_employees(
+    session: AsyncSession,
+    employee_filter: str | t.Any | None = None,
+    limit: int | None = None,
+    offset: int = 0,
+    sort_by: str | None = None,
+    sort_direction: t.Literal['asc', 'desc'] = 'asc',
+    readable_fields: t.Iterable[str] | None = None,
+    load_profile: m.EmployeeLoadProfile = m.EmployeeLoadProfile.LIST,
+) -> t.Tuple[int, t.Sequence['m.Employee']]:
+    q, sorts = _employees_query(
+        sa.select(m.Employee),
+        employee_filter=employee_filter,
+        sort_by=sort_by,
+        sort_direction=sort_direction,
+        readable_fields=readable_fields,
+    )
     count = await count_select_query_results(q, session=session)
     q = q.order_by(*sorts)
     if limit is not None:
         q = q.limit(limit).offset(offset)
-    q = q.options(
-        selectinload(m.Employee.managers),
-        selectinload(m.Employee.mentors),
-        selectinload(m.Employee.watchers),
-        selectinload(m.Employee.team),
-    )
+    q = q.options(*m.employee_load_options(load_profile))
     results = await session.scalars(q)
     return count, results.all()
 
 
+async def get_employees_ids(
+    session: AsyncSession,
+    employee_filter: str | t.Any | None = None,
+    sort_by: str | None = None,
+    sort_direction: t.Literal['asc', 'desc'] = 'asc',
+    readable_fields: t.Iterable[str] | None = None,
+) -> t.Sequence[int]:
+    """
+    Ids of the employees in the order of ``get_employees``, no employees are loaded.
+    """
+    q, sorts = _employees_query(
+        sa.select(m.Employee.id),
+        employee_filter=employee_filter,
+        sort_by=sort_by,
+        sort_direction=sort_direction,
+        readable_fields=readable_fields,
+    )
+    results = await session.scalars(q.order_by(*sorts, m.Employee.id))
+    return results.all()
+
+
 async def check_similar_usernames(
     username: str,
     session: AsyncSession,
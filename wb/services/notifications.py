@@ -8,6 +8,7 @@ from sqlalchemy.ext.asyncio import AsyncSession
 import wb.models as m
 from wb.db import async_session
 from wb.tasks import task_send_bbot_message
+from wb.utils.push import PushEvent, PushEventType, publish_events
 
 __all__ = (
     'NotificationMessage',
@@ -129,3 +130,17 @@ async def create_inner_notifications(
         notifications.append(notification)
     session.add_all(notifications)
     await session.commit()
+    await publish_events(
+        [
+            PushEvent(
+                PushEventType.NOTIFICATION,
+                {
+                    'id': notification.id,
+                    'type': notification_type,
+                    'show_on_main_page': show_on_main_page,
+                },
+                recipient_id=notification.recipient_id,
+            )
+            for notification in notifications
+        ]
+    )
@@ -0,0 +1,12 @@
+from .activity_details import *
+from .activity_summary import *
+from .activity_total_by_range import *
+from .base import *
+from .day_off import *
+from .done_tasks_report.summary import *
+from .done_tasks_report.summary_total import *
+from .due_date import *
+from .free_vacation_days import *
+from .presence import *
+from .presence_summary import *
+from .working_time_month_report import *
@@ -5,12 +5,16 @@ from pydantic import Field
 from sqlalchemy.ext.asyncio import AsyncSession
 
 import wb.models as m
-from wb.services.activity import get_employees_activities_by_day
+from wb.services.activity import (
+    ActivityRecord,
+    get_activity_sources,
+    iter_employees_activities_by_day,
+)
 from wb.services.employee import get_employees
 from wb.services.schedule import get_employees_days_status
 from wb.utils.current_user import get_current_roles_employee_related
 
-from ._base import (
+from .base import (
     BaseReportItem,
     DaysListReport,
     DaysListReportDayItem,
@@ -20,7 +24,9 @@ from ._base import (
 __all__ = ('generate_activity_details_report',)
 
 
-def _create_target_link(activity: m.Activity, employee: m.Employee) -> str:
+def _create_target_link(
+    activity: ActivityRecord, source: m.ActivitySource, employee: m.Employee
+) -> str:
     curr_roles = get_current_roles_employee_related(employee)
     label = (
         f'{activity.target_name} ({activity.target_id})'
@@ -28,7 +34,7 @@ def _create_target_link(activity: m.Activity, employee: m.Employee) -> str:
         else activity.target_id
     )
     can_view_private = {'self', 'team_lead', 'manager'}.intersection(curr_roles)
-    if activity.source.private and not can_view_private:
+    if source.private and not can_view_private:
         label = activity.target_id
     if activity.target_link:
         return f'<a href="{activity.target_link}">{label}</a>'
@@ -43,13 +49,15 @@ class ReportItem(BaseReportItem):
     target: str = Field(title='target')
 
     @classmethod
-    def from_obj(cls, obj: m.Activity, employee: m.Employee) -> 'ReportItem':
+    def from_obj(
+        cls, obj: ActivityRecord, source: m.ActivitySource, employee: m.Employee
+    ) -> 'ReportItem':
         return cls(
-            source=obj.source.name,
+            source=source.name,
             time=str(obj.time.strftime('%d %b %Y %H:%M:%S')),
             duration=str(timedelta(seconds=obj.duration)),
             action=obj.action,
-            target=_create_target_link(obj, employee),
+            target=_create_target_link(obj, source, employee),
         )
 
 
@@ -64,28 +72,30 @@ async def generate_activity_details_report(
     _, employees = await get_employees(
         employee_filter=flt,
         session=session,
+        load_profile=m.EmployeeLoadProfile.REPORT,
     )
-    activities = await get_employees_activities_by_day(
-        employees, start, end, activity_filter=activity_filter, session=session
-    )
-    results: list[DaysListReportItem] = []
     days_status = await get_employees_days_status(
         employees, start, end, session=session
     )
-    for emp in employees:
-        results.append(
-            DaysListReportItem(
-                employee=emp,
-                days={
-                    day: DaysListReportDayItem(
-                        day_status=days_status[emp.id][day],
-                        items=[ReportItem.from_obj(act, emp) for act in acts],
-                    )
-                    for day, acts in activities[emp.id].items()
-                },
-            )
+    sources = await get_activity_sources(session=session)
+    results: dict[int, DaysListReportItem] = {}
+    async for emp, activities in iter_employees_activities_by_day(
+        employees, start, end, activity_filter=activity_filter, session=session
+    ):
+        results[emp.id] = DaysListReportItem(
+            employee=emp,
+            days={
+                day: DaysListReportDayItem(
+                    day_status=days_status[emp.id][day],
+                    items=[
+                        ReportItem.from_obj(act, sources[act.source_id], emp)
+                        for act in acts
+                    ],
+                )
+                for day, acts in activities.items()
+            },
         )
     return DaysListReport(
-        items=results,
+        items=[results[emp.id] for emp in employees],
         item_type=ReportItem,
     )
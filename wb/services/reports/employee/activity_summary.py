@@ -4,13 +4,17 @@ from typing import Any
 from pydantic import Field, create_model
 from sqlalchemy.ext.asyncio import AsyncSession
 
+import wb.models as m
 from shared_utils.dataclassutils import sum_dataclasses
-from wb.services import ActivitySummaryItem, calc_activity_summary
-from wb.services.activity import get_employees_activities_by_day
+from wb.services import ActivitySummaryItem
+from wb.services.activity import (
+    get_employees_activity_summary_by_day,
+    get_employees_days_activity_status,
+)
 from wb.services.employee import get_employees
 from wb.services.schedule import get_employees_days_status
 
-from ._base import (
+from .base import (
     BaseReportItem,
     DaysSimpleReport,
     DaysSimpleReportDayItem,
@@ -48,6 +52,7 @@ async def generate_activity_summary_report(
     _, employees = await get_employees(
         employee_filter=flt,
         session=session,
+        load_profile=m.EmployeeLoadProfile.REPORT,
     )
     results: list[DaysSimpleReportItem] = []
     chunk_size = 20 * 365 // ((end - start).days + 1)
@@ -56,30 +61,29 @@ async def generate_activity_summary_report(
     ]
 
     for chunk in employees_chunks:
-        activities = await get_employees_activities_by_day(
+        summaries = await get_employees_activity_summary_by_day(
+            chunk, start, end, session=session
+        )
+        activity_status = await get_employees_days_activity_status(
             chunk, start, end, session=session
         )
         days_status = await get_employees_days_status(
             chunk, start, end, session=session
         )
         for emp in chunk:
-            summaries = {
-                day: calc_activity_summary(acts)
-                for day, acts in activities[emp.id].items()
-            }
             results.append(
                 DaysSimpleReportItem(
                     employee=emp,
                     days={
                         day: DaysSimpleReportDayItem(
-                            item=_report_item_from_obj(summaries[day]),
+                            item=_report_item_from_obj(summary),
                             day_status=days_status[emp.id][day],
-                            has_activity=len(acts) > 0,
+                            has_activity=activity_status[emp.id][day],
                         )
-                        for day, acts in activities[emp.id].items()
+                        for day, summary in summaries[emp.id].items()
                     },
                     total=_report_item_from_obj(
-                        sum_dataclasses(ActivitySummaryItem, summaries.values())
+                        sum_dataclasses(ActivitySummaryItem, summaries[emp.id].values())
                     ),
                 )
             )
@@ -1,16 +1,16 @@
-from datetime import date, timedelta
-from typing import Any, Dict, List
+from datetime import date
+from typing import Any
 
-import sqlalchemy as sa
 from pydantic import Field, create_model
 from sqlalchemy.ext.asyncio import AsyncSession
 
 import wb.models as m
-from wb.services import ActivitySummaryItem, calc_activity_summary
+from wb.services import ActivitySummaryItem
+from wb.services.activity import get_employees_activity_summary
 from wb.services.employee import get_employees
 from wb.services.schedule import get_employees_days_status
 
-from ._base import BaseReportItem, SimpleReport, SimpleReportItem
+from .base import BaseReportItem, SimpleReport, SimpleReportItem
 
 __all__ = ('generate_activity_total_by_range_report',)
 
@@ -57,31 +57,24 @@ async def generate_activity_total_by_range_report(
     _, employees = await get_employees(
         employee_filter=flt,
         session=session,
+        load_profile=m.EmployeeLoadProfile.REPORT,
     )
-    employee_ids = [emp.id for emp in employees]
-    flt = sa.and_(
-        m.Activity.employee_id.in_(employee_ids),
-        m.Activity.time >= start,
-        m.Activity.time < end + timedelta(days=1),
+    summaries = await get_employees_activity_summary(
+        employees, start, end, session=session
     )
-    q = sa.select(m.Activity).filter(flt).order_by(m.Activity.time.desc())
-    activities_raw = await session.scalars(q)
-    activities: Dict[int, List[m.Activity]] = {emp.id: [] for emp in employees}
     days_status = await get_employees_days_status(
         employees,
         start,
         end,
         session=session,
     )
-    for res in activities_raw.all():
-        activities[res.employee_id].append(res)
     results: list[SimpleReportItem] = []
     for emp in employees:
         results.append(
             SimpleReportItem(
                 employee=emp,
                 item=_report_item_from_obj(
-                    calc_activity_summary(activities[emp.id]),
+                    summaries[emp.id],
                     vacations=len(
                         list(
                             filter(
@@ -1,16 +1,23 @@
-import csv
-import io
 import typing as t
 from dataclasses import dataclass
 from datetime import date
 
+import sqlalchemy as sa
 from pydantic import BaseModel
+from sqlalchemy.ext.asyncio import AsyncSession
 
 import wb.models as m
-from wb.routes.v1.report.base import BaseReportItem, ReportItemT
-from wb.schemas import BaseListOutput, get_employee_csv_fields
+from wb.db import async_session
+from wb.schemas import (
+    BaseListOutput,
+    get_employee_csv_fields,
+    get_employee_csv_header,
+)
 from wb.schemas.employee import get_employee_output_model_class
+from wb.services.employee import get_employees, get_employees_ids
+from wb.services.reports.base import BaseReportItem, ReportItemT
 from wb.utils.query import make_list_output
+from wb.utils.search import filter_to_query
 
 __all__ = (
     'BaseReportItem',
@@ -27,8 +34,12 @@ __all__ = (
     'ListSummaryReport',
     'ListSummaryReportItem',
     'FULL_EMPLOYEE_FIELDS',
+    'get_employee_filter',
+    'iter_report_csv',
 )
 
+REPORT_CSV_CHUNK_SIZE = 50
+
 
 SHORT_EMPLOYEE_LABELS = {
     'english_name': 'English name',
@@ -81,20 +92,15 @@ class SimpleReport(t.Generic[ReportItemT]):
             metadata={'fields': self.item_type.get_metadata()},
         )
 
-    def make_csv(self) -> io.StringIO:
+    def csv_header(self, emp_headers: list[str]) -> list[str]:
+        return emp_headers + [field.label for field in self.item_type.get_metadata()]
+
+    def iter_csv_rows(self, emp_rows: dict[int, list[str]]) -> t.Iterator[list[str]]:
         fields_metadata = self.item_type.get_metadata()
-        emp_headers, emp_rows = _get_employees_cvs_rows(
-            [item.__employee__ for item in self.items]
-        )
-        output = io.StringIO()
-        writer = csv.writer(output)
-        writer.writerow(emp_headers + [field.label for field in fields_metadata])
         for item in self.items:
-            writer.writerow(
-                emp_rows[item.__employee__.id]
-                + [str(getattr(item.item, field.name)) for field in fields_metadata]
-            )
-        return output
+            yield emp_rows[item.__employee__.id] + [
+                str(getattr(item.item, field.name)) for field in fields_metadata
+            ]
 
 
 class DaysSimpleReportDayItem(BaseModel, t.Generic[ReportItemT]):
@@ -123,24 +129,22 @@ class DaysSimpleReport(t.Generic[ReportItemT]):
             metadata={'fields': self.item_type.get_metadata()},
         )
 
-    def make_csv(self) -> io.StringIO:
-        fields_metadata = self.item_type.get_metadata()
-        emp_headers, emp_rows = _get_employees_cvs_rows(
-            [item.__employee__ for item in self.items]
-        )
-        output = io.StringIO()
-        writer = csv.writer(output)
-        writer.writerow(
-            emp_headers + ['date'] + [field.label for field in fields_metadata]
+    def csv_header(self, emp_headers: list[str]) -> list[str]:
+        return (
+            emp_headers
+            + ['date']
+            + [field.label for field in self.item_type.get_metadata()]
         )
+
+    def iter_csv_rows(self, emp_rows: dict[int, list[str]]) -> t.Iterator[list[str]]:
+        fields_metadata = self.item_type.get_metadata()
         for item in self.items:
             for day, data in item.days.items():
-                writer.writerow(
+                yield (
                     emp_rows[item.__employee__.id]
                     + [day.strftime('%d %b %Y')]
                     + [str(getattr(data.item, field.name)) for field in fields_metadata]
                 )
-        return output
 
 
 class DaysListReportDayItem(BaseModel, t.Generic[ReportItemT]):
@@ -177,20 +181,19 @@ class DaysListReport(t.Generic[ReportItemT]):
             metadata={'fields': self.item_type.get_metadata()},
         )
 
-    def make_csv(self) -> io.StringIO:
-        fields_metadata = self.item_type.get_metadata()
-        emp_headers, emp_rows = _get_employees_cvs_rows(
-            [item.__employee__ for item in self.items]
-        )
-        output = io.StringIO()
-        writer = csv.writer(output)
-        writer.writerow(
-            emp_headers + ['date'] + [field.label for field in fields_metadata]
+    def csv_header(self, emp_headers: list[str]) -> list[str]:
+        return (
+            emp_headers
+            + ['date']
+            + [field.label for field in self.item_type.get_metadata()]
         )
+
+    def iter_csv_rows(self, emp_rows: dict[int, list[str]]) -> t.Iterator[list[str]]:
+        fields_metadata = self.item_type.get_metadata()
         for item in self.items:
             for day, data in item.days.items():
                 for list_item in data.items:
-                    writer.writerow(
+                    yield (
                         emp_rows[item.__employee__.id]
                         + [day.strftime('%d %b %Y')]
                         + [
@@ -198,7 +201,6 @@ class DaysListReport(t.Generic[ReportItemT]):
                             for field in fields_metadata
                         ]
                     )
-        return output
 
 
 @dataclass
@@ -215,20 +217,15 @@ class ListSummaryReport(t.Generic[ReportItemT]):
             metadata={'fields': self.item_type.get_metadata()},
         )
 
-    def make_csv(self) -> io.StringIO:
+    def csv_header(self, emp_headers: list[str]) -> list[str]:
+        return emp_headers + [field.label for field in self.item_type.get_metadata()]
+
+    def iter_csv_rows(self, emp_rows: dict[int, list[str]]) -> t.Iterator[list[str]]:
         fields_metadata = self.item_type.get_metadata()
-        emp_headers, emp_rows = _get_employees_cvs_rows(
-            [item.__employee__ for item in self.items]
-        )
-        output = io.StringIO()
-        writer = csv.writer(output)
-        writer.writerow(emp_headers + [field.label for field in fields_metadata])
         for item in self.items:
-            writer.writerow(
-                emp_rows[item.__employee__.id]
-                + [str(getattr(item.total, field.name)) for field in fields_metadata]
-            )
-        return output
+            yield emp_rows[item.__employee__.id] + [
+                str(getattr(item.total, field.name)) for field in fields_metadata
+            ]
 
 
 @dataclass
@@ -245,39 +242,109 @@ class ListDetailsReport(t.Generic[ReportItemT]):
             metadata={'fields': self.item_type.get_metadata()},
         )
 
-    def make_csv(self) -> io.StringIO:
+    def csv_header(self, emp_headers: list[str]) -> list[str]:
+        return emp_headers + [field.label for field in self.item_type.get_metadata()]
+
+    def iter_csv_rows(self, emp_rows: dict[int, list[str]]) -> t.Iterator[list[str]]:
         fields_metadata = self.item_type.get_metadata()
-        emp_headers, emp_rows = _get_employees_cvs_rows(
-            [item.__employee__ for item in self.items]
-        )
-        output = io.StringIO()
-        writer = csv.writer(output)
-        writer.writerow(emp_headers + [field.label for field in fields_metadata])
         for item in self.items:
             for data in item.items:
-                writer.writerow(
-                    emp_rows[item.__employee__.id]
-                    + [str(getattr(data, field.name)) for field in fields_metadata]
-                )
-        return output
+                yield emp_rows[item.__employee__.id] + [
+                    str(getattr(data, field.name)) for field in fields_metadata
+                ]
+
+
+def _get_employees_cvs_header() -> list[str]:
+    return [
+        field for field in get_employee_csv_header() if field in FULL_EMPLOYEE_FIELDS
+    ]
 
 
 def _get_employees_cvs_rows(
-    employees: t.Sequence[m.Employee],
-) -> tuple[list[str], dict[int, list[str]]]:
-    fields = {emp.id: get_employee_csv_fields(emp) for emp in employees}
-    _seen = set()
-    all_fields = list(
-        k
-        for emp_fields in fields.values()
-        for k in emp_fields
-        if not (k in _seen or _seen.add(k))  # type: ignore[func-returns-value]
-    )
-    filtered_fields = [field for field in all_fields if field in FULL_EMPLOYEE_FIELDS]
-    return filtered_fields, {
-        emp.id: [
-            fields[emp.id][field].csv_getter(emp) if field in fields[emp.id] else 'N/A'
-            for field in filtered_fields
+    employees: t.Sequence[m.Employee], header: list[str]
+) -> dict[int, list[str]]:
+    rows = {}
+    for emp in employees:
+        fields = get_employee_csv_fields(emp)
+        rows[emp.id] = [
+            fields[field].csv_getter(emp) if field in fields else 'N/A'
+            for field in header
         ]
-        for emp in employees
-    }
+    return rows
+
+
+EmployeesReportT = (
+    SimpleReport
+    | DaysSimpleReport
+    | DaysListReport
+    | ListSummaryReport
+    | ListDetailsReport
+)
+
+
+def get_employee_filter(query_filter: str | None) -> t.Any:
+    if not query_filter:
+        return sa.sql.true()
+    return filter_to_query(
+        query_filter,
+        m.Employee,
+        available_fields=[
+            'id',
+            'uuid',
+            'english_name',
+            'native_name',
+            'email',
+            'account',
+            'active',
+            'team_id',
+            'organization_id',
+            'managers',
+            'work_started',
+        ],
+    )  # type: ignore
+
+
+async def iter_report_csv(
+    generate: t.Callable[..., t.Awaitable[EmployeesReportT]],
+    employee_filter: t.Any,
+    chunk_size: int = REPORT_CSV_CHUNK_SIZE,
+    session_maker: t.Callable[[], AsyncSession] = async_session,
+    progress: t.Callable[[int, int], t.Awaitable[None]] | None = None,
+) -> t.AsyncIterator[list[list[str]]]:
+    """
+    Generate a report for chunks of employees and yield its csv rows chunk by chunk.
+
+    The report is generated with a separate session, since the request session is closed
+    before a streaming response is sent. Only the ordered ids are selected up front,
+    the employees are loaded with every chunk.
+
+    :param generate: report generator called as ``generate(employee_filter, session=session)``
+    :param employee_filter: filter of the employees to include
+    :param chunk_size: number of employees in a chunk
+    :param session_maker: factory of the session to generate the report with
+    :param progress: called as ``progress(done, total)`` after every chunk of employees
+    :return: async iterator of csv rows chunks, the first one starts with the header
+    """
+    async with session_maker() as session:
+        employees_ids = await get_employees_ids(
+            employee_filter=employee_filter, session=session
+        )
+        emp_headers = _get_employees_cvs_header()
+        for idx in range(0, max(len(employees_ids), 1), chunk_size):
+            chunk_ids = employees_ids[idx : idx + chunk_size]
+            _, employees = await get_employees(
+                employee_filter=m.Employee.id.in_(chunk_ids),
+                session=session,
+                load_profile=m.EmployeeLoadProfile.REPORT,
+            )
+            emp_rows = _get_employees_cvs_rows(employees, emp_headers)
+            report = await generate(m.Employee.id.in_(chunk_ids), session=session)
+            rows = list(report.iter_csv_rows(emp_rows))
+            if idx == 0:
+                rows.insert(0, report.csv_header(emp_headers))
+            session.expunge_all()
+            yield rows
+            if progress is not None:
+                await progress(
+                    min(idx + chunk_size, len(employees_ids)), len(employees_ids)
+                )
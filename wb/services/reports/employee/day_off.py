@@ -8,7 +8,7 @@ from sqlalchemy.ext.asyncio import AsyncSession
 import wb.models as m
 from wb.services.employee import get_employees
 
-from ._base import (
+from .base import (
     BaseReportItem,
     ListDetailsReport,
     ListDetailsReportItem,
@@ -16,6 +16,11 @@ from ._base import (
     ListSummaryReportItem,
 )
 
+__all__ = (
+    'generate_day_off_summary_report',
+    'generate_day_off_details_report',
+)
+
 DAY_OFF_DAY_TYPES = (
     m.DayType.VACATION,
     m.DayType.SICK_DAY,
@@ -48,6 +53,7 @@ async def generate_day_off_report(
     _, employees_raw = await get_employees(
         employee_filter=flt,
         session=session,
+        load_profile=m.EmployeeLoadProfile.REPORT,
     )
     employees: dict[int, m.Employee] = {emp.id: emp for emp in employees_raw}
     employee_ids = list(employees.keys())
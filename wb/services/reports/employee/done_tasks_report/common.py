@@ -1,6 +1,6 @@
 from pydantic import Field
 
-from .._base import BaseReportItem
+from ..base import BaseReportItem
 
 __all__ = ('ReportItem',)
 
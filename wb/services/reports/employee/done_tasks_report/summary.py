@@ -9,7 +9,7 @@ from wb.services.done_tasks import get_done_task_summary_by_day
 from wb.services.employee import get_employees
 from wb.services.schedule import get_employees_days_status
 
-from .._base import DaysSimpleReport, DaysSimpleReportDayItem, DaysSimpleReportItem
+from ..base import DaysSimpleReport, DaysSimpleReportDayItem, DaysSimpleReportItem
 from .common import ReportItem
 
 __all__ = ('generate_done_tasks_summary_report',)
@@ -24,6 +24,7 @@ async def generate_done_tasks_summary_report(
     _, employees = await get_employees(
         employee_filter=flt,
         session=session,
+        load_profile=m.EmployeeLoadProfile.REPORT,
     )
     days_status = await get_employees_days_status(
         employees,
@@ -8,7 +8,7 @@ from wb.services.done_tasks import get_done_task_summary
 from wb.services.employee import get_employees
 from wb.services.schedule import get_employees_days_status
 
-from .._base import SimpleReport, SimpleReportItem
+from ..base import SimpleReport, SimpleReportItem
 from .common import ReportItem
 
 __all__ = ('generate_done_tasks_summary_total_report',)
@@ -23,6 +23,7 @@ async def generate_done_tasks_summary_total_report(
     _, employees = await get_employees(
         employee_filter=flt,
         session=session,
+        load_profile=m.EmployeeLoadProfile.REPORT,
     )
     days_status = await get_employees_days_status(
         employees,
@@ -9,7 +9,7 @@ import wb.models as m
 from wb.services.employee import get_employees
 from wb.utils.current_user import get_current_roles_employee_related
 
-from ._base import BaseReportItem, ListDetailsReport, ListDetailsReportItem
+from .base import BaseReportItem, ListDetailsReport, ListDetailsReportItem
 
 __all__ = ('generate_due_date_report',)
 
@@ -61,6 +61,7 @@ async def generate_due_date_report(
     _, employees = await get_employees(
         employee_filter=flt,
         session=session,
+        load_profile=m.EmployeeLoadProfile.REPORT,
     )
     employees_ids = [emp.id for emp in employees]
     issues_query = (
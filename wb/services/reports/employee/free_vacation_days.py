@@ -3,10 +3,11 @@ from typing import Any
 from pydantic import Field
 from sqlalchemy.ext.asyncio import AsyncSession
 
-from wb.services import calc_employee_vacation_days
+import wb.models as m
+from wb.services import calc_employees_vacation_days
 from wb.services.employee import get_employees
 
-from ._base import BaseReportItem, SimpleReport, SimpleReportItem
+from .base import BaseReportItem, SimpleReport, SimpleReportItem
 
 __all__ = ('generate_free_days_report',)
 
@@ -31,10 +32,12 @@ async def generate_free_days_report(
     _, employees = await get_employees(
         employee_filter=flt,
         session=session,
+        load_profile=m.EmployeeLoadProfile.REPORT,
     )
+    vacation_days = await calc_employees_vacation_days(employees, session=session)
     results: list[SimpleReportItem] = []
     for emp in employees:
-        res = await calc_employee_vacation_days(emp, session=session)
+        res = vacation_days[emp.id]
         results.append(
             SimpleReportItem(
                 employee=emp,
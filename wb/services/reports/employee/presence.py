@@ -11,7 +11,7 @@ from wb.services.employee import get_employees
 from wb.services.schedule import get_employees_days_status
 from wb.services.tm import PresenceItem, calc_presence
 
-from ._base import (
+from .base import (
     BaseReportItem,
     DaysSimpleReport,
     DaysSimpleReportDayItem,
@@ -66,6 +66,7 @@ async def generate_presence_report(
     _, employees = await get_employees(
         employee_filter=flt,
         session=session,
+        load_profile=m.EmployeeLoadProfile.REPORT,
     )
     presence = await calc_presence(employees, start, end, session=session)
     days_status = await get_employees_days_status(
@@ -11,7 +11,7 @@ from wb.services.employee import get_employees
 from wb.services.schedule import get_employees_days_status
 from wb.services.tm import calc_presence
 
-from ._base import BaseReportItem, SimpleReport, SimpleReportItem
+from .base import BaseReportItem, SimpleReport, SimpleReportItem
 
 __all__ = ('generate_presence_summary_report',)
 
@@ -41,6 +41,7 @@ async def generate_presence_summary_report(
     _, employees = await get_employees(
         employee_filter=flt,
         session=session,
+        load_profile=m.EmployeeLoadProfile.REPORT,
     )
     presence = await calc_presence(employees, start, end, session=session)
     days_status = await get_employees_days_status(
@@ -0,0 +1,212 @@
+import calendar
+import re
+from collections.abc import Sequence
+from datetime import date, timedelta
+from tempfile import TemporaryFile
+from typing import IO, Any, NamedTuple
+
+import sqlalchemy as sa
+from openpyxl import Workbook
+from openpyxl.cell import WriteOnlyCell
+from openpyxl.styles import Alignment, NamedStyle, PatternFill
+from openpyxl.utils import get_column_letter
+from openpyxl.worksheet._write_only import WriteOnlyWorksheet
+from sqlalchemy.ext.asyncio import AsyncSession
+
+import wb.models as m
+from shared_utils.dateutils import date_range, month_range
+from wb.services.tm import TMDaySummary, get_employees_tm_day_summaries
+
+__all__ = (
+    'generate_working_time_month_report',
+    'WORKING_TIME_REPORT_MAX_MONTHS',
+    'XLSX_MEDIA_TYPE',
+)
+
+WORKING_TIME_REPORT_MAX_MONTHS = 12
+XLSX_MEDIA_TYPE = 'application/vnd.openxmlformats-officedocument.spreadsheetml.sheet'
+SHEET_TITLE_MAX_LENGTH = 31
+SHEET_TITLE_INVALID_CHARS = re.compile(r'[\\/*?:\[\]]')
+NO_TEAM_TITLE = 'No team'
+FIRST_DAY_COLUMN = 2
+
+HEADER_STYLE = 'wt_header'
+TOTAL_STYLE = 'wt_total'
+TOTAL_HEADER_STYLE = 'wt_total_header'
+TRIP_STYLE = 'wt_trip'
+SICK_STYLE = 'wt_sick'
+VACATION_STYLE = 'wt_vacation'
+
+_CENTER = Alignment(horizontal='center', vertical='center')
+
+# title, style, width
+SUMMARY_COLUMNS: tuple[tuple[str, str | None, int], ...] = (
+    ('business trip (hours)', TRIP_STYLE, 18),
+    ('sick days (hours)', SICK_STYLE, 20),
+    ('vacation (hours)', VACATION_STYLE, 15),
+    ('in office (hours)', None, 23),
+    ('total (hours)', None, 17),
+    ('missed (hours)', None, 18),
+)
+TOTAL_SUMMARY_COLUMN = 4
+
+
+class ReportEmployee(NamedTuple):
+    id: int
+    english_name: str
+    team: str | None
+
+
+def _make_workbook() -> Workbook:
+    wb = Workbook(write_only=True)
+    for name, fill, alignment in (
+        (HEADER_STYLE, None, _CENTER),
+        (TOTAL_STYLE, 'd1d1cd', None),
+        (TOTAL_HEADER_STYLE, 'd1d1cd', _CENTER),
+        (TRIP_STYLE, '95b3d7', None),
+        (SICK_STYLE, 'c4bd97', None),
+        (VACATION_STYLE, 'ccc0da', None),
+    ):
+        style = NamedStyle(name=name)
+        if fill:
+            style.fill = PatternFill('solid', fgColor=fill)
+        if alignment:
+            style.alignment = alignment
+        wb.add_named_style(style)
+    return wb
+
+
+def _sheet_title(title: str, used: set[str]) -> str:
+    title = SHEET_TITLE_INVALID_CHARS.sub(' ', title).strip()[:SHEET_TITLE_MAX_LENGTH]
+    result, num = title, 1
+    while result.lower() in used:
+        num += 1
+        suffix = f' ({num})'
+        result = title[: SHEET_TITLE_MAX_LENGTH - len(suffix)] + suffix
+    used.add(result.lower())
+    return result
+
+
+def _cell(ws: WriteOnlyWorksheet, value: Any, style: str | None) -> WriteOnlyCell:
+    cell = WriteOnlyCell(ws, value=value)
+    if style:
+        cell.style = style
+    return cell
+
+
+def _write_month_sheet(
+    wb: Workbook,
+    title: str,
+    days: Sequence[date],
+    employees: Sequence[ReportEmployee],
+    tm_data: dict[int, dict[date, TMDaySummary | None]],
+) -> None:
+    ws = wb.create_sheet(title)
+    ws.freeze_panes = 'B3'
+    ws.column_dimensions['A'].width = 20
+    summary_column = FIRST_DAY_COLUMN + len(days) * 3
+    for index, (_, _, width) in enumerate(SUMMARY_COLUMNS):
+        ws.column_dimensions[get_column_letter(summary_column + index)].width = width
+    days_header: list[Any] = [None]
+    columns_header: list[Any] = [None]
+    for index, day in enumerate(days):
+        column = FIRST_DAY_COLUMN + index * 3
+        ws.merged_cells.add(
+            f'{get_column_letter(column)}1:{get_column_letter(column + 2)}1'
+        )
+        days_header.extend(
+            (_cell(ws, day.strftime('%d %b %Y'), HEADER_STYLE), None, None)
+        )
+        columns_header.extend(
+            (
+                _cell(ws, 'start', HEADER_STYLE),
+                _cell(ws, 'leave', HEADER_STYLE),
+                _cell(ws, 'total', TOTAL_HEADER_STYLE),
+            )
+        )
+    for name, style, _ in SUMMARY_COLUMNS:
+        days_header.append(_cell(ws, name, style))
+    ws.append(days_header)
+    ws.append(columns_header)
+    for emp in employees:
+        row: list[Any] = [emp.english_name]
+        total = timedelta()
+        for day in days:
+            if summary := tm_data[emp.id][day]:
+                total_day = summary.last - summary.first
+                total += total_day
+                row.extend(
+                    (
+                        summary.first.strftime('%H:%M'),
+                        summary.last.strftime('%H:%M'),
+                        _cell(ws, str(total_day), TOTAL_STYLE),
+                    )
+                )
+            else:
+                row.extend(('', '', _cell(ws, '', TOTAL_STYLE)))
+        row.extend([None] * TOTAL_SUMMARY_COLUMN)
+        row.append(str(total))
+        ws.append(row)
+
+
+async def generate_working_time_month_report(
+    flt: Any,
+    start: date,
+    end: date,
+    session: AsyncSession,
+    by_team: bool = False,
+) -> IO[bytes]:
+    """
+    Generate the working time report with a sheet per month from ``start`` to ``end``.
+
+    With ``by_team`` every month has a sheet per team. The workbook is written in
+    write-only mode, so rows are flushed to disk as they are appended, TM records are
+    loaded one month at a time, see ``get_employees_tm_day_summaries``.
+
+    :return: A temporary file with the workbook, positioned at the start.
+    :rtype: IO[bytes]
+    """
+    q = (
+        sa.select(m.Employee.id, m.Employee.english_name, m.Team.name)
+        .outerjoin(m.Team, m.Team.id == m.Employee.team_id)
+        .filter(flt)
+    )
+    if by_team:
+        q = q.order_by(m.Team.name.nulls_last(), m.Employee.english_name)
+    else:
+        q = q.order_by(m.Employee.english_name)
+    employees = [ReportEmployee(*row) for row in (await session.execute(q)).all()]
+    groups: dict[str | None, list[ReportEmployee]] = {}
+    for emp in employees:
+        groups.setdefault(emp.team if by_team else None, []).append(emp)
+    if not groups:
+        groups[None] = []
+    wb = _make_workbook()
+    used_titles: set[str] = set()
+    for year, month in month_range((start.year, start.month), (end.year, end.month)):
+        month_start = date(year, month, 1)
+        month_end = date(year, month, calendar.monthrange(year, month)[1])
+        days = list(date_range(month_start, month_end))
+        tm_data = await get_employees_tm_day_summaries(
+            [emp.id for emp in employees], month_start, month_end, session=session
+        )
+        for team, team_employees in groups.items():
+            if by_team:
+                # keep the month when a long team name is truncated
+                suffix = month_start.strftime(' %b %Y')
+                title = (team or NO_TEAM_TITLE)[
+                    : SHEET_TITLE_MAX_LENGTH - len(suffix)
+                ] + suffix
+            else:
+                title = month_start.strftime('%B %Y')
+            _write_month_sheet(
+                wb, _sheet_title(title, used_titles), days, team_employees, tm_data
+            )
+    result = TemporaryFile()  # pylint: disable=consider-using-with
+    try:
+        wb.save(result)
+    except Exception:
+        result.close()
+        raise
+    result.seek(0)
+    return result
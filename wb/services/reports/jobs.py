@@ -0,0 +1,360 @@
+import asyncio
+import hashlib
+from collections.abc import AsyncIterator, Awaitable, Callable
+from contextlib import asynccontextmanager, suppress
+from dataclasses import dataclass
+from datetime import date, datetime, timedelta
+from enum import StrEnum
+from functools import partial
+from typing import Any
+
+import orjson
+from pydantic import BaseModel
+from sqlalchemy.ext.asyncio import AsyncSession
+from starlette_context import request_cycle_context
+
+import wb.models as m
+from wb.config import CONFIG
+from wb.log import log
+from wb.redis_db import AsyncRedis
+from wb.utils.principal import Principal, get_principal
+from wb.utils.search import filter_to_query
+from wb.utils.streaming import encode_csv_rows
+
+from .employee import (
+    XLSX_MEDIA_TYPE,
+    generate_activity_details_report,
+    generate_activity_summary_report,
+    generate_activity_total_by_range_report,
+    generate_day_off_details_report,
+    generate_day_off_summary_report,
+    generate_done_tasks_summary_report,
+    generate_done_tasks_summary_total_report,
+    generate_due_date_report,
+    generate_free_days_report,
+    generate_presence_report,
+    generate_presence_summary_report,
+    generate_working_time_month_report,
+    get_employee_filter,
+    iter_report_csv,
+)
+
+__all__ = (
+    'ReportJobFormat',
+    'ReportJobParams',
+    'ReportJobStatus',
+    'ReportJob',
+    'ReportJobType',
+    'REPORT_JOB_TYPES',
+    'get_report_job_scope',
+    'get_report_job',
+    'get_report_job_artifact',
+    'create_report_job',
+    'run_report_job',
+)
+
+REPORT_JOB_KEY_PREFIX = 'report-job'
+
+
+class ReportJobFormat(StrEnum):
+    JSON = 'json'
+    CSV = 'csv'
+    XLSX = 'xlsx'
+
+
+class ReportJobParams(BaseModel):
+    report_type: str
+    format: ReportJobFormat = ReportJobFormat.JSON
+    filter: str | None = None
+    start: date | None = None
+    end: date | None = None
+    activity_filter: str | None = None
+    by_team: bool = False
+
+
+class ReportJobStatus(StrEnum):
+    PENDING = 'pending'
+    RUNNING = 'running'
+    DONE = 'done'
+    FAILED = 'failed'
+
+
+MEDIA_TYPES: dict[ReportJobFormat, str] = {
+    ReportJobFormat.JSON: 'application/json',
+    ReportJobFormat.CSV: 'text/csv',
+    ReportJobFormat.XLSX: XLSX_MEDIA_TYPE,
+}
+
+
+class ReportJob(BaseModel):
+    id: str
+    status: ReportJobStatus
+    params: ReportJobParams
+    scope: str
+    progress: int = 0
+    error: str | None = None
+    created: datetime
+    started: datetime | None = None
+    heartbeat: datetime | None = None
+    finished: datetime | None = None
+
+    @property
+    def filename(self) -> str:
+        return f'{self.params.report_type.replace("-", "_")}.{self.params.format}'
+
+    @property
+    def media_type(self) -> str:
+        return MEDIA_TYPES[self.params.format]
+
+    @property
+    def is_stalled(self) -> bool:
+        """
+        Running job whose worker stopped refreshing the heartbeat, e.g. it was killed.
+        """
+        if self.status != ReportJobStatus.RUNNING:
+            return False
+        timeout = timedelta(seconds=CONFIG.REPORT_JOB_HEARTBEAT_TIMEOUT)
+        return not self.heartbeat or datetime.utcnow() - self.heartbeat > timeout
+
+
+def _no_kwargs(_: ReportJobParams) -> dict[str, Any]:
+    return {}
+
+
+def _activity_details_kwargs(params: ReportJobParams) -> dict[str, Any]:
+    if not params.activity_filter:
+        return {'activity_filter': None}
+    return {
+        'activity_filter': filter_to_query(
+            params.activity_filter,
+            m.Activity,
+            available_fields=['source_id', 'action'],
+        )
+    }
+
+
+@dataclass(frozen=True)
+class ReportJobType:
+    """
+    Report available as a job.
+
+    :param generate: report generator called as ``generate(employee_filter, session=session, **kwargs)``
+    :param formats: formats the report can be produced in
+    :param date_range: whether the report requires ``start`` and ``end``
+    :param employee_filter: makes the employee filter from the ``filter`` parameter
+    :param kwargs: makes the report specific keyword arguments of ``generate``
+    """
+
+    generate: Callable[..., Awaitable[Any]]
+    formats: tuple[ReportJobFormat, ...] = (ReportJobFormat.JSON, ReportJobFormat.CSV)
+    date_range: bool = True
+    employee_filter: Callable[[str | None], Any] = get_employee_filter
+    kwargs: Callable[[ReportJobParams], dict[str, Any]] = _no_kwargs
+
+
+REPORT_JOB_TYPES: dict[str, ReportJobType] = {
+    'vacation-free-days-report': ReportJobType(
+        generate_free_days_report, date_range=False
+    ),
+    'working-time-month-report': ReportJobType(
+        generate_working_time_month_report,
+        formats=(ReportJobFormat.XLSX,),
+        kwargs=lambda params: {'by_team': params.by_team},
+    ),
+    'activity-summary-report': ReportJobType(generate_activity_summary_report),
+    'activity-details-report': ReportJobType(
+        generate_activity_details_report,
+        employee_filter=lambda flt: flt,
+        kwargs=_activity_details_kwargs,
+    ),
+    'presence': ReportJobType(generate_presence_report),
+    'presence-summary-report': ReportJobType(generate_presence_summary_report),
+    'activity-summary-total-report': ReportJobType(
+        generate_activity_total_by_range_report
+    ),
+    'day-off-summary-report': ReportJobType(generate_day_off_summary_report),
+    'day-off-details-report': ReportJobType(generate_day_off_details_report),
+    'due-date-report': ReportJobType(generate_due_date_report),
+    'done-tasks-summary-report': ReportJobType(generate_done_tasks_summary_report),
+    'done-tasks-summary-total-report': ReportJobType(
+        generate_done_tasks_summary_total_report
+    ),
+}
+
+
+def get_report_job_scope(viewer: Principal) -> str:
+    # reports include the employee fields readable by the viewer, which depend on
+    # the viewer relations to the employees, not only on the viewer roles
+    return f'employee:{viewer.id}'
+
+
+def _state_key(job_id: str) -> str:
+    return f'{REPORT_JOB_KEY_PREFIX}-{job_id}'
+
+
+def _artifact_key(job_id: str) -> str:
+    return f'{REPORT_JOB_KEY_PREFIX}-{job_id}-artifact'
+
+
+async def _save_report_job(
+    job: ReportJob, redis: AsyncRedis, only_new: bool = False
+) -> bool:
+    return bool(
+        await redis.set(
+            _state_key(job.id),
+            job.model_dump_json(),
+            ex=CONFIG.REPORT_JOB_TTL,
+            nx=only_new,
+        )
+    )
+
+
+async def get_report_job(job_id: str, redis: AsyncRedis) -> ReportJob | None:
+    if not (data := await redis.get(_state_key(job_id))):
+        return None
+    return ReportJob.model_validate_json(data)
+
+
+async def get_report_job_artifact(job_id: str, redis: AsyncRedis) -> bytes | None:
+    return await redis.get(_artifact_key(job_id))
+
+
+async def create_report_job(
+    params: ReportJobParams, viewer: Principal, redis: AsyncRedis
+) -> tuple[ReportJob, bool]:
+    """
+    Create a job of the report or find the job of the same request.
+
+    The job id is derived from the parameters and the viewer, so identical requests of
+    the viewer share a job until its artifact expires. A failed job and a running job
+    without a heartbeat for ``REPORT_JOB_HEARTBEAT_TIMEOUT`` seconds are replaced by a new one.
+
+    :return: the job and whether it is new and has to be enqueued
+    """
+    scope = get_report_job_scope(viewer)
+    job_id = hashlib.sha256(
+        orjson.dumps(
+            {'params': params.model_dump(mode='json'), 'scope': scope},
+            option=orjson.OPT_SORT_KEYS,
+        )
+    ).hexdigest()
+    job = ReportJob(
+        id=job_id,
+        status=ReportJobStatus.PENDING,
+        params=params,
+        scope=scope,
+        created=datetime.utcnow(),
+    )
+    if await _save_report_job(job, redis, only_new=True):
+        return job, True
+    current = await get_report_job(job_id, redis)
+    if (
+        current is not None
+        and current.status != ReportJobStatus.FAILED
+        and not current.is_stalled
+    ):
+        if current.status != ReportJobStatus.DONE or await redis.exists(
+            _artifact_key(job_id)
+        ):
+            return current, False
+    await _save_report_job(job, redis)
+    return job, True
+
+
+async def _make_report_artifact(
+    params: ReportJobParams,
+    session: AsyncSession,
+    session_maker: Callable[[], AsyncSession],
+    progress: Callable[[int, int], Awaitable[None]],
+) -> bytes:
+    job_type = REPORT_JOB_TYPES[params.report_type]
+    employee_filter = job_type.employee_filter(params.filter)
+    kwargs = job_type.kwargs(params)
+    if job_type.date_range:
+        kwargs.update(start=params.start, end=params.end)
+    if params.format == ReportJobFormat.CSV:
+        chunks = [
+            encode_csv_rows(rows)
+            async for rows in iter_report_csv(
+                partial(job_type.generate, **kwargs),
+                employee_filter,
+                session_maker=session_maker,
+                progress=progress,
+            )
+        ]
+        return b''.join(chunks)
+    report = await job_type.generate(employee_filter, session=session, **kwargs)
+    if params.format == ReportJobFormat.XLSX:
+        with report:
+            return report.read()
+    return report.make_list_output().model_dump_json().encode()
+
+
+async def _keep_report_job_alive(job: ReportJob, redis: AsyncRedis) -> None:
+    while True:
+        await asyncio.sleep(CONFIG.REPORT_JOB_HEARTBEAT_TIMEOUT / 3)
+        job.heartbeat = datetime.utcnow()
+        await _save_report_job(job, redis)
+
+
+@asynccontextmanager
+async def _report_job_heartbeat(
+    job: ReportJob, redis: AsyncRedis
+) -> AsyncIterator[None]:
+    task = asyncio.create_task(_keep_report_job_alive(job, redis))
+    try:
+        yield
+    finally:
+        task.cancel()
+        with suppress(asyncio.CancelledError):
+            await task
+
+
+async def run_report_job(
+    job_id: str,
+    viewer_id: int,
+    redis: AsyncRedis,
+    session_maker: Callable[[], AsyncSession],
+) -> None:
+    """
+    Generate the report of a pending job as the viewer and store the artifact for
+    ``REPORT_JOB_TTL`` seconds, progress and errors are kept in the job state.
+
+    The heartbeat of the job is refreshed with the progress and periodically while
+    the report is generated, so a job of a killed worker is restarted by ``create_report_job``.
+    """
+    job = await get_report_job(job_id, redis)
+    if job is None or job.status != ReportJobStatus.PENDING:
+        return
+    job.status = ReportJobStatus.RUNNING
+    job.started = job.heartbeat = datetime.utcnow()
+    await _save_report_job(job, redis)
+
+    async def progress(done: int, total: int) -> None:
+        job.progress = done * 100 // max(total, 1)
+        job.heartbeat = datetime.utcnow()
+        await _save_report_job(job, redis)
+
+    try:
+        async with _report_job_heartbeat(job, redis), session_maker() as session:
+            viewer = await get_principal(viewer_id, session=session)
+            if viewer is None:
+                raise ValueError(f'employee {viewer_id} not found')
+            with request_cycle_context({'current_user': viewer}):
+                artifact = await _make_report_artifact(
+                    job.params, session, session_maker, progress
+                )
+    except Exception as err:  # pylint: disable=broad-exception-caught
+        log.error(f'report job {job_id} ({job.params.report_type}) failed: {err}')
+        job.status = ReportJobStatus.FAILED
+        job.error = str(err)
+        job.finished = datetime.utcnow()
+        await _save_report_job(job, redis)
+        return
+    job.status = ReportJobStatus.DONE
+    job.progress = 100
+    job.finished = datetime.utcnow()
+    async with redis.pipeline(transaction=True) as pipe:
+        pipe.set(_artifact_key(job_id), artifact, ex=CONFIG.REPORT_JOB_TTL)
+        pipe.set(_state_key(job_id), job.model_dump_json(), ex=CONFIG.REPORT_JOB_TTL)
+        await pipe.execute()
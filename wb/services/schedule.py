@@ -1,18 +1,23 @@
+import calendar
 import typing as t
 from dataclasses import dataclass
-from datetime import date
+from datetime import date, timedelta
 
 import sqlalchemy as sa
+from sqlalchemy.dialects.postgresql import ARRAY, insert
 from sqlalchemy.ext.asyncio import AsyncSession
 
 import wb.models as m
-from shared_utils.dateutils import date_range
+from shared_utils.dateutils import date_range, month_range
 
 __all__ = (
     'get_employee_scheduled_holidays_and_weekends',
     'get_employee_days_status',
     'calc_employee_vacation_days',
+    'calc_employees_vacation_days',
     'get_employees_days_status',
+    'get_employees_days_status_range',
+    'DaysStatusRange',
 )
 
 
@@ -56,74 +61,118 @@ class CalcEmployeeVacationDaysResult:
     count_existed_sick_days: int
 
 
-async def calc_employee_vacation_days(  # pylint: disable=too-many-locals
+async def calc_employee_vacation_days(
     emp: m.Employee,
     session: AsyncSession,
 ) -> CalcEmployeeVacationDaysResult:
-    calc_start_date = emp.contract_date if emp.contract_date else emp.work_started
-    schedules_query = sa.select(m.EmployeeSchedule).where(
-        m.EmployeeSchedule.employee_id == emp.id,
-        sa.or_(
-            m.EmployeeSchedule.end.is_(None),
-            m.EmployeeSchedule.end >= calc_start_date,
-        ),
-    )
-    schedules_raw = await session.scalars(schedules_query)
-    today = date.today()
-    total_vacation_days_current: float = 0
-    total_vacation_year_end: float = 0
-    for sch in schedules_raw.all():
-        start = max(sch.start, calc_start_date)
-        end_year = sch.end if sch.end else date(day=31, month=12, year=today.year)
-        end_current = min(sch.end, today) if sch.end else today
-        if start <= end_year:
-            total_vacation_year_end += (
-                ((end_year - start).days + 1) / 365 * sch.vacation_days_per_year
-            )
-        if start <= end_current:
-            total_vacation_days_current += (
-                ((end_current - start).days + 1) / 365 * sch.vacation_days_per_year
-            )
+    results = await calc_employees_vacation_days([emp], session=session)
+    return results[emp.id]
+
+
+def _vacation_calc_start(emp: m.Employee) -> date:
+    return emp.contract_date if emp.contract_date else emp.work_started
 
-    count_existed_vacations_query = sa.select(sa.func.count()).where(  # pylint: disable=not-callable
-        m.EmployeeScheduleExclusion.employee_id == emp.id,
-        m.EmployeeScheduleExclusion.day >= calc_start_date,
-        m.EmployeeScheduleExclusion.type == m.DayType.VACATION,
-        m.EmployeeScheduleExclusion.canceled.is_(None),
+
+async def calc_employees_vacation_days(  # pylint: disable=too-many-locals
+    employees: t.Sequence[m.Employee],
+    session: AsyncSession,
+) -> dict[int, CalcEmployeeVacationDaysResult]:
+    employees_ids = {emp.id for emp in employees}
+    calc_start_date = sa.func.coalesce(
+        m.Employee.contract_date, m.Employee.work_started
     )
-    count_existed_vacations_raw = await session.scalar(count_existed_vacations_query)
-    count_correction_query = (
-        sa.select(sa.func.sum(m.EmployeeVacationCorrection.days))
-        .select_from(m.EmployeeVacationCorrection)
+    schedules_raw = await session.execute(
+        sa.select(
+            m.EmployeeSchedule.employee_id,
+            m.EmployeeSchedule.start,
+            m.EmployeeSchedule.end,
+            m.EmployeeSchedule.vacation_days_per_year,
+        )
+        .join(m.Employee, m.Employee.id == m.EmployeeSchedule.employee_id)
         .where(
-            m.EmployeeVacationCorrection.employee_id == emp.id,
-            m.EmployeeVacationCorrection.created >= calc_start_date,
+            m.EmployeeSchedule.employee_id.in_(employees_ids),
+            sa.or_(
+                m.EmployeeSchedule.end.is_(None),
+                m.EmployeeSchedule.end >= calc_start_date,
+            ),
         )
     )
-    count_correction_raw = await session.scalar(count_correction_query)
-    count_correction: int = count_correction_raw or 0
-    count_existed_vacations: int = count_existed_vacations_raw or 0
-    count_existed_sick_days_query = sa.select(sa.func.count()).where(  # pylint: disable=not-callable
-        m.EmployeeScheduleExclusion.employee_id == emp.id,
-        m.EmployeeScheduleExclusion.day >= calc_start_date,
-        m.EmployeeScheduleExclusion.type == m.DayType.SICK_DAY,
-        m.EmployeeScheduleExclusion.canceled.is_(None),
+    schedules: dict[int, list[sa.Row]] = {emp_id: [] for emp_id in employees_ids}
+    for sch in schedules_raw.all():
+        schedules[sch.employee_id].append(sch)
+    exclusions_raw = await session.execute(
+        sa.select(
+            m.EmployeeScheduleExclusion.employee_id,
+            sa.func.count()  # pylint: disable=not-callable
+            .filter(m.EmployeeScheduleExclusion.type == m.DayType.VACATION)
+            .label('vacations'),
+            sa.func.count()  # pylint: disable=not-callable
+            .filter(m.EmployeeScheduleExclusion.type == m.DayType.SICK_DAY)
+            .label('sick_days'),
+        )
+        .join(m.Employee, m.Employee.id == m.EmployeeScheduleExclusion.employee_id)
+        .where(
+            m.EmployeeScheduleExclusion.employee_id.in_(employees_ids),
+            m.EmployeeScheduleExclusion.day >= calc_start_date,
+            m.EmployeeScheduleExclusion.type.in_(
+                (m.DayType.VACATION, m.DayType.SICK_DAY)
+            ),
+            m.EmployeeScheduleExclusion.canceled.is_(None),
+        )
+        .group_by(m.EmployeeScheduleExclusion.employee_id)
     )
-    count_existed_sick_days_raw = await session.scalar(count_existed_sick_days_query)
-    count_existed_sick_days: int = count_existed_sick_days_raw or 0
-    return CalcEmployeeVacationDaysResult(
-        total_vacation_year_end=round(total_vacation_year_end),
-        total_vacation_days_current=round(total_vacation_days_current),
-        count_existed_vacations=count_existed_vacations,
-        count_correction=count_correction,
-        free_vacation_days_year_end=round(total_vacation_year_end)
-        - count_existed_vacations
-        + count_correction,
-        free_vacation_days_current=round(total_vacation_days_current)
-        - count_existed_vacations
-        + count_correction,
-        count_existed_sick_days=count_existed_sick_days,
+    exclusions = {
+        r.employee_id: (r.vacations, r.sick_days) for r in exclusions_raw.all()
+    }
+    corrections_raw = await session.execute(
+        sa.select(
+            m.EmployeeVacationCorrection.employee_id,
+            sa.func.sum(m.EmployeeVacationCorrection.days).label('days'),
+        )
+        .join(m.Employee, m.Employee.id == m.EmployeeVacationCorrection.employee_id)
+        .where(
+            m.EmployeeVacationCorrection.employee_id.in_(employees_ids),
+            m.EmployeeVacationCorrection.created >= calc_start_date,
+        )
+        .group_by(m.EmployeeVacationCorrection.employee_id)
     )
+    corrections = {r.employee_id: r.days for r in corrections_raw.all()}
+    today = date.today()
+    results: dict[int, CalcEmployeeVacationDaysResult] = {}
+    for emp in employees:
+        emp_calc_start_date = _vacation_calc_start(emp)
+        total_vacation_days_current: float = 0
+        total_vacation_year_end: float = 0
+        for sch in schedules[emp.id]:
+            start = max(sch.start, emp_calc_start_date)
+            end_year = sch.end if sch.end else date(day=31, month=12, year=today.year)
+            end_current = min(sch.end, today) if sch.end else today
+            if start <= end_year:
+                total_vacation_year_end += (
+                    ((end_year - start).days + 1) / 365 * sch.vacation_days_per_year
+                )
+            if start <= end_current:
+                total_vacation_days_current += (
+                    ((end_current - start).days + 1) / 365 * sch.vacation_days_per_year
+                )
+        count_existed_vacations, count_existed_sick_days = exclusions.get(
+            emp.id, (0, 0)
+        )
+        count_correction: int = corrections.get(emp.id) or 0
+        results[emp.id] = CalcEmployeeVacationDaysResult(
+            total_vacation_year_end=round(total_vacation_year_end),
+            total_vacation_days_current=round(total_vacation_days_current),
+            count_existed_vacations=count_existed_vacations,
+            count_correction=count_correction,
+            free_vacation_days_year_end=round(total_vacation_year_end)
+            - count_existed_vacations
+            + count_correction,
+            free_vacation_days_current=round(total_vacation_days_current)
+            - count_existed_vacations
+            + count_correction,
+            count_existed_sick_days=count_existed_sick_days,
+        )
+    return results
 
 
 async def get_employee_days_status(
@@ -133,10 +182,162 @@ async def get_employee_days_status(
     return results[emp.id]
 
 
+@dataclass
+class DaysStatusRange:
+    start: date
+    end: date
+    days: dict[int, list[m.DayType]]
+    """day statuses of every employee, indexed by the offset from ``start``"""
+
+    def get(self, employee_id: int, day: date) -> m.DayType:
+        return self.days[employee_id][(day - self.start).days]
+
+    def as_dict(self) -> dict[int, dict[date, m.DayType]]:
+        dates = list(date_range(self.start, self.end))
+        return {emp_id: dict(zip(dates, days)) for emp_id, days in self.days.items()}
+
+
 async def get_employees_days_status(
     employees: t.Sequence[m.Employee], start: date, end: date, session: AsyncSession
 ) -> dict[int, dict[date, m.DayType]]:
+    days_range = await get_employees_days_status_range(
+        employees, start, end, session=session
+    )
+    return days_range.as_dict()
+
+
+async def get_employees_days_status_range(
+    employees: t.Sequence[m.Employee], start: date, end: date, session: AsyncSession
+) -> DaysStatusRange:
+    months = [
+        date(y, mo, 1)
+        for y, mo in month_range((start.year, start.month), (end.year, end.month))
+    ]
     employees_ids = {emp.id for emp in employees}
+    stored_raw = await session.execute(
+        sa.select(
+            m.EmployeeDayStatusMonth.employee_id,
+            m.EmployeeDayStatusMonth.month,
+            m.EmployeeDayStatusMonth.days,
+        ).where(
+            m.EmployeeDayStatusMonth.employee_id.in_(employees_ids),
+            m.EmployeeDayStatusMonth.month.between(months[0], months[-1]),
+        )
+    )
+    stored: dict[int, dict[date, str]] = {emp_id: {} for emp_id in employees_ids}
+    for row in stored_raw.all():
+        stored[row.employee_id][row.month] = row.days
+    not_stored = [emp for emp in employees if len(stored[emp.id]) < len(months)]
+    if not_stored:
+        materialized = await _materialize_days_status(
+            not_stored, months[0], _month_end(months[-1]), session=session
+        )
+        for emp_id, emp_months in materialized.items():
+            stored[emp_id].update(emp_months)
+    offset = (start - months[0]).days
+    length = (end - start).days + 1
+    return DaysStatusRange(
+        start=start,
+        end=end,
+        days={
+            emp_id: [
+                m.DAY_TYPE_BY_CODE[code]
+                for code in ''.join(emp_months[mo] for mo in months)[
+                    offset : offset + length
+                ]
+            ]
+            for emp_id, emp_months in stored.items()
+        },
+    )
+
+
+def _month_end(month: date) -> date:
+    return month.replace(day=calendar.monthrange(month.year, month.month)[1])
+
+
+async def _materialize_days_status(
+    employees: t.Sequence[m.Employee], start: date, end: date, session: AsyncSession
+) -> dict[int, dict[date, str]]:
+    """
+    Calculate day statuses for whole months from ``start`` to ``end`` and store them.
+
+    The months are calculated and stored in a separate transaction holding shared locks
+    of the employees. If any of the employees is being changed by another transaction
+    (that may be the transaction of ``session``), the months are calculated with ``session``
+    and not stored.
+    """
+    employees_ids = sorted(emp.id for emp in employees)
+    async with AsyncSession(session.bind) as store_session:
+        locked = await store_session.scalar(
+            sa.text(
+                'SELECT bool_and(pg_try_advisory_xact_lock_shared(:ns, id)) '
+                'FROM unnest(CAST(:ids AS integer[])) AS id'
+            ).bindparams(
+                sa.bindparam('ns', m.DAY_STATUS_LOCK_NAMESPACE),
+                sa.bindparam('ids', employees_ids, type_=ARRAY(sa.Integer)),
+            )
+        )
+        if locked:
+            work_dates_raw = await store_session.execute(
+                sa.select(
+                    m.Employee.id, m.Employee.work_started, m.Employee.work_ended
+                ).where(m.Employee.id.in_(employees_ids))
+            )
+            work_dates = {
+                emp.id: (emp.work_started, emp.work_ended) for emp in employees
+            }
+            for row in work_dates_raw.all():
+                work_dates[row.id] = (row.work_started, row.work_ended)
+            months = _split_months(
+                await _calc_employees_days_status(
+                    work_dates, start, end, session=store_session
+                ),
+                start,
+            )
+            values = [
+                {'employee_id': emp_id, 'month': month, 'days': days}
+                for emp_id, emp_months in months.items()
+                for month, days in emp_months.items()
+            ]
+            if values:
+                await store_session.execute(
+                    insert(m.EmployeeDayStatusMonth)
+                    .values(values)
+                    .on_conflict_do_nothing()
+                )
+            await store_session.commit()
+            return months
+    work_dates = {emp.id: (emp.work_started, emp.work_ended) for emp in employees}
+    return _split_months(
+        await _calc_employees_days_status(work_dates, start, end, session=session),
+        start,
+    )
+
+
+def _split_months(
+    days: dict[int, list[m.DayType]], start: date
+) -> dict[int, dict[date, str]]:
+    results: dict[int, dict[date, str]] = {}
+    for emp_id, emp_days in days.items():
+        results[emp_id] = {}
+        day = start
+        while emp_days:
+            month_len = (_month_end(day) - day).days + 1
+            results[emp_id][day] = ''.join(
+                m.DAY_TYPE_CODES[d] for d in emp_days[:month_len]
+            )
+            emp_days = emp_days[month_len:]
+            day = _month_end(day) + timedelta(days=1)
+    return results
+
+
+async def _calc_employees_days_status(
+    work_dates: dict[int, tuple[date, date | None]],
+    start: date,
+    end: date,
+    session: AsyncSession,
+) -> dict[int, list[m.DayType]]:
+    employees_ids = set(work_dates)
     exclusions_raw = await session.scalars(
         sa.select(m.EmployeeScheduleExclusion).where(
             m.EmployeeScheduleExclusion.employee_id.in_(employees_ids),
@@ -171,15 +372,16 @@ async def get_employees_days_status(
             )
         )
 
-    def get_day_type(u: m.Employee, d: date) -> m.DayType:
+    def get_day_type(emp_id: int, d: date) -> m.DayType:
         # pylint: disable=too-many-return-statements
-        if d < u.work_started:
+        work_started, work_ended = work_dates[emp_id]
+        if d < work_started:
             return m.DayType.BEFORE_EMPLOYMENT
-        if u.work_ended and d > u.work_ended:
+        if work_ended and d > work_ended:
             return m.DayType.AFTER_DISMISSAL
-        if d in exclusions[u.id]:
-            return exclusions[u.id][d]
-        for sch, hol in schedules[u.id]:
+        if d in exclusions[emp_id]:
+            return exclusions[emp_id][d]
+        for sch, hol in schedules[emp_id]:
             if sch.start > d:
                 continue
             if sch.end and sch.end < d:
@@ -191,7 +393,5 @@ async def get_employees_days_status(
             return m.DayType.WEEKEND
         return m.DayType.WORKING_DAY
 
-    return {
-        emp.id: {d: get_day_type(emp, d) for d in date_range(start, end)}
-        for emp in employees
-    }
+    days = list(date_range(start, end))
+    return {emp_id: [get_day_type(emp_id, d) for d in days] for emp_id in employees_ids}
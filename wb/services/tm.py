@@ -1,21 +1,34 @@
 from dataclasses import dataclass
 from datetime import date, datetime, timedelta
-from typing import Any
+from typing import Any, NamedTuple, Sequence
 
 import sqlalchemy as sa
+from sqlalchemy.dialects.postgresql import ARRAY
+from sqlalchemy.dialects.postgresql import insert as pg_insert
 from sqlalchemy.exc import IntegrityError
 from sqlalchemy.ext.asyncio import AsyncSession
 
 import wb.models as m
 from shared_utils.dateutils import date_range, day_start
 from wb.tasks.send import task_send_presence_bot_message
-from wb.utils.cache import flush_cache, lru_cache
+from wb.utils.cache import flush_cache, flush_cache_many, lru_cache, lru_cache_many
+from wb.utils.push import PushEvent, PushEventType, publish_events
 
 __all__ = (
     'calc_presence',
     'PresenceItem',
+    'TMDayRecord',
+    'TMDaySummary',
+    'close_tm_days',
+    'get_employees_tm_days',
+    'get_employees_tm_day_summaries',
     'get_employee_tm_current_status',
+    'get_employees_tm_current_status',
     'set_employee_tm_current_status',
+    'add_employees_tm_records',
+    'get_team_tm_current_status',
+    'get_employee_tm_manual_status',
+    'check_tm_current',
 )
 
 
@@ -28,7 +41,105 @@ class PresenceItem:
     away: timedelta
 
 
-def _calc_away_awake(recs: list[m.TMRecord]) -> tuple[timedelta, timedelta]:
+class TMDayRecord(NamedTuple):
+    status: m.TMRecordType
+    time: datetime
+
+
+# 6 bind parameters per row, asyncpg allows 32767 per statement
+TM_PRESENCE_INSERT_CHUNK_SIZE = 5000
+
+
+def close_tm_days(
+    days: dict[date, list[TMDayRecord]], today: date | None = None
+) -> dict[date, list[TMDayRecord]]:
+    """
+    Close the days of an employee left without leave, in place.
+
+    A past day ending with AWAY gets LEAVE at the next midnight, a past day ending with
+    COME or AWAKE also gets LEAVE at the next midnight and the next day starts with COME.
+    Days before ``today`` are closed, the current and future days are left open.
+
+    :param days: TM records of an employee by consecutive days, sorted by time.
+    :type days: dict[date, list[TMDayRecord]]
+    :param today: The current day, ``date.today()`` by default.
+    :type today: date | None
+    :return: The same ``days`` dictionary.
+    :rtype: dict[date, list[TMDayRecord]]
+    """
+    today = today or date.today()
+    transfer_come = False
+    for day, recs in days.items():
+        if transfer_come:
+            recs.insert(0, TMDayRecord(m.TMRecordType.COME, day_start(day)))
+            transfer_come = False
+        if not recs or day >= today:
+            continue
+        last_status = recs[-1].status
+        if last_status == m.TMRecordType.LEAVE:
+            continue
+        recs.append(
+            TMDayRecord(m.TMRecordType.LEAVE, day_start(day + timedelta(days=1)))
+        )
+        transfer_come = last_status in (m.TMRecordType.AWAKE, m.TMRecordType.COME)
+    return days
+
+
+async def _get_employees_tm_records(
+    employees_ids: Sequence[int], start: date, end: date, session: AsyncSession
+) -> dict[int, dict[date, list[TMDayRecord]]]:
+    days = list(date_range(start, end))
+    results: dict[int, dict[date, list[TMDayRecord]]] = {
+        emp_id: {day: [] for day in days} for emp_id in employees_ids
+    }
+    rows = await session.execute(
+        sa.select(m.TMRecord.employee_id, m.TMRecord.status, m.TMRecord.time)
+        .where(
+            m.TMRecord.employee_id.in_(results),
+            m.TMRecord.time >= day_start(start),
+            m.TMRecord.time < day_start(end + timedelta(days=1)),
+        )
+        .order_by(m.TMRecord.employee_id, m.TMRecord.time)
+    )
+    for emp_id, status, time in rows.all():
+        results[emp_id][time.date()].append(TMDayRecord(status, time))
+    return results
+
+
+async def get_employees_tm_days(
+    employees_ids: Sequence[int],
+    start: date,
+    end: date,
+    session: AsyncSession,
+    today: date | None = None,
+) -> dict[int, dict[date, list[TMDayRecord]]]:
+    """
+    Retrieve TM records of employees by day with the days closed by ``close_tm_days``.
+
+    Only the status and the time of records are selected, in one ordered query.
+
+    :param employees_ids: Ids of the employees.
+    :type employees_ids: Sequence[int]
+    :param start: The start date of the date range.
+    :type start: date
+    :param end: The end date of the date range.
+    :type end: date
+    :param session: The AsyncSession object for database operations.
+    :type session: AsyncSession
+    :param today: The current day, ``date.today()`` by default.
+    :type today: date | None
+    :return: A dictionary mapping employee IDs to the dictionary of the employee records by day.
+    :rtype: dict[int, dict[date, list[TMDayRecord]]]
+    """
+    results = await _get_employees_tm_records(
+        employees_ids, start, end, session=session
+    )
+    for emp_days in results.values():
+        close_tm_days(emp_days, today)
+    return results
+
+
+def _calc_away_awake(recs: Sequence[TMDayRecord]) -> tuple[timedelta, timedelta]:
     total = recs[-1].time - recs[0].time
     day_away = timedelta(0)
     t_away = None
@@ -47,88 +158,228 @@ def _calc_away_awake(recs: list[m.TMRecord]) -> tuple[timedelta, timedelta]:
     return day_away, total - day_away
 
 
-async def calc_presence(
-    users: list[m.Employee], start: date, end: date, session: AsyncSession
-) -> list[dict[date, PresenceItem]]:
-    # pylint: disable=too-many-locals
-    tm_data_raw = await session.scalars(
-        sa.select(m.TMRecord)
-        .filter(
-            m.TMRecord.employee_id.in_([u.id for u in users]),
-            m.TMRecord.time >= day_start(start),
-            m.TMRecord.time < day_start(end + timedelta(days=1)),
+@dataclass(frozen=True)
+class TMDaySummary:
+    """
+    Presence of an employee for a day.
+
+    :param first: time of the first record
+    :param last: time of the last record, or of the leave closing a past day
+    :param away: time away between the first and the last records
+    :param last_status: status of the last record, before the day is closed
+    """
+
+    first: datetime
+    last: datetime
+    away: timedelta
+    last_status: m.TMRecordType
+
+    @property
+    def carries_over(self) -> bool:
+        """
+        Whether the employee is still present at the end of the (past) day.
+        """
+        return self.last_status in (m.TMRecordType.COME, m.TMRecordType.AWAKE)
+
+
+def _summarize_tm_day(
+    recs: Sequence[TMDayRecord], closed_day: date | None = None
+) -> TMDaySummary | None:
+    """
+    :param closed_day: close the day with leave at the next midnight as ``close_tm_days``
+    """
+    if not recs:
+        return None
+    last_status = recs[-1].status
+    if closed_day and last_status != m.TMRecordType.LEAVE:
+        recs = [
+            *recs,
+            TMDayRecord(
+                m.TMRecordType.LEAVE, day_start(closed_day + timedelta(days=1))
+            ),
+        ]
+    away, _ = _calc_away_awake(recs)
+    return TMDaySummary(
+        first=recs[0].time, last=recs[-1].time, away=away, last_status=last_status
+    )
+
+
+async def _calc_tm_presence_days(
+    employees_ids: Sequence[int], start: date, end: date, session: AsyncSession
+) -> dict[int, dict[date, TMDaySummary | None]]:
+    records = await _get_employees_tm_records(
+        employees_ids, start, end, session=session
+    )
+    return {
+        emp_id: {day: _summarize_tm_day(recs, day) for day, recs in emp_days.items()}
+        for emp_id, emp_days in records.items()
+    }
+
+
+async def _materialize_tm_presence_days(
+    employees_ids: Sequence[int], start: date, end: date, session: AsyncSession
+) -> dict[int, dict[date, TMDaySummary | None]]:
+    """
+    Calculate the presence summaries of closed days from ``start`` to ``end`` and store
+    them.
+
+    The summaries are calculated and stored in a separate transaction holding shared
+    locks of the employees. If the records of any of the employees are being changed by
+    another transaction (that may be the transaction of ``session``), the summaries are
+    calculated with ``session`` and not stored.
+    """
+    employees_ids = sorted(employees_ids)
+    async with AsyncSession(session.bind) as store_session:
+        locked = await store_session.scalar(
+            sa.text(
+                'SELECT bool_and(pg_try_advisory_xact_lock_shared(:ns, id)) '
+                'FROM unnest(CAST(:ids AS integer[])) AS id'
+            ).bindparams(
+                sa.bindparam('ns', m.TM_PRESENCE_LOCK_NAMESPACE),
+                sa.bindparam('ids', employees_ids, type_=ARRAY(sa.Integer)),
+            )
+        )
+        if locked:
+            summaries = await _calc_tm_presence_days(
+                employees_ids, start, end, session=store_session
+            )
+            values = [
+                {
+                    'employee_id': emp_id,
+                    'day': day,
+                    'first_time': summary.first if summary else None,
+                    'last_time': summary.last if summary else None,
+                    'last_status': summary.last_status if summary else None,
+                    'away': summary.away if summary else timedelta(0),
+                }
+                for emp_id, emp_days in summaries.items()
+                for day, summary in emp_days.items()
+            ]
+            for idx in range(0, len(values), TM_PRESENCE_INSERT_CHUNK_SIZE):
+                await store_session.execute(
+                    pg_insert(m.EmployeeTMPresenceDay)
+                    .values(values[idx : idx + TM_PRESENCE_INSERT_CHUNK_SIZE])
+                    .on_conflict_do_nothing()
+                )
+            await store_session.commit()
+            return summaries
+    return await _calc_tm_presence_days(employees_ids, start, end, session=session)
+
+
+async def _get_closed_tm_presence_days(
+    employees_ids: Sequence[int], start: date, end: date, session: AsyncSession
+) -> dict[int, dict[date, TMDaySummary | None]]:
+    stored_raw = await session.execute(
+        sa.select(
+            m.EmployeeTMPresenceDay.employee_id,
+            m.EmployeeTMPresenceDay.day,
+            m.EmployeeTMPresenceDay.first_time,
+            m.EmployeeTMPresenceDay.last_time,
+            m.EmployeeTMPresenceDay.away,
+            m.EmployeeTMPresenceDay.last_status,
+        ).where(
+            m.EmployeeTMPresenceDay.employee_id.in_(employees_ids),
+            m.EmployeeTMPresenceDay.day.between(start, end),
         )
-        .order_by(m.TMRecord.employee_id, m.TMRecord.time)
     )
-    tm_data: dict[int, dict[date, list[m.TMRecord]]] = {
-        u.id: {d: [] for d in date_range(start, end)} for u in users
+    stored: dict[int, dict[date, TMDaySummary | None]] = {
+        emp_id: {} for emp_id in employees_ids
     }
-    for tm_rec in tm_data_raw.all():
-        tm_data[tm_rec.employee_id][tm_rec.time.date()].append(tm_rec)
-    cur_date = date.today()
-    for user in users:
-        transfer_come = False
+    for row in stored_raw.all():
+        stored[row.employee_id][row.day] = (
+            TMDaySummary(row.first_time, row.last_time, row.away, row.last_status)
+            if row.first_time
+            else None
+        )
+    days_count = (end - start).days + 1
+    not_stored = [
+        emp_id for emp_id, emp_days in stored.items() if len(emp_days) < days_count
+    ]
+    if not_stored:
+        stored.update(
+            await _materialize_tm_presence_days(not_stored, start, end, session=session)
+        )
+    return stored
+
+
+async def get_employees_tm_day_summaries(
+    employees_ids: Sequence[int],
+    start: date,
+    end: date,
+    session: AsyncSession,
+    today: date | None = None,
+) -> dict[int, dict[date, TMDaySummary | None]]:
+    """
+    Presence summaries of employees by day, the same as of the days returned by
+    ``get_employees_tm_days``.
+
+    Summaries of the days before ``today`` are stored in ``EmployeeTMPresenceDay``
+    and calculated from the records only when they are missing, the current and future
+    days are calculated from the records.
+
+    :return: summaries by day by employee id, ``None`` for days without presence
+    """
+    today = today or date.today()
+    closed: dict[int, dict[date, TMDaySummary | None]] = {}
+    if start < today:
+        closed = await _get_closed_tm_presence_days(
+            employees_ids, start, min(end, today - timedelta(days=1)), session=session
+        )
+    live: dict[int, dict[date, list[TMDayRecord]]] = {}
+    if end >= today:
+        live = await _get_employees_tm_records(
+            employees_ids, max(start, today), end, session=session
+        )
+    results: dict[int, dict[date, TMDaySummary | None]] = {}
+    for emp_id in employees_ids:
+        results[emp_id] = {}
+        carry_over = False
         for day in date_range(start, end):
-            recs = tm_data[user.id][day]
-            is_current_or_future = day >= cur_date
-            if transfer_come:
-                recs.insert(
-                    0,
-                    m.TMRecord(
-                        employee_id=user.id,
-                        status=m.TMRecordType.COME,
-                        time=day_start(day),
-                    ),
-                )
-                transfer_come = False
-            if not recs:
-                continue
-            last = recs[-1]
-            next_day_start = day_start(day + timedelta(days=1))
-            if not is_current_or_future and last.status == m.TMRecordType.AWAY:
-                recs.append(
-                    m.TMRecord(
-                        employee_id=user.id,
-                        status=m.TMRecordType.LEAVE,
-                        time=next_day_start,
-                    )
-                )
-            elif not is_current_or_future and last.status in (
-                m.TMRecordType.AWAKE,
-                m.TMRecordType.COME,
-            ):
-                recs.append(
-                    m.TMRecord(
-                        employee_id=user.id,
-                        status=m.TMRecordType.LEAVE,
-                        time=next_day_start,
+            if day < today:
+                summary = closed[emp_id][day]
+                if carry_over:
+                    summary = TMDaySummary(
+                        first=day_start(day),
+                        last=summary.last
+                        if summary
+                        else day_start(day + timedelta(days=1)),
+                        away=summary.away if summary else timedelta(0),
+                        last_status=summary.last_status
+                        if summary
+                        else m.TMRecordType.COME,
                     )
-                )
-                transfer_come = True
+                carry_over = summary is not None and summary.carries_over
+            else:
+                recs = live[emp_id][day]
+                if carry_over:
+                    recs.insert(0, TMDayRecord(m.TMRecordType.COME, day_start(day)))
+                    carry_over = False
+                summary = _summarize_tm_day(recs)
+            results[emp_id][day] = summary
+    return results
 
+
+async def calc_presence(
+    users: list[m.Employee], start: date, end: date, session: AsyncSession
+) -> list[dict[date, PresenceItem]]:
+    cur_date = date.today()
+    summaries = await get_employees_tm_day_summaries(
+        [u.id for u in users], start, end, session=session, today=cur_date
+    )
     results: list[dict[date, PresenceItem]] = []
     for user in users:
         result: dict[date, PresenceItem] = {}
-        for day in date_range(start, end):
-            if tm_data[user.id][day]:
-                come = tm_data[user.id][day][0].time.strftime('%H:%M')
-                leave = tm_data[user.id][day][-1].time.strftime('%H:%M')
-                if (
-                    day == cur_date
-                    and tm_data[user.id][day][-1].status != m.TMRecordType.LEAVE
-                ):
-                    tm_data[user.id][day].append(
-                        m.TMRecord(
-                            employee_id=user.id,
-                            status=m.TMRecordType.LEAVE,
-                            time=datetime.utcnow(),
-                        )
-                    )
+        for day, summary in summaries[user.id].items():
+            if summary:
+                come = summary.first.strftime('%H:%M')
+                leave = summary.last.strftime('%H:%M')
+                last = summary.last
+                if day == cur_date and summary.last_status != m.TMRecordType.LEAVE:
+                    last = datetime.utcnow()
                     leave = '---'
-                total_day = (
-                    tm_data[user.id][day][-1].time - tm_data[user.id][day][0].time
-                )
-                away, awake = _calc_away_awake(tm_data[user.id][day])
+                total_day = last - summary.first
+                away = summary.away
+                awake = total_day - away
             else:
                 come = leave = ''
                 total_day = away = awake = timedelta(0)
@@ -143,79 +394,210 @@ async def calc_presence(
     return results
 
 
+# 4 bind parameters per row, asyncpg allows 32767 per statement
+TM_RECORDS_INSERT_CHUNK_SIZE = 5000
+
+
+def _tm_current_status_key(employee_id: int) -> str:
+    return f'tm-current-status-{employee_id}'
+
+
 def _cache_key_builder_tm_current_status(
     _: Any, emp: m.Employee, *__: Any, **___: Any
 ) -> str:
-    return f'tm-current-status-{emp.id}'
+    return _tm_current_status_key(emp.id)
+
 
+def _make_tm_status_event(
+    employee_id: int, status: m.TMRecordType, time: datetime
+) -> PushEvent:
+    return PushEvent(
+        PushEventType.TM_STATUS,
+        {'employee_id': employee_id, 'status': status.value, 'time': time.isoformat()},
+    )
 
-@lru_cache(ttl=2 * 60, key_builder=_cache_key_builder_tm_current_status)
+
+@lru_cache(
+    ttl=2 * 60,
+    key_builder=_cache_key_builder_tm_current_status,
+    local_ttl=10,
+    namespace='tm-current-status',
+    lock_ttl=10,
+    stale_ttl=30,
+    early_refresh_beta=1.0,
+)
 async def get_employee_tm_current_status(
     emp: m.Employee, session: AsyncSession
 ) -> tuple[m.TMRecordType, datetime | None]:
-    last_log: m.TMRecord | None = await session.scalar(
-        sa.select(m.TMRecord)
-        .where(m.TMRecord.employee_id == emp.id)
-        .order_by(m.TMRecord.time.desc())
-        .limit(1)
+    current = (
+        await session.execute(
+            sa.select(m.EmployeeTMCurrent.status, m.EmployeeTMCurrent.time).where(
+                m.EmployeeTMCurrent.employee_id == emp.id
+            )
+        )
+    ).one_or_none()
+    if not current:
+        return m.TMRecordType.LEAVE, None
+    return current.status, current.time
+
+
+@lru_cache_many(get_employee_tm_current_status)
+async def get_employees_tm_current_status(
+    args_list: Sequence[tuple[m.Employee]], session: AsyncSession
+) -> list[tuple[m.TMRecordType, datetime | None]]:
+    statuses = await _get_tm_current_statuses(
+        m.EmployeeTMCurrent.employee_id.in_([emp.id for emp, *_ in args_list]),
+        session=session,
     )
-    if not last_log:
+    return [statuses.get(emp.id, (m.TMRecordType.LEAVE, None)) for emp, *_ in args_list]
+
+
+async def _get_tm_current_statuses(
+    flt: Any, session: AsyncSession
+) -> dict[int, tuple[m.TMRecordType, datetime | None]]:
+    rows = await session.execute(
+        sa.select(
+            m.EmployeeTMCurrent.employee_id,
+            m.EmployeeTMCurrent.status,
+            m.EmployeeTMCurrent.time,
+        ).where(flt)
+    )
+    return {row.employee_id: (row.status, row.time) for row in rows}
+
+
+async def get_team_tm_current_status(
+    team_id: int, session: AsyncSession
+) -> dict[int, tuple[m.TMRecordType, datetime | None]]:
+    """
+    Current statuses of the active members of the team by employee id, read from
+    the cache of ``get_employee_tm_current_status`` in one batch.
+    """
+    members = await session.scalars(
+        sa.select(m.Employee)
+        .where(m.Employee.team_id == team_id, m.Employee.active.is_(True))
+        .order_by(m.Employee.id)
+    )
+    members_list = members.all()
+    statuses = await get_employees_tm_current_status(
+        [(emp,) for emp in members_list], session=session
+    )
+    return {emp.id: status for emp, status in zip(members_list, statuses)}
+
+
+async def get_employee_tm_manual_status(
+    emp: m.Employee, session: AsyncSession
+) -> tuple[m.TMRecordType, datetime | None]:
+    """
+    The last come or leave status set not automatically.
+    """
+    current = (
+        await session.execute(
+            sa.select(
+                m.EmployeeTMCurrent.manual_status, m.EmployeeTMCurrent.manual_time
+            ).where(m.EmployeeTMCurrent.employee_id == emp.id)
+        )
+    ).one_or_none()
+    if not current or not current.manual_status:
         return m.TMRecordType.LEAVE, None
-    return last_log.status, last_log.time
+    return current.manual_status, current.manual_time
 
 
-@flush_cache(key_builder=_cache_key_builder_tm_current_status)
-async def set_employee_tm_current_status(
-    emp: m.Employee,
+def _make_tm_status_records(
+    employee_id: int,
+    curr_status: m.TMRecordType,
+    curr_status_time: datetime | None,
     status: m.TMRecordType,
     source: str | None,
-    session: AsyncSession,
-    at: datetime | None = None,
-    silent: bool = False,
-) -> tuple[m.TMRecordType, datetime | None, bool]:
-    # pylint: disable=too-many-branches
-    now = at or datetime.utcnow()
-    curr_status, curr_status_time = await get_employee_tm_current_status(
-        emp, session=session
-    )
-    records_to_add = []
+    now: datetime,
+) -> list[m.TMRecord]:
+    """
+    Records moving the employee from the current status to ``status``, none if the
+    transition is not allowed.
+    """
+    records: list[m.TMRecord] = []
     if curr_status_time and curr_status_time > now:
-        return curr_status, curr_status_time, False
+        return records
     if curr_status == m.TMRecordType.AWAY:
         if status not in (m.TMRecordType.LEAVE, m.TMRecordType.AWAKE):
-            return curr_status, curr_status_time, False
+            return records
     elif curr_status in (m.TMRecordType.AWAKE, m.TMRecordType.COME):
         if status not in (m.TMRecordType.LEAVE, m.TMRecordType.AWAY):
-            return curr_status, curr_status_time, False
+            return records
     elif curr_status == m.TMRecordType.LEAVE:
         if status in (m.TMRecordType.AWAY, m.TMRecordType.AWAKE):
-            return curr_status, curr_status_time, False
+            return records
         if status == m.TMRecordType.LEAVE and (
             not curr_status_time or curr_status_time < now - timedelta(seconds=1)
         ):
-            records_to_add.append(
+            records.append(
                 m.TMRecord(
-                    employee_id=emp.id,
+                    employee_id=employee_id,
                     status=m.TMRecordType.COME,
                     time=now - timedelta(seconds=1),
                     source=source,
                 )
             )
-    records_to_add.append(
+    records.append(
         m.TMRecord(
-            employee_id=emp.id,
+            employee_id=employee_id,
             status=status,
             time=now,
             source=source,
         )
     )
+    return records
+
+
+@flush_cache(key_builder=_cache_key_builder_tm_current_status)
+async def set_employee_tm_current_status(
+    emp: m.Employee,
+    status: m.TMRecordType,
+    source: str | None,
+    session: AsyncSession,
+    at: datetime | None = None,
+    silent: bool = False,
+) -> tuple[m.TMRecordType, datetime | None, bool]:
+    """
+    Move the employee to the status, the transition is checked against the current
+    status row locked with ``FOR UPDATE``, so concurrent changes are serialized.
+
+    :return: the status, its time and whether it is changed
+    """
+    now = at or datetime.utcnow()
+    curr_status, curr_status_time = m.TMRecordType.LEAVE, None
     try:
         async with session.begin_nested():
-            for record in records_to_add:
-                session.add(record)
-            await session.commit()
+            current_row = (
+                await session.execute(
+                    sa.select(m.EmployeeTMCurrent.status, m.EmployeeTMCurrent.time)
+                    .where(m.EmployeeTMCurrent.employee_id == emp.id)
+                    .with_for_update()
+                )
+            ).one_or_none()
+            if current_row:
+                curr_status, curr_status_time = current_row.status, current_row.time
+            records_to_add = _make_tm_status_records(
+                emp.id, curr_status, curr_status_time, status, source, now
+            )
+            changed = []
+            if records_to_add:
+                session.add_all(records_to_add)
+                current = await session.execute(
+                    m.make_tm_current_upsert(records_to_add).returning(
+                        m.EmployeeTMCurrent.status, m.EmployeeTMCurrent.time
+                    )
+                )
+                changed = current.all()
+        await session.commit()
     except IntegrityError:
+        # the savepoint is rolled back, release the lock
+        await session.commit()
+        return curr_status, curr_status_time, False
+    if not records_to_add:
         return curr_status, curr_status_time, False
+    await publish_events(
+        [_make_tm_status_event(emp.id, row.status, row.time) for row in changed]
+    )
     if not silent:
         if status in (m.TMRecordType.COME, m.TMRecordType.LEAVE):
             action_str = (
@@ -232,3 +614,123 @@ async def set_employee_tm_current_status(
             for chat_id in emp.work_notifications_chats:
                 task_send_presence_bot_message.delay(chat_id, msg)
     return status, now, True
+
+
+@flush_cache_many(
+    key_builder=lambda _, employee_id, *__, **___: _tm_current_status_key(employee_id)
+)
+async def _flush_tm_current_status(_: Sequence[tuple[int]]) -> None:
+    pass
+
+
+@flush_cache_many(
+    key_builder=lambda _, employee_id, *__, **___: _tm_current_status_key(employee_id)
+)
+async def add_employees_tm_records(
+    args_list: Sequence[tuple[int, m.TMRecordType, datetime]],
+    source: str | None,
+    session: AsyncSession,
+) -> set[int]:
+    """
+    Add records to the logs of the employees with bulk inserts and a single commit,
+    the current statuses of the employees are updated and flushed from the cache,
+    the presence summaries of the days of the records are dropped.
+
+    Unlike ``set_employee_tm_current_status`` the transitions are not checked and no
+    notifications are sent, a record is skipped if the employee already has one at
+    the time.
+
+    :param args_list: ``(employee_id, status, time)`` of the records
+    :return: ids of the employees whose records are added
+    """
+    records: list[Any] = []
+    for idx in range(0, len(args_list), TM_RECORDS_INSERT_CHUNK_SIZE):
+        added = await session.execute(
+            pg_insert(m.TMRecord)
+            .values(
+                [
+                    {
+                        'employee_id': employee_id,
+                        'status': status,
+                        'time': time,
+                        'source': source,
+                    }
+                    for employee_id, status, time in args_list[
+                        idx : idx + TM_RECORDS_INSERT_CHUNK_SIZE
+                    ]
+                ]
+            )
+            .on_conflict_do_nothing()
+            .returning(
+                m.TMRecord.employee_id,
+                m.TMRecord.status,
+                m.TMRecord.time,
+                m.TMRecord.source,
+            )
+        )
+        records.extend(added.all())
+    changed = []
+    if upsert := m.make_tm_current_upsert(records):
+        current = await session.execute(
+            upsert.returning(
+                m.EmployeeTMCurrent.employee_id,
+                m.EmployeeTMCurrent.status,
+                m.EmployeeTMCurrent.time,
+            )
+        )
+        changed = current.all()
+    presence_days = [(rec.employee_id, rec.time.date()) for rec in records]
+    await session.run_sync(
+        lambda sync_session: m.invalidate_tm_presence(
+            sync_session.connection(), presence_days
+        )
+    )
+    await session.commit()
+    await publish_events(
+        [
+            _make_tm_status_event(row.employee_id, row.status, row.time)
+            for row in changed
+        ]
+    )
+    return {rec.employee_id for rec in records}
+
+
+async def check_tm_current(session: AsyncSession, fix: bool = False) -> list[int]:
+    """
+    Compare the current statuses with the last records of every employee.
+
+    :param fix: rebuild the mismatching statuses from the records and commit
+    :return: ids of the employees whose current statuses mismatch
+    """
+    expected = m.make_tm_current_query().subquery('expected')
+    current = m.EmployeeTMCurrent
+    rows = await session.scalars(
+        sa.select(sa.func.coalesce(expected.c.employee_id, current.employee_id))
+        .select_from(expected)
+        .join(
+            current,
+            current.employee_id == expected.c.employee_id,
+            full=True,
+        )
+        .where(
+            sa.or_(
+                expected.c.employee_id.is_(None),
+                current.employee_id.is_(None),
+                expected.c.status.is_distinct_from(current.status),
+                expected.c.time.is_distinct_from(current.time),
+                expected.c.manual_status.is_distinct_from(current.manual_status),
+                expected.c.manual_time.is_distinct_from(current.manual_time),
+            )
+        )
+    )
+    mismatched = list(rows.all())
+    if fix and mismatched:
+        await session.execute(
+            sa.delete(m.EmployeeTMCurrent).where(
+                m.EmployeeTMCurrent.employee_id.in_(mismatched)
+            )
+        )
+        await session.execute(m.make_tm_current_rebuild(mismatched))
+        await session.commit()
+        await _flush_tm_current_status([(emp_id,) for emp_id in mismatched])
+    return mismatched
@@ -1,13 +1,20 @@
-import io
 import json
-import mimetypes
-import uuid
-from http.client import HTTPResponse
-from typing import Any, Callable, Generator, Iterable, cast
-from urllib.error import HTTPError
+from contextlib import asynccontextmanager
+from typing import (
+    Any,
+    AsyncGenerator,
+    AsyncIterator,
+    Awaitable,
+    Callable,
+    Iterable,
+    cast,
+)
 from urllib.parse import urlencode
-from urllib.request import Request, build_opener
 
+import aiohttp
+
+from wb.config import CONFIG
+from wb.log import log
 from wb.services.youtrack.types import (
     CommandLimitedVisibilityT,
     CustomFieldListT,
@@ -15,6 +22,7 @@ from wb.services.youtrack.types import (
     JsonT,
     ParsedCustomFieldT,
 )
+from wb.utils.http_client import HTTPClient
 
 HeadersLikeT = dict[str, str]
 
@@ -35,6 +43,12 @@ ISSUE_CAN_BE_SINGLE_OR_MULTI = {
     'VersionIssueCustomField': None,
 }
 
+youtrack_http_client = HTTPClient(
+    limit_per_host=CONFIG.HTTP_CLIENT_LIMIT_PER_HOST,
+    timeout=TIMEOUT,
+    retries=CONFIG.HTTP_CLIENT_RETRIES,
+)
+
 
 class ProcessorAbortException(Exception):
     cause: str
@@ -56,32 +70,61 @@ class YoutrackTooManyAccounts(YoutrackException):
     pass
 
 
-def base_request(
+class YoutrackHTTPError(YoutrackException):
+    code: int
+    body: bytes
+
+    def __init__(self, code: int, body: bytes) -> None:
+        self.code = code
+        self.body = body
+        super().__init__(f'YouTrack responded with status {code}')
+
+    @property
+    def error_description(self) -> str:
+        try:
+            return str(json.loads(self.body).get('error_description', ''))
+        except (ValueError, AttributeError):
+            return ''
+
+
+@asynccontextmanager
+async def stream_request(
     url: str,
     token: str,
     method: str = 'GET',
-    data: bytes | None = None,
+    data: Any = None,
     headers: HeadersLikeT | None = None,
     timeout: int = TIMEOUT,
-) -> HTTPResponse:
-    _headers = DEFAULT_HEADERS
-    if headers:
-        _headers = {**_headers, **headers}
+) -> AsyncIterator[aiohttp.ClientResponse]:
+    _headers = {**DEFAULT_HEADERS, **(headers or {})}
     _headers['Authorization'] = f'Bearer {token}'
-    opener = build_opener()
-    _data = None
-    if data:
-        _data = data
-    req = Request(url, _data, method=method, headers=_headers)
-    try:
-        res: HTTPResponse = opener.open(req, timeout=timeout)
-        return res
-    except HTTPError as e:  # pylint: disable=try-except-raise
-        print(e)
-        raise
-
-
-def json_request(
+    async with youtrack_http_client.request(
+        method,
+        url,
+        data=data,
+        headers=_headers,
+        timeout=aiohttp.ClientTimeout(total=timeout),
+    ) as response:
+        if response.status >= 400:
+            err = YoutrackHTTPError(response.status, await response.read())
+            log.warning(f'{method} {url}: {err}')
+            raise err
+        yield response
+
+
+async def base_request(
+    url: str,
+    token: str,
+    method: str = 'GET',
+    data: Any = None,
+    headers: HeadersLikeT | None = None,
+    timeout: int = TIMEOUT,
+) -> bytes:
+    async with stream_request(url, token, method, data, headers, timeout) as response:
+        return await response.read()
+
+
+async def json_request(
     url: str,
     token: str,
     method: str = 'GET',
@@ -97,61 +140,53 @@ def json_request(
     }
     if data is not None:
         data = json.dumps(data).encode()
-    response = base_request(url, token, method, data, headers, timeout)
-    return cast(dict, json.loads(response.read()))
+    response = await base_request(url, token, method, data, headers, timeout)
+    return cast(dict, json.loads(response))
 
 
-def load_generator(client: Callable, url: str, per_request: int = 0) -> Generator:
+async def load_generator(
+    client: Callable[[str], Awaitable[Any]], url: str, per_request: int = 0
+) -> AsyncGenerator:
     symbol = '?'
     if '?' in url:
         symbol = '&'
     cnt: int = 0
-    loaded = False
-
-    def load() -> JsonT:
-        nonlocal loaded
-        loaded = True
-        return cast(
-            JsonT, client(f'{url}{symbol}$skip={per_request * cnt}&$top={per_request}')
-        )
-
-    res = load()
-    while loaded:
-        loaded = False
+    while True:
+        res = await client(f'{url}{symbol}$skip={per_request * cnt}&$top={per_request}')
         cur: int = 0
-        for _, r in enumerate(res):
+        for r in res:
             cur += 1
             yield r
         if not cur or cur < per_request:
             break
         cnt += 1
-        res = load()
 
 
-def load_with_key_generator(
-    client: Callable, url: str, key: str, per_request: int = 0
-) -> Generator:
+async def load_with_key_generator(
+    client: Callable[[str], Awaitable[Any]], url: str, key: str, per_request: int = 0
+) -> AsyncGenerator:
     symbol = '?'
     if '?' in url:
         symbol = '&'
     cnt: int = 0
     cur: int = 0
 
-    def load() -> JsonT:
+    async def load() -> JsonT:
         return cast(
-            JsonT, client(f'{url}{symbol}$skip={per_request * cnt}&$top={per_request}')
+            JsonT,
+            await client(f'{url}{symbol}$skip={per_request * cnt}&$top={per_request}'),
         )
 
-    res = load()
+    res = await load()
     total = res.get('total', 0)
     while total:
-        for _, r in enumerate(res.get(key, [])):
+        for r in res.get(key, []):
             cur += 1
             yield r
         if not cur or cur >= total:
             break
         cnt += 1
-        res = load()
+        res = await load()
 
 
 def make_args(
@@ -277,68 +312,3 @@ def make_visibility(
         ],
         'permittedUsers': users,
     }
-
-
-class MultiPartForm:
-    form_fields: list[tuple[str, str]]
-    files: list[tuple[str, str, str, Any]]
-    boundary: bytes
-
-    def __init__(self) -> None:
-        self.form_fields = []
-        self.files = []
-        self.boundary = uuid.uuid4().hex.encode('utf-8')
-
-    def get_content_type(self) -> str:
-        return f'multipart/form-data; boundary={self.boundary.decode("utf-8")}'
-
-    def add_field(self, name: str, value: str) -> None:
-        self.form_fields.append((name, value))
-
-    def add_file(
-        self,
-        fieldname: str,
-        filename: str,
-        filehandle: Any,
-        mimetype: str | None = None,
-    ) -> None:
-        body = filehandle.read()
-        if mimetype is None:
-            mimetype = mimetypes.guess_type(filename)[0] or 'application/octet-stream'
-        self.files.append((fieldname, filename, mimetype, body))
-
-    @staticmethod
-    def _form_data(name: str) -> bytes:
-        return f'Content-Disposition: form-data; name="{name}"\r\n'.encode('utf-8')
-
-    @staticmethod
-    def _attached_file(name: str, filename: str) -> bytes:
-        return f'Content-Disposition: form-data; name="{name}"; filename="{filename}"\r\n'.encode(
-            'utf-8'
-        )
-
-    @staticmethod
-    def _content_type(content_type: str) -> bytes:
-        return f'Content-Type: {content_type}\r\n'.encode('utf-8')
-
-    def __bytes__(self) -> bytes:
-        buffer = io.BytesIO()
-        boundary = b'--' + self.boundary + b'\r\n'
-
-        for name, value in self.form_fields:
-            buffer.write(boundary)
-            buffer.write(self._form_data(name))
-            buffer.write(b'\r\n')
-            buffer.write(value.encode('utf-8'))
-            buffer.write(b'\r\n')
-
-        for f_name, filename, f_content_type, body in self.files:
-            buffer.write(boundary)
-            buffer.write(self._attached_file(f_name, filename))
-            buffer.write(self._content_type(f_content_type))
-            buffer.write(b'\r\n')
-            buffer.write(body)
-            buffer.write(b'\r\n')
-
-        buffer.write(b'--' + self.boundary + b'--\r\n')
-        return buffer.getvalue()
@@ -1,10 +1,10 @@
-import json
 import re
 import time
+from contextlib import asynccontextmanager
 from hashlib import md5
-from typing import Any, Generator, Pattern, cast
-from urllib.error import HTTPError
+from typing import Any, AsyncGenerator, AsyncIterator, Pattern, cast
 
+import aiohttp
 import sqlalchemy as sa
 from fastapi import UploadFile
 from sqlalchemy.ext.asyncio import AsyncSession
@@ -25,8 +25,8 @@ from .types import (
 from .utils import (
     NAME,
     TIMEOUT,
-    MultiPartForm,
     YoutrackException,
+    YoutrackHTTPError,
     YoutrackTooManyAccounts,
     YoutrackUserNotFound,
     base_request,
@@ -36,8 +36,11 @@ from .utils import (
     load_with_key_generator,
     make_args,
     make_fields,
+    stream_request,
 )
 
+ATTACHMENT_CHUNK_SIZE = 64 * 1024
+
 TAKE_ID_FIELD = '_take_id'
 
 
@@ -52,7 +55,7 @@ def generate_token_name() -> str:
 async def create_youtrack_access_token_by_login(
     processor: '_AdminYoutrackProcessor', session: AsyncSession, login: str
 ) -> m.YoutrackAccessToken:
-    name, token = processor.create_token_by_login(login)
+    name, token = await processor.create_token_by_login(login)
     new_token = m.YoutrackAccessToken(name=name, token=token)
     session.add(new_token)
     await session.commit()
@@ -85,12 +88,12 @@ async def get_token_from_user(
         if session.is_modified(account):
             await session.commit()
         return cast(str, new_token.token)
-    _user = processor.get_user_by_email(
+    _user = await processor.get_user_by_email(
         user.email, fields=['id', 'login', 'email', 'banned'], with_banned=True
     )
     if not _user:
         return None
-    name, token = processor.create_token(
+    name, token = await processor.create_token(
         _user['id'], generate_token_name(), fields=['name', 'token']
     )
     new_token_obj = m.YoutrackAccessToken(name=name, token=token)
@@ -136,11 +139,11 @@ class _AdminYoutrackProcessor:
         self.timeout = timeout
         self.youtrack_scope = youtrack_scope
 
-    def _request(
+    async def _request(
         self,
         url: str,
         method: str = 'GET',
-        data: bytes | None = None,
+        data: Any = None,
         timeout: int | None = None,
         json_: bool = True,
     ) -> 'bytes | JsonT':
@@ -148,88 +151,87 @@ class _AdminYoutrackProcessor:
             timeout = self.timeout
         _url = f'{self.base_url}{url}'
         if json_:
-            return json_request(
+            return await json_request(
                 _url, self.token, method=method, data=data, timeout=timeout
             )
-        res = base_request(_url, self.token, method=method, data=data, timeout=timeout)
-        return res.read()
+        return await base_request(
+            _url, self.token, method=method, data=data, timeout=timeout
+        )
 
-    def get(
+    async def get(
         self,
         url: str,
     ) -> dict:
-        return cast('JsonT', self._request(url, json_=True))
+        return cast('JsonT', await self._request(url, json_=True))
 
-    def get_all_with_key(
+    async def get_all_with_key(
         self, url: str, key: str, per_request: int = 100
     ) -> list['JsonT']:
-        return list(
-            load_with_key_generator(
-                lambda u: self.get(u),  # pylint: disable=unnecessary-lambda
-                url,
-                key=key,
-                per_request=per_request,
+        return [
+            obj
+            async for obj in load_with_key_generator(
+                self.get, url, key=key, per_request=per_request
             )
-        )
+        ]
 
     def get_generator(
         self, url: str, per_request: int = 100
-    ) -> Generator[dict, None, None]:
-        return load_generator(
-            lambda u: self.get(u),  # pylint: disable=unnecessary-lambda
-            url,
-            per_request=per_request,
-        )
+    ) -> AsyncGenerator[dict, None]:
+        return load_generator(self.get, url, per_request=per_request)
 
-    def post(self, url: str, data: Any = None) -> dict:
-        return cast(dict, self._request(url, method='POST', data=data, json_=True))
+    async def post(self, url: str, data: Any = None) -> dict:
+        return cast(
+            dict, await self._request(url, method='POST', data=data, json_=True)
+        )
 
-    def put(self, url: str, data: Any = None) -> dict:
-        return cast(dict, self._request(url, method='PUT', data=data, json_=True))
+    async def put(self, url: str, data: Any = None) -> dict:
+        return cast(dict, await self._request(url, method='PUT', data=data, json_=True))
 
-    def delete(self, url: str, data: Any = None) -> dict:
-        return cast(dict, self._request(url, method='DELETE', data=data, json_=True))
+    async def delete(self, url: str, data: Any = None) -> dict:
+        return cast(
+            dict, await self._request(url, method='DELETE', data=data, json_=True)
+        )
 
-    def get_users(
+    async def get_users(
         self, query: str | None = None, fields: FieldsT | None = None
     ) -> list['JsonT']:
         url = '/hub/api/rest/users'
-        return self.get_all_with_key(build_url(url, query, fields), 'users')
+        return await self.get_all_with_key(build_url(url, query, fields), 'users')
 
-    def get_user_by_login(
+    async def get_user_by_login(
         self, login: str, with_banned: bool = False, fields: FieldsT | None = None
     ) -> JsonT:
         query = f'( login: {{{login}}} or authName: {{{login}}} or authLogin: {{{login}}} ) and not type: Reporter'
         if with_banned:
             query += ' and not is: banned'
-        res = self.get_users(query, fields)
+        res = await self.get_users(query, fields)
         if len(res) == 0:
             raise YoutrackUserNotFound('YouTrack user not found')
         if len(res) > 1:
             raise YoutrackTooManyAccounts('Too many YouTrack accounts')
         return res[0]
 
-    def get_user_by_email(
+    async def get_user_by_email(
         self, email: str, with_banned: bool = False, fields: FieldsT | None = None
     ) -> JsonT:
         query = f'( authEmail: {email} or email: {email} ) and not type: Reporter'
         if with_banned:
             query += ' and not is: banned'
-        res = self.get_users(query, fields)
+        res = await self.get_users(query, fields)
         if len(res) == 0:
             raise YoutrackUserNotFound('YouTrack user not found')
         if len(res) > 1:
             raise YoutrackTooManyAccounts('Too many YouTrack accounts')
         return res[0]
 
-    def create_token(
+    async def create_token(
         self, user_id: str, name: str, fields: FieldsT | None = None
     ) -> tuple[str, str]:
         url = f'/hub/api/rest/users/{user_id}/permanenttokens'
         args = make_args(fields=fields)
         if args:
             url += f'?{args}'
-        result = self.post(
+        result = await self.post(
             url,
             {
                 'name': name,
@@ -241,15 +243,17 @@ class _AdminYoutrackProcessor:
         except KeyError as e:
             raise YoutrackException('Token response invalid') from e
 
-    def create_token_by_login(self, login: str) -> tuple[str, str]:
-        user = self.get_user_by_login(login, fields=['id', 'banned'], with_banned=True)
+    async def create_token_by_login(self, login: str) -> tuple[str, str]:
+        user = await self.get_user_by_login(
+            login, fields=['id', 'banned'], with_banned=True
+        )
         if user.get('banned', True):
             raise YoutrackException('YouTrack user is banned')
-        return self.create_token(
+        return await self.create_token(
             user['id'], name=generate_token_name(), fields=['name', 'token']
         )
 
-    def get_project_by_short_name(
+    async def get_project_by_short_name(
         self, name: str, fields: FieldsT | None = None
     ) -> dict | None:
         url = '/api/admin/projects'
@@ -258,31 +262,31 @@ class _AdminYoutrackProcessor:
             _fields = list(fields)
         if 'shortName' not in _fields:
             _fields += ['shortName', 'id', 'name']
-        for project in self.get_generator(build_url(url, fields=_fields)):
+        async for project in self.get_generator(build_url(url, fields=_fields)):
             if project['shortName'] == name:
                 return project
         return None
 
-    def get_project_fields(
+    async def get_project_fields(
         self, project_id: str, fields: FieldsT | None = None
     ) -> list[dict]:
         url = f'/api/admin/projects/{project_id}/fields'
-        return list(self.get_generator(build_url(url, fields=fields)))
+        return [obj async for obj in self.get_generator(build_url(url, fields=fields))]
 
-    def get_project_custom_fields(
+    async def get_project_custom_fields(
         self, project_id: str, fields: FieldsT | None = None
     ) -> list[dict]:
         url = f'/api/admin/projects/{project_id}/customFields'
-        return list(self.get_generator(build_url(url, fields=fields)))
+        return [obj async for obj in self.get_generator(build_url(url, fields=fields))]
 
     def list_issue(
         self,
         query: str | None = None,
         fields: FieldsT | None = None,
-    ) -> list['IssueT']:
+    ) -> AsyncGenerator['IssueT', None]:
         url = '/api/issues'
         return cast(
-            list['IssueT'],
+            AsyncGenerator['IssueT', None],
             self.get_generator(build_url(url, query=query, fields=fields)),
         )
 
@@ -315,29 +319,33 @@ class YoutrackProcessor:  # pylint: disable=too-many-public-methods
         except KeyError as e:
             raise YoutrackException(f'token must be provided for plugin {NAME}') from e
 
+    async def _get_token(self, user: 'm.Employee') -> str:
+        token = await get_token_from_user(self.__admin, self.session, user)
+        if not token:
+            raise YoutrackException(  # pylint: disable=broad-exception-raised
+                'Please ask system administrators to set youtrack token manually',
+                'token is None',
+            )
+        return token
+
     async def _request(
         self,
         user: 'm.Employee',
         url: str,
         method: str = 'GET',
-        data: bytes | None = None,
+        data: Any = None,
         timeout: int | None = None,
         json_: bool = True,
         headers: Any = None,
         attempt: int = 0,
     ) -> 'bytes | JsonT':
-        token = await get_token_from_user(self.__admin, self.session, user)
-        if not token:
-            raise YoutrackException(  # pylint: disable=broad-exception-raised
-                'Please ask system administrators to set youtrack token manually',
-                'token is None',
-            )
+        token = await self._get_token(user)
         if timeout is None:
             timeout = self.timeout
         _url = f'{self.base_url}{url}'
         try:
             if json_:
-                return json_request(
+                return await json_request(
                     _url,
                     token,
                     method=method,
@@ -345,7 +353,7 @@ class YoutrackProcessor:  # pylint: disable=too-many-public-methods
                     timeout=timeout,
                     headers=headers,
                 )
-            res = base_request(
+            return await base_request(
                 _url,
                 token,
                 method=method,
@@ -353,16 +361,11 @@ class YoutrackProcessor:  # pylint: disable=too-many-public-methods
                 timeout=timeout,
                 headers=headers,
             )
-            return res.read()
-        except HTTPError as e:
+        except YoutrackHTTPError as e:
             if e.code == 400:
-                raise YoutrackException(
-                    json.load(e.fp).get('error_description', '')
-                ) from e
+                raise YoutrackException(e.error_description) from e
             if e.code == 403:
-                raise YoutrackException(
-                    json.load(e.fp).get('error_description', '')
-                ) from e
+                raise YoutrackException(e.error_description) from e
             if e.code == 401:
                 if attempt == 0:
                     await drop_user_token(user, self.session)
@@ -474,7 +477,7 @@ class YoutrackProcessor:  # pylint: disable=too-many-public-methods
     ) -> 'IssueT':
         url = '/api/issues'
         field_to_load = ('field(name,fieldType(id),isUpdateable)',)
-        project = self.__admin.get_project_by_short_name(
+        project = await self.__admin.get_project_by_short_name(
             project_short_name, fields=['id']
         )
         if not project:
@@ -491,7 +494,7 @@ class YoutrackProcessor:  # pylint: disable=too-many-public-methods
         if markdown:
             data['usesMarkdown'] = markdown
         if custom_fields:
-            project_fields = self.__admin.get_project_custom_fields(
+            project_fields = await self.__admin.get_project_custom_fields(
                 project['id'], fields=field_to_load
             )
             data['customFields'] = make_fields(custom_fields, project_fields)
@@ -512,7 +515,7 @@ class YoutrackProcessor:  # pylint: disable=too-many-public-methods
     ) -> 'IssueT':
         url = f'/api/issues/{issue_id}'
         field_to_load = ('field(name,fieldType(id),isUpdateable)',)
-        project = self.__admin.get_project_by_short_name(
+        project = await self.__admin.get_project_by_short_name(
             project_short_name, fields=['id']
         )
         if not project:
@@ -525,7 +528,7 @@ class YoutrackProcessor:  # pylint: disable=too-many-public-methods
         if description:
             data['description'] = description
         if custom_fields:
-            project_fields = self.__admin.get_project_custom_fields(
+            project_fields = await self.__admin.get_project_custom_fields(
                 project['id'], fields=field_to_load
             )
             data['customFields'] = make_fields(custom_fields, project_fields)
@@ -541,19 +544,19 @@ class YoutrackProcessor:  # pylint: disable=too-many-public-methods
         files: list[UploadFile],
         fields: FieldsT | None = None,
     ) -> list | dict:
-        form = MultiPartForm()
+        # file objects are streamed by aiohttp, they are not loaded into memory
+        form = aiohttp.FormData()
         for file in files:
-            form.add_file('file', file.filename or '', filehandle=file.file)
-        data = bytes(form)
-        headers = {
-            'Content-Type': form.get_content_type(),
-            'Content-Length': len(data),
-        }
+            form.add_field(
+                'file',
+                file.file,
+                filename=file.filename or '',
+                content_type=file.content_type or 'application/octet-stream',
+            )
         res = await self.post(
             user=user,
             url=build_url(url, fields=fields),
-            headers=headers,
-            data=data,
+            data=form,
             json_=False,
         )
         return res
@@ -587,6 +590,32 @@ class YoutrackProcessor:  # pylint: disable=too-many-public-methods
             ),
         )
 
+    @asynccontextmanager
+    async def open_attachment_content(
+        self,
+        user: 'm.Employee',
+        attachment: 'IssueAttachmentT',
+    ) -> AsyncIterator[aiohttp.ClientResponse]:
+        """
+        Open the content of the attachment, an error response is raised on enter.
+
+        The token is read with the session of the processor, so enter it before the
+        session is closed, e.g. in the route handler rather than in the response body.
+        """
+        token = await self._get_token(user)
+        async with stream_request(
+            f'{self.base_url}{attachment["url"]}', token, timeout=self.timeout
+        ) as response:
+            yield response
+
+    @staticmethod
+    async def iter_attachment_content(
+        response: aiohttp.ClientResponse,
+        chunk_size: int = ATTACHMENT_CHUNK_SIZE,
+    ) -> AsyncIterator[bytes]:
+        async for chunk in response.content.iter_chunked(chunk_size):
+            yield chunk
+
     async def delete_issue_attachment(
         self,
         user: 'm.Employee',
@@ -676,24 +705,29 @@ class YoutrackProcessor:  # pylint: disable=too-many-public-methods
         )
         return res
 
-    def get_project_fields(
+    async def get_project_fields(
         self, project_id: str, fields: FieldsT | None = None
     ) -> list[dict]:
-        return self.__admin.get_project_fields(project_id=project_id, fields=fields)
+        return await self.__admin.get_project_fields(
+            project_id=project_id, fields=fields
+        )
 
-    def get_project_custom_fields(
+    async def get_project_custom_fields(
         self, project_id: str, fields: FieldsT | None = None
     ) -> list[dict]:
-        return self.__admin.get_project_custom_fields(
+        return await self.__admin.get_project_custom_fields(
             project_id=project_id, fields=fields
         )
 
-    def list_project(
+    async def list_project(
         self,
         fields: FieldsT | None = None,
     ) -> list[Any]:
         url = '/api/admin/projects'
-        return list(self.__admin.get_generator(build_url(url, fields=fields)))
+        return [
+            obj
+            async for obj in self.__admin.get_generator(build_url(url, fields=fields))
+        ]
 
     async def apply_command(
         self,
@@ -0,0 +1 @@
+from .report_job import *
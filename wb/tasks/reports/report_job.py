@@ -0,0 +1,25 @@
+import asyncio
+
+from wb.celery_app import celery_app
+from wb.db import multithreading_safe_async_session
+from wb.redis_db import multithreading_safe_session_maker
+from wb.services.reports.jobs import run_report_job
+
+__all__ = ('task_run_report_job',)
+
+
+async def _run(job_id: str, viewer_id: int) -> None:
+    async with multithreading_safe_session_maker() as redis:
+        await run_report_job(
+            job_id,
+            viewer_id,
+            redis=redis,
+            session_maker=multithreading_safe_async_session,
+        )
+
+
+@celery_app.task(name='run_report_job')
+def task_run_report_job(job_id: str, viewer_id: int) -> None:
+    print(f'start report job {job_id}')
+    asyncio.run(_run(job_id, viewer_id))
+    print(f'end report job {job_id}')
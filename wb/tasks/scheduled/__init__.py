@@ -1,12 +1,14 @@
 from .activity_monitor import *
 from .activity_report import *
 from .check_counteragents import *
+from .check_tm_current import *
 from .collect_activities import *
 from .collect_issues import *
 from .correct_tm_logs import *
 from .create_partitions import *
 from .grade_check import *
 from .null_team_check import *
+from .rebuild_activity_daily_summary import *
 from .team_changes_report import *
 from .tm_auto_leave import *
 from .update_linked_accounts import *
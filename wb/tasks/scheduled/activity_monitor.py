@@ -11,8 +11,7 @@ from wb.config import CONFIG
 from wb.db import multithreading_safe_async_session
 from wb.services.activity import (
     ActivitySummaryItem,
-    calc_activity_summary,
-    get_employees_activities,
+    get_employees_activity_summary,
 )
 from wb.services.schedule import get_employees_days_status
 from wb.tasks.send import task_send_bbot_message
@@ -73,8 +72,9 @@ async def check_major_activity(
     warning: float,
     session: 'AsyncSession',
 ) -> tuple[set[int], set[int], dict[int, int]]:
-    activities = await get_employees_activities(employees, start, end, session=session)
-    summaries = {emp.id: calc_activity_summary(activities[emp.id]) for emp in employees}
+    summaries = await get_employees_activity_summary(
+        employees, start, end, session=session
+    )
     days = await get_employees_days_status(employees, start, end, session=session)
     working_days = {
         emp.id: len([d for d in days[emp.id].values() if _is_working_day(d)])
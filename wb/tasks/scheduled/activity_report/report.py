@@ -13,11 +13,15 @@ from sqlalchemy.orm import selectinload
 
 import wb.models as m
 from shared_utils.dataclassutils import sum_dataclasses
-from shared_utils.dateutils import date_range
 from wb.celery_app import celery_app
 from wb.config import CONFIG
 from wb.db import multithreading_safe_async_session
-from wb.services import ActivitySummaryItem, calc_activity_summary
+from wb.services import ActivitySummaryItem
+from wb.services.activity import (
+    ActivityRecord,
+    get_employees_activity_summary_by_day,
+    iter_employees_activities_by_day,
+)
 from wb.services.schedule import get_employees_days_status
 from wb.tasks.send import task_send_email
 
@@ -41,28 +45,20 @@ DAY_LABELS: Dict[m.DayType, str] = {
 
 async def get_activities(
     employees: Sequence[m.Employee], start: date, end: date, session: AsyncSession
-) -> Dict[int, Dict[date, List[m.Activity]]]:
-    activities_raw = await session.scalars(
-        sa.select(m.Activity)
-        .filter(
-            m.Activity.employee_id.in_([emp.id for emp in employees]),
-            m.Activity.time >= start,
-            m.Activity.time < end + timedelta(days=1),
-        )
-        .order_by(m.Activity.time.desc())
-    )
-    activities: Dict[int, Dict[date, List[m.Activity]]] = {
-        emp.id: {day: [] for day in date_range(start=start, end=end)}
-        for emp in employees
-    }
-    for res in activities_raw.all():
-        activities[res.employee_id][res.time.date()].append(res)
+) -> Dict[int, Dict[date, List[ActivityRecord]]]:
+    activities: Dict[int, Dict[date, List[ActivityRecord]]] = {}
+    async for emp, emp_activities in iter_employees_activities_by_day(
+        employees, start, end, session=session
+    ):
+        for acts in emp_activities.values():
+            acts.reverse()
+        activities[emp.id] = emp_activities
     return activities
 
 
 def create_csv(
     employees: Sequence[m.Employee],
-    activities: Dict[int, Dict[date, List[m.Activity]]],
+    activities: Dict[int, Dict[date, List[ActivityRecord]]],
     sources: Dict[int, m.ActivitySource],
 ) -> bytes:
     output = io.StringIO()
@@ -137,6 +133,9 @@ async def send_reports(start: date, end: date) -> None:
         activities = await get_activities(
             list(employees.values()), start, end, session=session
         )
+        summaries = await get_employees_activity_summary_by_day(
+            list(employees.values()), start, end, session=session
+        )
         days_status = await get_employees_days_status(
             list(employees.values()), start, end, session=session
         )
@@ -159,10 +158,10 @@ async def send_reports(start: date, end: date) -> None:
         data = []
         for w in watched_list:
             days_data = {}
-            for day, acts in activities[w.id].items():
+            for day, summary in summaries[w.id].items():
                 days_data[day] = {
                     'status': DAY_LABELS[days_status[w.id][day]],
-                    'summary': calc_activity_summary(acts),
+                    'summary': summary,
                 }
             data.append(
                 {
@@ -0,0 +1,28 @@
+import asyncio
+
+from wb.celery_app import celery_app
+from wb.db import multithreading_safe_async_session
+from wb.services.tm import check_tm_current
+
+__all__ = ('task_maintenance_check_tm_current',)
+
+
+async def _check(fix: bool) -> list[int]:
+    async with multithreading_safe_async_session() as session:
+        return await check_tm_current(session, fix=fix)
+
+
+@celery_app.task(name='maintenance_check_tm_current')
+def task_maintenance_check_tm_current(fix: bool = True) -> None:
+    """
+    Compare the current tm statuses with the tm records history.
+
+    :param fix: rebuild the mismatching statuses from the records
+    """
+    print('start maintenance: check tm current statuses')
+    if mismatched := asyncio.run(_check(fix)):
+        print(
+            f'tm current statuses mismatch the records of {len(mismatched)} employees '
+            f'({"fixed" if fix else "not fixed"}): {mismatched}'
+        )
+    print('end maintenance: check tm current statuses')
@@ -3,6 +3,7 @@ import asyncio
 from wb.activity_collector.collector import load_all_activities, update_done_tasks
 from wb.celery_app import celery_app
 from wb.db import multithreading_safe_async_session
+from wb.utils.http_client import connectors_http_client
 
 __all__ = (
     'task_collect_activities',
@@ -13,12 +14,20 @@ __all__ = (
 @celery_app.task(name='collect_activities')
 def task_collect_activities() -> None:
     print('start collect activities')
-    asyncio.run(load_all_activities(session_maker=multithreading_safe_async_session))
+    asyncio.run(
+        connectors_http_client.run_closing(
+            load_all_activities(session_maker=multithreading_safe_async_session)
+        )
+    )
     print('end collect activities')
 
 
 @celery_app.task(name='update_done_tasks')
 def task_update_done_tasks() -> None:
     print('start update done tasks')
-    asyncio.run(update_done_tasks(session_maker=multithreading_safe_async_session))
+    asyncio.run(
+        connectors_http_client.run_closing(
+            update_done_tasks(session_maker=multithreading_safe_async_session)
+        )
+    )
     print('end update done tasks')
@@ -1,5 +1,6 @@
 import asyncio
 from datetime import datetime, timedelta
+from typing import Any, AsyncGenerator
 
 import sqlalchemy as sa
 
@@ -7,6 +8,7 @@ import wb.models as m
 from wb.celery_app import celery_app
 from wb.config import CONFIG
 from wb.db import multithreading_safe_async_session
+from wb.services.youtrack.utils import youtrack_http_client
 from wb.services.youtrack.youtrack import _AdminYoutrackProcessor as YoutrackProcessor
 
 __all__ = ('task_weekly_collect_issues',)
@@ -15,7 +17,7 @@ __all__ = ('task_weekly_collect_issues',)
 TIMEOUT = 60
 
 
-def fetch_issues(projects: list[str]) -> list:
+def fetch_issues(projects: list[str]) -> AsyncGenerator[Any, None]:
     youtrack_processor = YoutrackProcessor(
         CONFIG.YOUTRACK_URL, CONFIG.YOUTRACK_API_TOKEN, TIMEOUT, CONFIG.YOUTRACK_SCOPE
     )
@@ -30,8 +32,7 @@ def fetch_issues(projects: list[str]) -> list:
         'created',
         'customFields(name,value(name,login,email))',
     ]
-    issues = youtrack_processor.list_issue(query=query, fields=fields)
-    return issues
+    return youtrack_processor.list_issue(query=query, fields=fields)
 
 
 def _get_issue_assignee(custom_fields: dict) -> tuple[str, str]:
@@ -70,8 +71,7 @@ async def weekly_collect_issues() -> None:
             return
         projects = settings.projects
         last_week_monday = get_last_week_monday()
-        issues = fetch_issues(projects)
-        for issue_data in issues:
+        async for issue_data in fetch_issues(projects):
             custom_fields = issue_data['customFields']
             try:
                 _, assignee_email = _get_issue_assignee(custom_fields)
@@ -112,5 +112,5 @@ def task_weekly_collect_issues() -> None:
     if not CONFIG.YOUTRACK_URL:
         return
     print('start collect issues')
-    asyncio.run(weekly_collect_issues())
+    asyncio.run(youtrack_http_client.run_closing(weekly_collect_issues()))
     print('end collect issues')
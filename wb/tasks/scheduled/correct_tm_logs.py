@@ -1,24 +1,40 @@
 import asyncio
-import warnings
+from collections.abc import AsyncIterator
 from datetime import date, datetime, timedelta
-from typing import Any, List, Sequence, Tuple
+from typing import Any, List, NamedTuple, Sequence, Tuple
 
 import sqlalchemy as sa
-from sqlalchemy.exc import IntegrityError
 from sqlalchemy.ext.asyncio import AsyncSession
 
 import wb.models as m
 from shared_utils.dateutils import day_start
 from wb.celery_app import celery_app
 from wb.db import multithreading_safe_async_session
+from wb.services.tm import TMDayRecord, add_employees_tm_records
 
-__all__ = ('task_correct_yesterday_tm_log',)
+__all__ = (
+    'task_correct_yesterday_tm_log',
+    'task_maintenance_correct_tm_logs',
+)
 
 
 WORK_TIME_DELTA = timedelta(minutes=15)
+STREAM_CHUNK_SIZE = 5000
+BACKFILL_CONCURRENCY = 4
 
 
-def activity_boundary(act: m.Activity, day: date) -> Tuple[datetime, datetime]:
+class ActivitySpan(NamedTuple):
+    time: datetime
+    duration: int
+
+
+class TMCorrection(NamedTuple):
+    employee_id: int
+    status: m.TMRecordType
+    time: datetime
+
+
+def activity_boundary(act: ActivitySpan, day: date) -> Tuple[datetime, datetime]:
     if act.duration != 0:
         return act.time, act.time + timedelta(seconds=act.duration)
     left = act.time - WORK_TIME_DELTA
@@ -33,7 +49,7 @@ def activity_boundary(act: m.Activity, day: date) -> Tuple[datetime, datetime]:
 
 
 def calc_activities_interval(
-    activities: Sequence[m.Activity], day: date
+    activities: Sequence[ActivitySpan], day: date
 ) -> List[Tuple[datetime, datetime]]:
     results: List[Tuple[datetime, datetime]] = []
     if not activities:
@@ -43,7 +59,7 @@ def calc_activities_interval(
     curr_start_dt, curr_end_dt = boundaries[0]
     for seg in boundaries:
         if seg[0] <= curr_end_dt:
-            curr_end_dt = seg[1]
+            curr_end_dt = max(curr_end_dt, seg[1])
         else:
             results.append((curr_start_dt, curr_end_dt))
             curr_start_dt = seg[0]
@@ -52,59 +68,24 @@ def calc_activities_interval(
     return results
 
 
-async def insert_log(
-    employee_id: int,
-    status: m.TMRecordType,
-    time: datetime,
-    session: AsyncSession,
-) -> None:
-    try:
-        obj = m.TMRecord(
-            employee_id=employee_id,
-            status=status,
-            time=time,
-            source='activity',
-        )
-        async with session.begin_nested():
-            session.add(obj)
-            with warnings.catch_warnings():
-                warnings.simplefilter('ignore')
-                await session.commit()
-    except IntegrityError:
-        pass
-
-
-async def correct_employee_tm_logs(
-    employee: m.Employee,
-    day: date,
-    activity_filter: Any,
-    session: AsyncSession,
-) -> None:
-    # pylint: disable=too-many-locals, too-many-branches, too-many-statements
-    next_day = day + timedelta(days=1)
-    tm_logs_raw = await session.scalars(
-        sa.select(m.TMRecord)
-        .where(
-            m.TMRecord.employee_id == employee.id,
-            m.TMRecord.time >= day_start(day),
-            m.TMRecord.time < day_start(next_day),
-        )
-        .order_by(m.TMRecord.time)
-    )
-    tm_logs: list[m.TMRecord] = list(tm_logs_raw.all())
+def calc_tm_log_corrections(
+    tm_logs: Sequence[TMDayRecord],
+    intervals: Sequence[Tuple[datetime, datetime]],
+) -> List[TMDayRecord]:
+    """
+    Records to add to the day log of an employee, so that the employee is present
+    during the activity intervals.
+
+    :param tm_logs: the day log of the employee ordered by time
+    :param intervals: the activity intervals of the day, see ``calc_activities_interval``
+    :return: the records in the order they are made, the first one wins if several
+        are made for the same time
+    """
+    # pylint: disable=too-many-branches
+    records: List[TMDayRecord] = []
     curr_wb_state = m.TMRecordType.LEAVE
-    activities_raw = await session.scalars(
-        sa.select(m.Activity).where(
-            m.Activity.employee_id == employee.id,
-            m.Activity.time >= day_start(day),
-            m.Activity.time < day_start(next_day),
-            activity_filter,
-        )
-    )
-    activities: List[m.Activity] = list(activities_raw.all())
     next_wb_act = 0
     len_wb_act = len(tm_logs)
-    intervals = calc_activities_interval(activities, day)
     for interval in intervals:
         time_delta = timedelta(seconds=0)
         while next_wb_act < len_wb_act:
@@ -116,111 +97,173 @@ async def correct_employee_tm_logs(
             next_wb_act += 1
         new_opened_state = None
         if curr_wb_state == m.TMRecordType.LEAVE:
-            await insert_log(
-                employee_id=employee.id,
-                status=m.TMRecordType.COME,
-                time=interval[0] + time_delta,
-                session=session,
-            )
+            records.append(TMDayRecord(m.TMRecordType.COME, interval[0] + time_delta))
             new_opened_state = curr_wb_state = m.TMRecordType.COME
         elif curr_wb_state == m.TMRecordType.AWAY:
-            await insert_log(
-                employee_id=employee.id,
-                status=m.TMRecordType.AWAKE,
-                time=interval[0] + time_delta,
-                session=session,
-            )
+            records.append(TMDayRecord(m.TMRecordType.AWAKE, interval[0] + time_delta))
             new_opened_state = curr_wb_state = m.TMRecordType.AWAKE
         while next_wb_act < len_wb_act:
-            if tm_logs[next_wb_act].time > interval[1]:
+            tm_log = tm_logs[next_wb_act]
+            if tm_log.time > interval[1]:
                 break
-            curr_wb_state = tm_logs[next_wb_act].status
+            curr_wb_state = tm_log.status
             if curr_wb_state == m.TMRecordType.LEAVE:
-                if tm_logs[next_wb_act].time != interval[1]:
-                    await insert_log(
-                        employee_id=employee.id,
-                        status=m.TMRecordType.COME,
-                        time=tm_logs[next_wb_act].time + timedelta(seconds=1),
-                        session=session,
+                if tm_log.time != interval[1]:
+                    records.append(
+                        TMDayRecord(
+                            m.TMRecordType.COME, tm_log.time + timedelta(seconds=1)
+                        )
                     )
                     new_opened_state = curr_wb_state = m.TMRecordType.COME
                 else:
                     new_opened_state = None
             elif curr_wb_state == m.TMRecordType.AWAY:
-                if tm_logs[next_wb_act].time != interval[1]:
-                    await insert_log(
-                        employee_id=employee.id,
-                        status=m.TMRecordType.AWAKE,
-                        time=tm_logs[next_wb_act].time + timedelta(seconds=1),
-                        session=session,
+                if tm_log.time != interval[1]:
+                    records.append(
+                        TMDayRecord(
+                            m.TMRecordType.AWAKE, tm_log.time + timedelta(seconds=1)
+                        )
                     )
                     new_opened_state = curr_wb_state = m.TMRecordType.AWAKE
                 else:
                     new_opened_state = None
             elif curr_wb_state == m.TMRecordType.COME:
                 new_opened_state = None
-                await insert_log(
-                    employee_id=employee.id,
-                    status=m.TMRecordType.LEAVE,
-                    time=tm_logs[next_wb_act].time - timedelta(seconds=1),
-                    session=session,
+                records.append(
+                    TMDayRecord(
+                        m.TMRecordType.LEAVE, tm_log.time - timedelta(seconds=1)
+                    )
                 )
             elif curr_wb_state == m.TMRecordType.AWAKE:
                 new_opened_state = None
-                await insert_log(
-                    employee_id=employee.id,
-                    status=m.TMRecordType.AWAY,
-                    time=tm_logs[next_wb_act].time - timedelta(seconds=1),
-                    session=session,
+                records.append(
+                    TMDayRecord(m.TMRecordType.AWAY, tm_log.time - timedelta(seconds=1))
                 )
             next_wb_act += 1
-        if not new_opened_state:
-            continue
         if new_opened_state == m.TMRecordType.COME:
-            await insert_log(
-                employee_id=employee.id,
-                status=m.TMRecordType.LEAVE,
-                time=interval[1],
-                session=session,
-            )
+            records.append(TMDayRecord(m.TMRecordType.LEAVE, interval[1]))
             curr_wb_state = m.TMRecordType.LEAVE
         elif new_opened_state == m.TMRecordType.AWAKE:
-            await insert_log(
-                employee_id=employee.id,
-                status=m.TMRecordType.AWAY,
-                time=interval[1],
-                session=session,
-            )
-            curr_wb_state = 'away'
-    if next_wb_act == len_wb_act and curr_wb_state == 'away':
-        await insert_log(
-            employee_id=employee.id,
-            status=m.TMRecordType.LEAVE,
-            time=intervals[-1][1] + timedelta(seconds=1),
-            session=session,
+            records.append(TMDayRecord(m.TMRecordType.AWAY, interval[1]))
+            curr_wb_state = m.TMRecordType.AWAY
+    if next_wb_act == len_wb_act and curr_wb_state == m.TMRecordType.AWAY:
+        records.append(
+            TMDayRecord(m.TMRecordType.LEAVE, intervals[-1][1] + timedelta(seconds=1))
         )
+    return records
 
 
-async def correct_tm_logs(day: date) -> None:
-    async with multithreading_safe_async_session() as session:
-        employees_raw = await session.scalars(sa.select(m.Employee))
-        employees: Sequence[m.Employee] = employees_raw.all()
-        excluded_sources = await session.scalars(
-            sa.select(m.ActivitySource).where(
-                sa.or_(
-                    m.ActivitySource.type == m.ActivitySourceType.PARARAM,
-                    m.ActivitySource.type == m.ActivitySourceType.DISCORD,
-                )
+async def _stream_by_employee(
+    q: Any, session: AsyncSession
+) -> AsyncIterator[tuple[int, list[Any]]]:
+    """
+    Stream the rows of a query ordered by ``employee_id`` grouped by employee.
+    """
+    result = await session.stream(q.execution_options(yield_per=STREAM_CHUNK_SIZE))
+    employee_id: int | None = None
+    rows: list[Any] = []
+    async for partition in result.partitions():
+        for row in partition:
+            if row.employee_id != employee_id:
+                if rows:
+                    yield employee_id, rows  # type: ignore[misc]
+                employee_id, rows = row.employee_id, []
+            rows.append(row)
+    if rows:
+        yield employee_id, rows  # type: ignore[misc]
+
+
+async def _get_day_tm_logs(
+    day: date, session: AsyncSession
+) -> dict[int, list[TMDayRecord]]:
+    q = (
+        sa.select(m.TMRecord.employee_id, m.TMRecord.status, m.TMRecord.time)
+        .where(
+            m.TMRecord.time >= day_start(day),
+            m.TMRecord.time < day_start(day + timedelta(days=1)),
+        )
+        .order_by(m.TMRecord.employee_id, m.TMRecord.time)
+    )
+    return {
+        employee_id: [TMDayRecord(row.status, row.time) for row in rows]
+        async for employee_id, rows in _stream_by_employee(q, session)
+    }
+
+
+async def _get_activity_filter(session: AsyncSession) -> Any:
+    excluded_sources = await session.scalars(
+        sa.select(m.ActivitySource.id).where(
+            m.ActivitySource.type.in_(
+                (m.ActivitySourceType.PARARAM, m.ActivitySourceType.DISCORD)
             )
         )
-        flt = m.Activity.source_id.notin_([s.id for s in excluded_sources.all()])
-        for emp in employees:
-            await correct_employee_tm_logs(
-                emp,
-                day,
-                activity_filter=flt,
-                session=session,
+    )
+    return m.Activity.source_id.notin_(excluded_sources.all())
+
+
+async def calc_day_tm_log_corrections(
+    day: date, session: AsyncSession
+) -> list[TMCorrection]:
+    """
+    Records to add to the day logs of all employees, see ``calc_tm_log_corrections``.
+
+    The day logs and the activities are loaded with one streamed query each.
+    """
+    tm_logs = await _get_day_tm_logs(day, session)
+    q = (
+        sa.select(m.Activity.employee_id, m.Activity.time, m.Activity.duration)
+        .where(
+            m.Activity.time >= day_start(day),
+            m.Activity.time < day_start(day + timedelta(days=1)),
+            await _get_activity_filter(session),
+        )
+        .order_by(m.Activity.employee_id, m.Activity.time)
+    )
+    corrections: dict[tuple[int, datetime], TMCorrection] = {}
+    async for employee_id, activities in _stream_by_employee(q, session):
+        intervals = calc_activities_interval(
+            [ActivitySpan(act.time, act.duration) for act in activities], day
+        )
+        for record in calc_tm_log_corrections(tm_logs.get(employee_id, []), intervals):
+            corrections.setdefault(
+                (employee_id, record.time),
+                TMCorrection(employee_id, record.status, record.time),
             )
+    return list(corrections.values())
+
+
+async def correct_tm_logs(day: date) -> int:
+    """
+    Add the records missing in the day logs of the employees who had activities,
+    records of existing times are kept.
+
+    :return: the number of the records made
+    """
+    async with multithreading_safe_async_session() as session:
+        corrections = await calc_day_tm_log_corrections(day, session)
+        await add_employees_tm_records(corrections, source='activity', session=session)
+    return len(corrections)
+
+
+async def correct_tm_logs_range(
+    start: date, end: date, concurrency: int = BACKFILL_CONCURRENCY
+) -> None:
+    """
+    Correct the day logs of every day of the range, ``concurrency`` days at once.
+    """
+    semaphore = asyncio.Semaphore(concurrency)
+
+    async def _correct_day(day: date) -> None:
+        async with semaphore:
+            count = await correct_tm_logs(day)
+            print(f'tm log corrected for {day}: {count} records')
+
+    await asyncio.gather(
+        *(
+            _correct_day(start + timedelta(days=idx))
+            for idx in range((end - start).days + 1)
+        )
+    )
 
 
 @celery_app.task(name='correct_yesterday_tm_log')
@@ -229,3 +272,21 @@ def task_correct_yesterday_tm_log() -> None:
     print(f'start correcting tm log for {today}')
     asyncio.run(correct_tm_logs(today - timedelta(days=1)))
     print(f'end correcting tm log for {today}')
+
+
+@celery_app.task(name='maintenance_correct_tm_logs')
+def task_maintenance_correct_tm_logs(
+    start: str, end: str | None = None, concurrency: int = BACKFILL_CONCURRENCY
+) -> None:
+    """
+    Correct the tm logs of a range of days, e.g. after activities were imported late.
+
+    :param start: first day to correct, ISO format
+    :param end: last day to correct, ISO format, yesterday by default
+    :param concurrency: number of days corrected at once
+    """
+    start_date = date.fromisoformat(start)
+    end_date = date.fromisoformat(end) if end else date.today() - timedelta(days=1)
+    print(f'start maintenance: correct tm logs ({start_date} - {end_date})')
+    asyncio.run(correct_tm_logs_range(start_date, end_date, concurrency=concurrency))
+    print(f'end maintenance: correct tm logs ({start_date} - {end_date})')
@@ -13,6 +13,7 @@ async def _create_partitions(month: int, year: int) -> None:
         await m.Activity.create_partition(month, year, session=session)
         await m.TMRecord.create_partition(month, year, session=session)
         await m.DoneTask.create_partition(month, year, session=session)
+        await m.ActivityDailySummary.create_partition(month, year, session=session)
 
 
 @celery_app.task(name='maintenance_create_next_month_partitions')
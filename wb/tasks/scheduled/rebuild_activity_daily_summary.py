@@ -0,0 +1,51 @@
+import asyncio
+from datetime import date, timedelta
+
+import wb.models as m
+from wb.celery_app import celery_app
+from wb.db import multithreading_safe_async_session
+from wb.services.activity import rebuild_activity_daily_summary
+
+__all__ = ('task_maintenance_rebuild_activity_daily_summary',)
+
+
+def _next_month(day: date) -> date:
+    return (day.replace(day=1) + timedelta(days=32)).replace(day=1)
+
+
+async def _rebuild(start: date, end: date) -> None:
+    month_start = start.replace(day=1)
+    while month_start <= end:
+        month_end = _next_month(month_start) - timedelta(days=1)
+        async with multithreading_safe_async_session() as session:
+            await m.ActivityDailySummary.create_partition(
+                month_start.month, month_start.year, session=session
+            )
+        async with multithreading_safe_async_session() as session:
+            await rebuild_activity_daily_summary(
+                max(start, month_start), min(end, month_end), session=session
+            )
+            await session.commit()
+        print(f'activity daily summary rebuilt for {month_start.strftime("%Y-%m")}')
+        month_start = _next_month(month_start)
+
+
+@celery_app.task(name='maintenance_rebuild_activity_daily_summary')
+def task_maintenance_rebuild_activity_daily_summary(
+    start: str, end: str | None = None
+) -> None:
+    """
+    Rebuild the daily activity rollup month by month, e.g. to backfill it from the stored activities.
+
+    :param start: first day to rebuild, ISO format
+    :param end: last day to rebuild, ISO format, today by default
+    """
+    start_date = date.fromisoformat(start)
+    end_date = date.fromisoformat(end) if end else date.today()
+    print(
+        f'start maintenance: rebuild activity daily summary ({start_date} - {end_date})'
+    )
+    asyncio.run(_rebuild(start_date, end_date))
+    print(
+        f'end maintenance: rebuild activity daily summary ({start_date} - {end_date})'
+    )
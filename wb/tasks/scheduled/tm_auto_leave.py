@@ -1,6 +1,6 @@
 import asyncio
-import typing as t
 from datetime import datetime, timedelta
+from typing import NamedTuple
 
 import sqlalchemy as sa
 from sqlalchemy.ext.asyncio import AsyncSession
@@ -8,58 +8,72 @@ from sqlalchemy.ext.asyncio import AsyncSession
 import wb.models as m
 from wb.celery_app import celery_app
 from wb.db import multithreading_safe_async_session
-from wb.services.tm import (
-    get_employee_tm_current_status,
-    set_employee_tm_current_status,
-)
+from wb.services.tm import add_employees_tm_records
 
 __all__ = ('task_tm_auto_leave',)
 
 
-def _max(items: t.Sequence[datetime | None]) -> datetime:
-    return max(item for item in items if item)
+AUTO_LEAVE_DELAY = timedelta(hours=3)
 
 
-async def process_emp(
-    employee: m.Employee,
+class EmployeeTMState(NamedTuple):
+    employee_id: int
+    status: m.TMRecordType
+    status_time: datetime
+    last_logon: datetime | None
+
+
+async def get_present_employees_tm_state(
     session: AsyncSession,
-) -> None:
-    now = datetime.utcnow()
-    last_logon = None
-    if employee.tm:
-        last_logon = employee.tm.last_logon
-    if last_logon and last_logon + timedelta(hours=3) > now:
-        return
-    status, status_time = await get_employee_tm_current_status(
-        employee, session=session
+) -> list[EmployeeTMState]:
+    """
+    The last record and the last tm logon of every active employee who has not left.
+    """
+    rows = await session.execute(
+        sa.select(
+            m.EmployeeTMCurrent.employee_id,
+            m.EmployeeTMCurrent.status,
+            m.EmployeeTMCurrent.time,
+            m.EmployeeTM.last_logon,
+        )
+        .join(m.Employee, m.Employee.id == m.EmployeeTMCurrent.employee_id)
+        .outerjoin(
+            m.EmployeeTM, m.EmployeeTM.employee_id == m.EmployeeTMCurrent.employee_id
+        )
+        .where(
+            m.Employee.active.is_(True),
+            m.EmployeeTMCurrent.status != m.TMRecordType.LEAVE,
+        )
     )
-    if status == m.TMRecordType.LEAVE:
-        return
-    if status_time and status_time + timedelta(hours=3) > now:
-        return
-    time_to_set = _max([last_logon, status_time]) + timedelta(seconds=2)
-    _, __, ok = await set_employee_tm_current_status(
-        employee,
-        m.TMRecordType.LEAVE,
-        source='auto',
-        session=session,
-        at=time_to_set,
-        silent=True,
+    return [EmployeeTMState(*row) for row in rows.all()]
+
+
+def get_auto_leave_time(state: EmployeeTMState, now: datetime) -> datetime | None:
+    if state.status == m.TMRecordType.LEAVE:
+        return None
+    if state.last_logon and state.last_logon + AUTO_LEAVE_DELAY > now:
+        return None
+    if state.status_time + AUTO_LEAVE_DELAY > now:
+        return None
+    return max(state.last_logon or state.status_time, state.status_time) + timedelta(
+        seconds=2
     )
-    if not ok:
-        print(
-            f'failed to insert auto leave log for {employee.email} at {time_to_set} '
-            f'(current status: {status} at {status_time})'
-        )
 
 
 async def auto_leave() -> None:
     async with multithreading_safe_async_session() as session:
-        employees_raw = await session.scalars(
-            sa.select(m.Employee).where(m.Employee.active.is_(True))
-        )
-        for emp in employees_raw.all():
-            await process_emp(emp, session=session)
+        now = datetime.utcnow()
+        records = []
+        for state in await get_present_employees_tm_state(session):
+            if time_to_set := get_auto_leave_time(state, now):
+                records.append((state.employee_id, m.TMRecordType.LEAVE, time_to_set))
+        added = await add_employees_tm_records(records, source='auto', session=session)
+        for employee_id, _, time_to_set in records:
+            if employee_id not in added:
+                print(
+                    f'failed to insert auto leave log for employee {employee_id} '
+                    f'at {time_to_set}'
+                )
 
 
 @celery_app.task(name='tm_auto_leave')
@@ -1,24 +1,40 @@
 import functools
 import inspect
 import os
-from collections.abc import Awaitable, Callable, Container
+from collections import defaultdict
+from collections.abc import Awaitable, Callable, Container, Sequence
 from typing import TYPE_CHECKING, Any
 
-from wb.redis_db import multithreading_safe_session_maker, session_maker
+from wb.redis_db import choose_session_maker, session_maker
 
-from .cacher import CachedFunction, FlushFunction
-from .serializers import PickleSerializer
+from .cacher import (
+    BatchCachedFunction,
+    BatchFlushFunction,
+    CachedFunction,
+    FlushFunction,
+)
+from .local import CacheStats, InvalidationListener, LocalCache
+from .serializers import BaseSerializer, default_serializer
 
 if TYPE_CHECKING:
     from redis.asyncio import Redis as AsyncRedis
 
 __all__ = (
     'lru_cache',
+    'lru_cache_many',
     'flush_cache',
+    'flush_cache_many',
     'get_key_builder_exclude_args',
+    'get_cache_stats',
+    'CacheStats',
 )
 
 CACHE_NAMESPACE = '_lru-cache'
+CACHE_INVALIDATION_CHANNEL = f'{CACHE_NAMESPACE}:invalidate'
+LOCAL_CACHE_MAXSIZE = 1024
+
+_stats: defaultdict[str, CacheStats] = defaultdict(CacheStats)
+_invalidation = InvalidationListener(CACHE_INVALIDATION_CHANNEL, session_maker)
 
 
 def _choose_session_maker() -> Callable[[], 'AsyncRedis']:
@@ -28,14 +44,39 @@ def _choose_session_maker() -> Callable[[], 'AsyncRedis']:
     :return: A session maker.
     :rtype: Callable[[], AsyncRedis]
     """
-    if os.getenv('MULTITHREADING_ENABLED', 'False') == 'True':
-        return multithreading_safe_session_maker
-    return session_maker
+    return choose_session_maker()
+
+
+def _local_cache_enabled() -> bool:
+    """
+    The local tier is used only in long-living processes with a single event loop.
+
+    In multithreading mode (celery workers) every task runs its own event loop,
+    so the invalidation listener can not be kept alive between tasks.
+    """
+    return os.getenv('MULTITHREADING_ENABLED', 'False') != 'True'
+
+
+def get_cache_stats() -> dict[str, CacheStats]:
+    """
+    Return hit/miss/eviction counters of the current process grouped by namespace.
+
+    :return: A mapping of namespace to its counters.
+    :rtype: dict[str, CacheStats]
+    """
+    return dict(_stats)
 
 
 def lru_cache(
     ttl: int | None = None,
     key_builder: Callable[..., str] | None = None,
+    local_ttl: int | None = None,
+    local_maxsize: int = LOCAL_CACHE_MAXSIZE,
+    namespace: str = CACHE_NAMESPACE,
+    lock_ttl: int | None = None,
+    stale_ttl: int = 0,
+    early_refresh_beta: float | None = None,
+    serializer: BaseSerializer | None = None,
 ) -> Callable:
     """
     Decorator factory for creating a cached version of an asynchronous function.
@@ -49,6 +90,30 @@ def lru_cache(
     :param key_builder: A callable that generates cache keys from function
                         arguments. If None, a default key builder is used.
     :type key_builder: Callable[..., str] or None
+    :param local_ttl: Time-to-live of the per-process in-memory tier in seconds.
+                      If None, only Redis is used. Local entries are dropped in all
+                      processes when the key is flushed with ``flush_cache``.
+    :type local_ttl: int or None
+    :param local_maxsize: Maximum number of entries in the in-memory tier.
+    :type local_maxsize: int
+    :param namespace: A name used to group cache statistics.
+    :type namespace: str
+    :param lock_ttl: If set, only the worker holding a Redis lock with this TTL (in seconds)
+                     recomputes a missing or stale entry, the others serve the stale value
+                     or wait for the fresh one. Concurrent callers within a process always
+                     share a single recomputation.
+    :type lock_ttl: int or None
+    :param stale_ttl: How long (in seconds) an expired entry is kept in Redis to be served
+                      while it is being recomputed.
+    :type stale_ttl: int
+    :param early_refresh_beta: If set, entries are recomputed probabilistically before they
+                               expire, so hot keys do not expire at the same moment.
+                               Values above 1 favour earlier refreshes.
+    :type early_refresh_beta: float or None
+    :param serializer: Serializer of cached values. By default values are stored as tagged
+                       JSON, falling back to pickle for objects JSON can not represent,
+                       with the release version in the header.
+    :type serializer: BaseSerializer or None
 
     :return: A decorator that caches the decorated asynchronous function.
     :rtype: Callable
@@ -59,22 +124,81 @@ def lru_cache(
     >>> async def my_async_function(arg1, arg2):
     ...     pass
 
+    >>> @lru_cache(ttl=60, local_ttl=5, lock_ttl=10, stale_ttl=30, early_refresh_beta=1)
+    >>> async def my_hot_async_function(arg1, arg2):
+    ...     pass
+
     """
 
     def wrapper(func: Callable[..., Awaitable]) -> Callable[..., Awaitable]:
+        local = None
+        if local_ttl and _local_cache_enabled():
+            local = LocalCache(
+                maxsize=local_maxsize, ttl=local_ttl, stats=_stats[namespace]
+            )
+            _invalidation.caches.append(local)
         cached = CachedFunction(
             func=func,
-            serializer=PickleSerializer(),
+            serializer=serializer or default_serializer(),
             key_builder=key_builder or key_builder_default,
-            namespace=CACHE_NAMESPACE,
+            namespace=namespace,
             session_maker=_choose_session_maker(),
+            stats=_stats[namespace],
             ttl=ttl,
+            local=local,
+            invalidation=_invalidation if local else None,
+            lock_ttl=lock_ttl,
+            stale_ttl=stale_ttl,
+            early_refresh_beta=early_refresh_beta,
         )
 
         @functools.wraps(func)
         async def inner(*args: Any, **kwargs: Any) -> Any:
             return await cached(*args, **kwargs)
 
+        inner.cached = cached  # type: ignore[attr-defined]
+        return inner
+
+    return wrapper
+
+
+def lru_cache_many(cached_func: Callable[..., Awaitable]) -> Callable:
+    """
+    Decorator factory for a batched companion of a function decorated with ``lru_cache``.
+
+    The decorated function is a bulk loader: it receives a list of positional argument
+    tuples of the cache misses along with the shared keyword arguments and must return
+    the values in the same order. The resulting function takes a list of positional
+    argument tuples and returns the values in the same order. It shares the cache
+    entries with ``cached_func``, hits are read with a single ``MGET`` and the computed
+    values are written with a single pipeline.
+
+    :param cached_func: A function decorated with ``lru_cache``.
+    :type cached_func: Callable[..., Awaitable]
+    :return: A decorator that turns a bulk loader into a batched cached function.
+    :rtype: Callable
+
+    :Example:
+
+    >>> @lru_cache(ttl=60, key_builder=lambda _, user_id, **__: f'user-{user_id}')
+    >>> async def get_user_name(user_id: int, session: AsyncSession) -> str:
+    ...     pass
+
+    >>> @lru_cache_many(get_user_name)
+    >>> async def get_users_names(args_list: list[tuple[int]], session: AsyncSession) -> list[str]:
+    ...     pass
+
+    >>> await get_users_names([(1,), (2,)], session=session)
+    """
+    cached: CachedFunction = getattr(cached_func, 'cached')
+
+    def wrapper(loader: Callable[..., Awaitable]) -> Callable[..., Awaitable]:
+        batch = BatchCachedFunction(cached=cached, loader=loader)
+
+        @functools.wraps(loader)
+        async def inner(args_list: Sequence[tuple], **kwargs: Any) -> list[Any]:
+            return await batch(args_list, **kwargs)
+
         return inner
 
     return wrapper
@@ -106,6 +230,7 @@ def flush_cache(key_builder: Callable[..., str]) -> Callable:
             key_builder=key_builder,
             namespace=CACHE_NAMESPACE,
             session_maker=_choose_session_maker(),
+            invalidation=_invalidation,
         )
 
         @functools.wraps(func)
@@ -117,6 +242,47 @@ def flush_cache(key_builder: Callable[..., str]) -> Callable:
     return wrapper
 
 
+def flush_cache_many(key_builder: Callable[..., str]) -> Callable:
+    """
+    A bulk version of ``flush_cache``.
+
+    The wrapped function takes a list of positional argument tuples as its first argument,
+    a cache key is built from every tuple and the shared keyword arguments, and all the keys
+    are deleted with a single ``DEL``.
+
+    :param key_builder: A function that builds a cache key.
+    :type key_builder: Callable[..., str]
+    :return: A wrapper function that wraps the given function with a bulk cache flushing mechanism.
+    :rtype: Callable
+
+    :Example:
+
+    >>> def key_builder(f, user_id: int, **kwargs) -> str:
+    ...    return f'user-{user_id}'
+
+    >>> @flush_cache_many(key_builder=key_builder)
+    >>> async def set_many(args_list: list[tuple[int]]):
+    ...    pass
+    """
+
+    def wrapper(func: Callable[..., Awaitable]) -> Callable[..., Awaitable]:
+        flush = BatchFlushFunction(
+            func=func,
+            key_builder=key_builder,
+            namespace=CACHE_NAMESPACE,
+            session_maker=_choose_session_maker(),
+            invalidation=_invalidation,
+        )
+
+        @functools.wraps(func)
+        async def inner(args_list: Sequence[tuple], *args: Any, **kwargs: Any) -> Any:
+            return await flush(args_list, *args, **kwargs)
+
+        return inner
+
+    return wrapper
+
+
 def _parse_params(func: Callable, *args: Any, **kwargs: Any) -> dict[str, Any]:
     """
     Parse the parameters passed to a function and return a dictionary of parameter names and their corresponding values.
@@ -1,15 +1,43 @@
-from collections.abc import Awaitable, Callable
+import asyncio
+import math
+import random
+import time
+from collections.abc import Awaitable, Callable, Sequence
+from contextlib import suppress
+from dataclasses import dataclass
 from typing import Any
 
 from redis.asyncio import Redis as AsyncRedis
+from redis.exceptions import LockError
 
-from .serializers import BaseSerializer
+from .local import MISSING, CacheStats, InvalidationListener, LocalCache
+from .serializers import BaseSerializer, SerializationError
 
 __all__ = (
+    'CacheEntry',
     'CachedFunction',
+    'BatchCachedFunction',
     'FlushFunction',
+    'BatchFlushFunction',
 )
 
+LOCK_POLL_INTERVAL = 0.05
+
+
+@dataclass
+class CacheEntry:
+    """
+    Envelope of a value stored in Redis.
+
+    :param value: The cached value.
+    :param expires: Unix timestamp after which the value is considered stale, None if it never expires.
+    :param delta: Time in seconds the value took to compute, used by the early refresh.
+    """
+
+    value: Any
+    expires: float | None
+    delta: float
+
 
 class CachedFunction:
     namespace: str
@@ -17,7 +45,14 @@ class CachedFunction:
     serializer: BaseSerializer
     ttl: int | None
     session_maker: Callable[[], AsyncRedis]
+    stats: CacheStats
+    local: LocalCache | None
+    invalidation: InvalidationListener | None
+    lock_ttl: int | None
+    stale_ttl: int
+    early_refresh_beta: float | None
     _func: Callable[..., Awaitable]
+    _inflight: dict[str, asyncio.Future]
 
     def __init__(
         self,
@@ -26,42 +61,263 @@ class CachedFunction:
         key_builder: Callable[..., str],
         namespace: str,
         session_maker: Callable[[], AsyncRedis],
+        stats: CacheStats,
         ttl: int | None = None,
+        local: LocalCache | None = None,
+        invalidation: InvalidationListener | None = None,
+        lock_ttl: int | None = None,
+        stale_ttl: int = 0,
+        early_refresh_beta: float | None = None,
     ) -> None:
         self._func = func
         self.serializer = serializer
         self.key_builder = key_builder
         self.namespace = namespace
         self.session_maker = session_maker
+        self.stats = stats
         self.ttl = ttl
+        self.local = local
+        self.invalidation = invalidation
+        self.lock_ttl = lock_ttl
+        self.stale_ttl = stale_ttl
+        self.early_refresh_beta = early_refresh_beta
+        self._inflight = {}
+
+    def build_key(self, *args: Any, **kwargs: Any) -> str:
+        return self.key_builder(self._func, *args, **kwargs)
+
+    @property
+    def redis_ttl(self) -> int | None:
+        return self.ttl + self.stale_ttl if self.ttl else None
 
-    async def _set(self, key: str, value: Any, session: AsyncRedis) -> None:
-        await session.set(key, self.serializer.dumps(value), ex=self.ttl)
+    def encode(self, value: Any, delta: float) -> bytes:
+        expires = time.time() + self.ttl if self.ttl else None
+        return self.serializer.dumps(
+            CacheEntry(value=value, expires=expires, delta=delta)
+        )
 
-    async def _get(self, key: str, session: AsyncRedis) -> Any:
-        data = await session.get(key)
+    def decode(self, data: bytes | None) -> CacheEntry:
         if data is None:
-            return None
-        return self.serializer.loads(data)
+            return MISSING
+        try:
+            entry = self.serializer.loads(data)
+        except SerializationError:
+            # written by another release or with an unknown format
+            return MISSING
+        if not isinstance(entry, CacheEntry):
+            # value written before entries got the envelope, let it live until Redis expires it
+            return CacheEntry(value=entry, expires=None, delta=0)
+        return entry
+
+    async def _get(self, key: str, session: AsyncRedis) -> CacheEntry:
+        return self.decode(await session.get(key))
+
+    def need_refresh(self, entry: CacheEntry) -> bool:
+        """
+        Check whether the entry is stale or, with early refresh enabled, is about to become stale.
+
+        Early refresh follows the XFetch algorithm: the closer the entry is to its expiration
+        and the longer it takes to compute, the more likely a caller recomputes it in advance.
+        """
+        if entry.expires is None:
+            return False
+        now = time.time()
+        if self.early_refresh_beta:
+            now -= (
+                entry.delta * self.early_refresh_beta * math.log(1 - random.random())  # nosec random
+            )
+        return now >= entry.expires
+
+    async def _compute(
+        self, key: str, session: AsyncRedis, args: tuple, kwargs: dict
+    ) -> Any:
+        started = time.monotonic()
+        value = await self._func(*args, **kwargs)
+        delta = time.monotonic() - started
+        await session.set(key, self.encode(value, delta), ex=self.redis_ttl)
+        return value
+
+    async def _load(
+        self,
+        key: str,
+        entry: CacheEntry,
+        session: AsyncRedis,
+        args: tuple,
+        kwargs: dict,
+    ) -> Any:
+        """
+        Recompute the value, holding a short Redis lock if ``lock_ttl`` is set.
+
+        A worker that fails to take the lock serves the stale value if there is one,
+        otherwise it waits for the lock holder to store the value.
+        If the holder does not make it within ``lock_ttl``, the value is computed anyway.
+        """
+        if self.lock_ttl is None:
+            return await self._compute(key, session, args, kwargs)
+        lock = session.lock(f'{key}:lock', timeout=self.lock_ttl)
+        if await lock.acquire(blocking=False):
+            try:
+                return await self._compute(key, session, args, kwargs)
+            finally:
+                with suppress(LockError):
+                    await lock.release()
+        if entry is not MISSING:
+            self.stats.stale_hits += 1
+            return entry.value
+        deadline = time.monotonic() + self.lock_ttl
+        while time.monotonic() < deadline:
+            await asyncio.sleep(LOCK_POLL_INTERVAL)
+            entry = await self._get(key, session)
+            if entry is not MISSING:
+                return entry.value
+            if not await session.exists(lock.name):
+                break
+        return await self._compute(key, session, args, kwargs)
+
+    async def _load_single_flight(
+        self,
+        key: str,
+        entry: CacheEntry,
+        session: AsyncRedis,
+        args: tuple,
+        kwargs: dict,
+    ) -> Any:
+        """
+        Make concurrent callers of this process share a single recomputation of the key.
+        """
+        loop = asyncio.get_running_loop()
+        inflight = self._inflight.get(key)
+        if inflight is not None and inflight.get_loop() is loop:
+            if entry is not MISSING:
+                self.stats.stale_hits += 1
+                return entry.value
+            try:
+                return await asyncio.shield(inflight)
+            except asyncio.CancelledError:
+                if not inflight.cancelled():
+                    raise
+            # the caller doing the work was cancelled, do it ourselves
+            return await self._compute(key, session, args, kwargs)
+        fut = loop.create_future()
+        self._inflight[key] = fut
+        try:
+            value = await self._load(key, entry, session, args, kwargs)
+        except asyncio.CancelledError:
+            fut.cancel()
+            raise
+        except Exception as err:
+            fut.set_exception(err)
+            # mark the exception as retrieved, it is re-raised right here
+            fut.exception()
+            raise
+        finally:
+            if self._inflight.get(key) is fut:
+                del self._inflight[key]
+        fut.set_result(value)
+        return value
 
     async def __call__(
         self,
         *args: Any,
         **kwargs: Any,
     ) -> Any:
-        key = self.key_builder(self._func, *args, **kwargs)
+        key = self.build_key(*args, **kwargs)
+        if self.local is not None:
+            if self.invalidation is not None:
+                self.invalidation.ensure_started()
+            value = self.local.get(key)
+            if value is not MISSING:
+                self.stats.local_hits += 1
+                return value
         async with self.session_maker() as session:
-            value = await self._get(key, session)
-            if value is None:
-                value = await self._func(*args, **kwargs)
-                await self._set(key, value, session)
-            return value
+            entry = await self._get(key, session)
+            if entry is MISSING:
+                self.stats.misses += 1
+                value = await self._load_single_flight(
+                    key, entry, session, args, kwargs
+                )
+            elif self.need_refresh(entry):
+                self.stats.refreshes += 1
+                value = await self._load_single_flight(
+                    key, entry, session, args, kwargs
+                )
+            else:
+                self.stats.hits += 1
+                value = entry.value
+        if self.local is not None:
+            self.local.set(key, value)
+        return value
+
+
+class BatchCachedFunction:
+    """
+    Batched companion of a ``CachedFunction``, sharing its keys, TTLs and serializer.
+
+    Hits are resolved with a single ``MGET``, misses and stale entries are computed
+    with one call of the bulk loader and written back with one pipeline.
+    """
+
+    cached: CachedFunction
+    _loader: Callable[..., Awaitable[Sequence]]
+
+    def __init__(
+        self,
+        cached: CachedFunction,
+        loader: Callable[..., Awaitable[Sequence]],
+    ) -> None:
+        self.cached = cached
+        self._loader = loader
+
+    async def __call__(self, args_list: Sequence[tuple], **kwargs: Any) -> list[Any]:
+        cached = self.cached
+        keys = [cached.build_key(*args, **kwargs) for args in args_list]
+        results: list[Any] = [MISSING] * len(keys)
+        if cached.local is not None:
+            if cached.invalidation is not None:
+                cached.invalidation.ensure_started()
+            for i, key in enumerate(keys):
+                results[i] = cached.local.get(key)
+                if results[i] is not MISSING:
+                    cached.stats.local_hits += 1
+        pending = [i for i, value in enumerate(results) if value is MISSING]
+        if not pending:
+            return results
+        async with cached.session_maker() as session:
+            raw = await session.mget([keys[i] for i in pending])
+            missing = []
+            for i, data in zip(pending, raw):
+                entry = cached.decode(data)
+                if entry is MISSING:
+                    cached.stats.misses += 1
+                    missing.append(i)
+                elif cached.need_refresh(entry):
+                    cached.stats.refreshes += 1
+                    missing.append(i)
+                else:
+                    cached.stats.hits += 1
+                    results[i] = entry.value
+            if missing:
+                started = time.monotonic()
+                values = await self._loader([args_list[i] for i in missing], **kwargs)
+                delta = (time.monotonic() - started) / len(missing)
+                async with session.pipeline(transaction=False) as pipe:
+                    for i, value in zip(missing, values, strict=True):
+                        results[i] = value
+                        pipe.set(
+                            keys[i], cached.encode(value, delta), ex=cached.redis_ttl
+                        )
+                    await pipe.execute()
+        if cached.local is not None:
+            for i in pending:
+                cached.local.set(keys[i], results[i])
+        return results
 
 
 class FlushFunction:
     namespace: str
     key_builder: Callable[..., str]
     session_maker: Callable[[], AsyncRedis]
+    invalidation: InvalidationListener | None
     _func: Callable[..., Awaitable]
 
     def __init__(
@@ -70,15 +326,53 @@ class FlushFunction:
         namespace: str,
         key_builder: Callable[..., str],
         session_maker: Callable[[], AsyncRedis],
+        invalidation: InvalidationListener | None = None,
     ) -> None:
         self._func = func
         self.namespace = namespace
         self.key_builder = key_builder
         self.session_maker = session_maker
+        self.invalidation = invalidation
 
     async def __call__(self, *args: Any, **kwargs: Any) -> Any:
         key = self.key_builder(self._func, *args, **kwargs)
         async with self.session_maker() as session:
             value = await self._func(*args, **kwargs)
             await session.delete(key)
+            if self.invalidation is not None:
+                await self.invalidation.publish(key, session)
+            return value
+
+
+class BatchFlushFunction:
+    namespace: str
+    key_builder: Callable[..., str]
+    session_maker: Callable[[], AsyncRedis]
+    invalidation: InvalidationListener | None
+    _func: Callable[..., Awaitable]
+
+    def __init__(
+        self,
+        func: Callable[..., Awaitable],
+        namespace: str,
+        key_builder: Callable[..., str],
+        session_maker: Callable[[], AsyncRedis],
+        invalidation: InvalidationListener | None = None,
+    ) -> None:
+        self._func = func
+        self.namespace = namespace
+        self.key_builder = key_builder
+        self.session_maker = session_maker
+        self.invalidation = invalidation
+
+    async def __call__(
+        self, args_list: Sequence[tuple], *args: Any, **kwargs: Any
+    ) -> Any:
+        keys = [self.key_builder(self._func, *a, **kwargs) for a in args_list]
+        async with self.session_maker() as session:
+            value = await self._func(args_list, *args, **kwargs)
+            if keys:
+                await session.delete(*keys)
+                if self.invalidation is not None:
+                    await self.invalidation.publish_many(keys, session)
             return value
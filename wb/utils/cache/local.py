@@ -0,0 +1,140 @@
+import asyncio
+import time
+from collections import OrderedDict
+from collections.abc import Callable
+from dataclasses import dataclass
+from typing import Any
+
+from redis.asyncio import Redis as AsyncRedis
+
+from wb.log import log
+
+__all__ = (
+    'CacheStats',
+    'LocalCache',
+    'InvalidationListener',
+    'MISSING',
+)
+
+RECONNECT_DELAY = 1
+
+
+class _Missing:
+    def __repr__(self) -> str:
+        return '<MISSING>'
+
+
+MISSING: Any = _Missing()
+
+
+@dataclass
+class CacheStats:
+    local_hits: int = 0
+    hits: int = 0
+    misses: int = 0
+    refreshes: int = 0
+    stale_hits: int = 0
+    evictions: int = 0
+
+
+class LocalCache:
+    """
+    Per-process bounded LRU cache with TTL, used as the first tier in front of Redis.
+
+    Values are stored as is, including ``None``, absence of a key is reported with ``MISSING``.
+    """
+
+    maxsize: int
+    ttl: float
+    stats: CacheStats
+    _data: OrderedDict[str, tuple[float, Any]]
+
+    def __init__(self, maxsize: int, ttl: float, stats: CacheStats) -> None:
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self.stats = stats
+        self._data = OrderedDict()
+
+    def get(self, key: str) -> Any:
+        item = self._data.get(key)
+        if item is None:
+            return MISSING
+        expires, value = item
+        if expires < time.monotonic():
+            del self._data[key]
+            return MISSING
+        self._data.move_to_end(key)
+        return value
+
+    def set(self, key: str, value: Any) -> None:
+        self._data[key] = (time.monotonic() + self.ttl, value)
+        self._data.move_to_end(key)
+        while len(self._data) > self.maxsize:
+            self._data.popitem(last=False)
+            self.stats.evictions += 1
+
+    def pop(self, key: str) -> None:
+        self._data.pop(key, None)
+
+    def clear(self) -> None:
+        self._data.clear()
+
+
+class InvalidationListener:
+    """
+    Listens to the invalidation channel and drops invalidated keys from local caches of this process.
+
+    The listener is started lazily in the running event loop. While it is disconnected,
+    invalidations may be lost, so local caches are cleared on every (re)connect.
+    """
+
+    channel: str
+    session_maker: Callable[[], AsyncRedis]
+    caches: list[LocalCache]
+    _task: asyncio.Task | None
+
+    def __init__(self, channel: str, session_maker: Callable[[], AsyncRedis]) -> None:
+        self.channel = channel
+        self.session_maker = session_maker
+        self.caches = []
+        self._task = None
+
+    def ensure_started(self) -> None:
+        if self._task is not None and not self._task.done():
+            return
+        self._task = asyncio.get_running_loop().create_task(self._listen())
+
+    def invalidate(self, key: str) -> None:
+        for cache in self.caches:
+            cache.pop(key)
+
+    async def publish(self, key: str, session: AsyncRedis) -> None:
+        self.invalidate(key)
+        await session.publish(self.channel, key)
+
+    async def publish_many(self, keys: list[str], session: AsyncRedis) -> None:
+        async with session.pipeline(transaction=False) as pipe:
+            for key in keys:
+                self.invalidate(key)
+                pipe.publish(self.channel, key)
+            await pipe.execute()
+
+    async def _listen(self) -> None:
+        while True:
+            try:
+                async with self.session_maker() as session:
+                    async with session.pubsub() as pubsub:
+                        await pubsub.subscribe(self.channel)
+                        for cache in self.caches:
+                            cache.clear()
+                        async for message in pubsub.listen():
+                            if message['type'] != 'message':
+                                continue
+                            self.invalidate(message['data'].decode())
+            except asyncio.CancelledError:
+                raise
+            except Exception as err:  # pylint: disable=broad-exception-caught
+                log.warning(f'cache invalidation listener failed: {err}')
+            for cache in self.caches:
+                cache.clear()
+            await asyncio.sleep(RECONNECT_DELAY)
@@ -1,14 +1,48 @@
+import base64
+import dataclasses
+import functools
+import importlib
+import os
 import pickle
+import zlib
 from abc import ABC, abstractmethod
-from typing import Any
+from collections.abc import Callable, Sequence
+from datetime import date, datetime, time, timedelta
+from decimal import Decimal
+from enum import Enum
+from typing import Any, ClassVar
+from uuid import UUID
+
+import orjson
+from pydantic import BaseModel
 
 __all__ = (
     'BaseSerializer',
     'PickleSerializer',
+    'JSONSerializer',
+    'VersionedSerializer',
+    'SerializationError',
+    'register_serializer',
+    'get_serializer',
+    'register_codec',
+    'default_serializer',
 )
 
+CACHE_FORMAT_VERSION = '1'
+COMPRESS_THRESHOLD = 4 * 1024
+HEADER_SEPARATOR = b'|'
+TYPE_TAG = '__t'
+
+CodecT = tuple[Callable[[bytes], bytes], Callable[[bytes], bytes]]
+
+
+class SerializationError(Exception):
+    pass
+
 
 class BaseSerializer(ABC):
+    name: ClassVar[str]
+
     @abstractmethod
     def dumps(self, value: Any) -> bytes:
         pass
@@ -19,6 +53,8 @@ class BaseSerializer(ABC):
 
 
 class PickleSerializer(BaseSerializer):
+    name = 'pickle'
+
     # noinspection PyMethodMayBeStatic
     def dumps(self, value: Any) -> bytes:
         return pickle.dumps(value)
@@ -26,3 +62,236 @@ class PickleSerializer(BaseSerializer):
     # noinspection PyMethodMayBeStatic
     def loads(self, value: bytes) -> Any:
         return pickle.loads(value)  # nosec pickle
+
+
+def _class_path(cls: type) -> str:
+    return f'{cls.__module__}:{cls.__qualname__}'
+
+
+@functools.cache
+def _import_class(path: str) -> type:
+    module_name, _, qualname = path.partition(':')
+    obj: Any = importlib.import_module(module_name)
+    for attr in qualname.split('.'):
+        obj = getattr(obj, attr)
+    if not isinstance(obj, type):
+        raise SerializationError(f'{path} is not a class')
+    return obj
+
+
+@functools.cache
+def _importable_path(cls: type) -> str:
+    path = _class_path(cls)
+    try:
+        if _import_class(path) is cls:
+            return path
+    except (ImportError, AttributeError, SerializationError):
+        pass
+    raise SerializationError(f'{cls!r} can not be imported by its name')
+
+
+def _encode(obj: Any) -> Any:
+    # pylint: disable=too-many-return-statements
+    if obj is None or type(obj) in (str, int, float, bool):
+        return obj
+    if isinstance(obj, list):
+        return [_encode(item) for item in obj]
+    if isinstance(obj, dict):
+        if TYPE_TAG not in obj and all(type(k) is str for k in obj):
+            return {k: _encode(v) for k, v in obj.items()}
+        return {
+            TYPE_TAG: 'dict',
+            'v': [[_encode(k), _encode(v)] for k, v in obj.items()],
+        }
+    if isinstance(obj, tuple) and not hasattr(obj, '_fields'):
+        return {TYPE_TAG: 'tuple', 'v': [_encode(item) for item in obj]}
+    if isinstance(obj, Enum):
+        return {TYPE_TAG: 'enum', 'c': _importable_path(type(obj)), 'v': obj.value}
+    if isinstance(obj, datetime):
+        return {TYPE_TAG: 'datetime', 'v': obj.isoformat()}
+    if isinstance(obj, date):
+        return {TYPE_TAG: 'date', 'v': obj.isoformat()}
+    if isinstance(obj, time):
+        return {TYPE_TAG: 'time', 'v': obj.isoformat()}
+    if isinstance(obj, timedelta):
+        return {TYPE_TAG: 'timedelta', 'v': [obj.days, obj.seconds, obj.microseconds]}
+    if isinstance(obj, (set, frozenset)):
+        return {TYPE_TAG: type(obj).__name__, 'v': [_encode(item) for item in obj]}
+    if isinstance(obj, Decimal):
+        return {TYPE_TAG: 'decimal', 'v': str(obj)}
+    if isinstance(obj, UUID):
+        return {TYPE_TAG: 'uuid', 'v': str(obj)}
+    if isinstance(obj, bytes):
+        return {TYPE_TAG: 'bytes', 'v': base64.b64encode(obj).decode()}
+    if dataclasses.is_dataclass(obj) and not isinstance(obj, type):
+        return {
+            TYPE_TAG: 'dataclass',
+            'c': _importable_path(type(obj)),
+            'v': {
+                f.name: _encode(getattr(obj, f.name))
+                for f in dataclasses.fields(obj)
+                if f.init
+            },
+        }
+    if isinstance(obj, BaseModel):
+        return {
+            TYPE_TAG: 'model',
+            'c': _importable_path(type(obj)),
+            'v': {k: _encode(getattr(obj, k)) for k in type(obj).model_fields},
+        }
+    raise SerializationError(f'can not serialize {type(obj)!r}')
+
+
+def _decode(obj: Any) -> Any:
+    # pylint: disable=too-many-return-statements
+    if isinstance(obj, list):
+        return [_decode(item) for item in obj]
+    if not isinstance(obj, dict):
+        return obj
+    tag = obj.get(TYPE_TAG)
+    if tag is None:
+        return {k: _decode(v) for k, v in obj.items()}
+    value = obj['v']
+    match tag:
+        case 'dict':
+            return {_decode(k): _decode(v) for k, v in value}
+        case 'tuple':
+            return tuple(_decode(item) for item in value)
+        case 'enum':
+            return _import_class(obj['c'])(value)
+        case 'datetime':
+            return datetime.fromisoformat(value)
+        case 'date':
+            return date.fromisoformat(value)
+        case 'time':
+            return time.fromisoformat(value)
+        case 'timedelta':
+            return timedelta(*value)
+        case 'set':
+            return {_decode(item) for item in value}
+        case 'frozenset':
+            return frozenset(_decode(item) for item in value)
+        case 'decimal':
+            return Decimal(value)
+        case 'uuid':
+            return UUID(value)
+        case 'bytes':
+            return base64.b64decode(value)
+        case 'dataclass':
+            return _import_class(obj['c'])(**{k: _decode(v) for k, v in value.items()})
+        case 'model':
+            cls = _import_class(obj['c'])
+            return cls.model_construct(**{k: _decode(v) for k, v in value.items()})
+    raise SerializationError(f'unknown type tag {tag}')
+
+
+class JSONSerializer(BaseSerializer):
+    """
+    Compact JSON serializer.
+
+    Dataclasses, pydantic models, enums, dates and timedeltas are stored with a type tag
+    and restored as the same types, any other object raises ``SerializationError``.
+    """
+
+    name = 'json'
+
+    # noinspection PyMethodMayBeStatic
+    def dumps(self, value: Any) -> bytes:
+        return orjson.dumps(_encode(value))
+
+    # noinspection PyMethodMayBeStatic
+    def loads(self, value: bytes) -> Any:
+        try:
+            return _decode(orjson.loads(value))
+        except (ImportError, AttributeError, KeyError, TypeError, ValueError) as err:
+            raise SerializationError(f'can not deserialize: {err}') from err
+
+
+_SERIALIZERS: dict[str, BaseSerializer] = {}
+_CODECS: dict[str, CodecT] = {}
+
+
+def register_serializer(serializer: BaseSerializer) -> None:
+    _SERIALIZERS[serializer.name] = serializer
+
+
+def get_serializer(name: str) -> BaseSerializer:
+    try:
+        return _SERIALIZERS[name]
+    except KeyError as err:
+        raise SerializationError(f'unknown serializer {name}') from err
+
+
+def register_codec(
+    name: str, compress: Callable[[bytes], bytes], decompress: Callable[[bytes], bytes]
+) -> None:
+    _CODECS[name] = (compress, decompress)
+
+
+register_serializer(JSONSerializer())
+register_serializer(PickleSerializer())
+register_codec('zlib', functools.partial(zlib.compress, level=1), zlib.decompress)
+
+
+class VersionedSerializer(BaseSerializer):
+    """
+    Serializer writing a ``<format>:<version>:<codec>|`` header in front of every payload.
+
+    The value is dumped with the first of ``formats`` able to serialize it, so pickle can be
+    used as a fallback for arbitrary objects. Payloads larger than ``compress_threshold`` bytes
+    are compressed with ``codec``. Payloads written with another version or without a header
+    raise ``SerializationError`` on load, so entries written by another release are never
+    deserialized.
+    """
+
+    name = 'versioned'
+    formats: Sequence[str]
+    version: str
+    codec: str
+    compress_threshold: int | None
+
+    def __init__(
+        self,
+        formats: Sequence[str] = ('json', 'pickle'),
+        version: str = CACHE_FORMAT_VERSION,
+        codec: str = 'zlib',
+        compress_threshold: int | None = COMPRESS_THRESHOLD,
+    ) -> None:
+        self.formats = formats
+        self.version = version
+        self.codec = codec
+        self.compress_threshold = compress_threshold
+
+    def dumps(self, value: Any) -> bytes:
+        for format_ in self.formats:
+            try:
+                data = get_serializer(format_).dumps(value)
+                break
+            except (SerializationError, TypeError):
+                continue
+        else:
+            raise SerializationError(f'can not serialize {type(value)!r}')
+        codec = ''
+        if self.compress_threshold is not None and len(data) > self.compress_threshold:
+            codec = self.codec
+            data = _CODECS[codec][0](data)
+        return f'{format_}:{self.version}:{codec}'.encode() + HEADER_SEPARATOR + data
+
+    def loads(self, value: bytes) -> Any:
+        header, sep, data = value.partition(HEADER_SEPARATOR)
+        if not sep or header.count(b':') != 2:
+            raise SerializationError('no header')
+        format_, version, codec = header.decode(errors='replace').split(':')
+        if version != self.version:
+            raise SerializationError(f'version mismatch: {version} != {self.version}')
+        if codec:
+            if codec not in _CODECS:
+                raise SerializationError(f'unknown codec {codec}')
+            data = _CODECS[codec][1](data)
+        return get_serializer(format_).loads(data)
+
+
+def default_serializer() -> VersionedSerializer:
+    return VersionedSerializer(
+        version=f'{CACHE_FORMAT_VERSION}.{os.environ.get("APP_VERSION", "__DEV__")}'
+    )
@@ -2,17 +2,16 @@ from collections.abc import AsyncGenerator
 from http import HTTPStatus
 from typing import cast
 
-import sqlalchemy as sa
 from fastapi import Depends, HTTPException, Request
 from fastapi.security import HTTPAuthorizationCredentials, HTTPBearer
 from sqlalchemy.ext.asyncio import AsyncSession
-from sqlalchemy.orm import selectinload
 from starlette_context import context, request_cycle_context
 from starsol_fastapi_jwt_auth import AuthJWT
 
 import wb.models as m
 from wb.db import get_db_session
 
+from .principal import Principal, get_api_token_principal, get_login_principal
 from .service_user import ServiceUser, get_service_user, is_service_user_jwt
 
 __all__ = (
@@ -20,6 +19,7 @@ __all__ = (
     'current_user_dependency',
     'current_user',
     'current_employee',
+    'load_current_employee',
     'get_current_roles_employee_related',
 )
 
@@ -34,71 +34,71 @@ def get_bearer_token(
     return cast(str, authorization.credentials)
 
 
-async def get_employee_by_bearer_token(
-    token: str, session: AsyncSession
-) -> m.Employee | None:
-    try:
-        emp_id = m.APIToken.get_owner_id_from_token(token)
-    except m.APITokenParseException:
-        return None
-    tokens_raw = await session.scalars(
-        sa.select(m.APIToken)
-        .where(m.APIToken.owner_id == emp_id)
-        .options(selectinload(m.APIToken.owner))
-    )
-    for obj in tokens_raw.all():
-        if not obj.is_expired and obj.token == token:
-            return cast(m.Employee, obj.owner)
-    return None
-
-
 async def current_user_dependency(
     request: Request,
     jwt_auth: AuthJWT = Depends(AuthJWT),
     bearer_token: str | None = Depends(get_bearer_token),
     session: AsyncSession = Depends(get_db_session),
-) -> 'm.Employee | ServiceUser':
+) -> Principal | ServiceUser:
     if bearer_token and is_service_user_jwt(bearer_token):
         return get_service_user(bearer_token, request)
     if bearer_token:
-        user = await get_employee_by_bearer_token(bearer_token, session=session)
+        principal = await get_api_token_principal(bearer_token, session=session)
     else:
         jwt_auth.jwt_required()
-        user_login = jwt_auth.get_jwt_subject()
-        result = await session.execute(
-            sa.select(m.Employee).where(m.Employee.email == user_login)
+        principal = await get_login_principal(
+            jwt_auth.get_jwt_subject(), session=session
         )
-        user = result.scalar_one_or_none()
-    if user is None:
+    if principal is None:
         raise HTTPException(
             HTTPStatus.UNAUTHORIZED, 'Authorized user could not be found'
         )
-    if not user.active:
+    if not principal.active:
         raise HTTPException(HTTPStatus.UNAUTHORIZED, 'User is disabled')
-    return user
+    return principal
 
 
 async def current_user_context_dependency(
-    user: 'm.Employee | ServiceUser' = Depends(current_user_dependency),
+    user: Principal | ServiceUser = Depends(current_user_dependency),
 ) -> AsyncGenerator:
     data = {'current_user': user}
     with request_cycle_context(data):
         yield
 
 
-def current_employee() -> m.Employee:
+def current_employee() -> Principal:
     user = current_user()
-    if isinstance(user, m.Employee):
+    if isinstance(user, Principal):
         return user
     raise HTTPException(HTTPStatus.UNAUTHORIZED, 'Authorized user is not an employee')
 
 
-def current_user() -> m.Employee | ServiceUser:
+def current_user() -> Principal | ServiceUser:
     if user := context.get('current_user'):
-        return cast('m.Employee | ServiceUser', user)
+        return cast('Principal | ServiceUser', user)
     raise HTTPException(HTTPStatus.UNAUTHORIZED, 'Authorized user could not be found')
 
 
+async def load_current_employee(session: AsyncSession) -> m.Employee:
+    """
+    Load the current employee with the auth load profile.
+
+    Requests are authenticated with the cached principal only, handlers which need
+    the employee itself (its profile fields or to link objects to it) load it here.
+    """
+    principal = current_employee()
+    user = await session.get(
+        m.Employee,
+        principal.id,
+        options=m.employee_load_options(m.EmployeeLoadProfile.AUTH),
+    )
+    if user is None:
+        raise HTTPException(
+            HTTPStatus.UNAUTHORIZED, 'Authorized user could not be found'
+        )
+    return user
+
+
 def get_current_roles_employee_related(user: m.Employee | None = None) -> set[str]:
     curr_user = current_user()
     roles = set(curr_user.roles)
@@ -0,0 +1,183 @@
+import asyncio
+import json
+import random
+import time
+import weakref
+from collections import defaultdict
+from contextlib import asynccontextmanager
+from dataclasses import dataclass, replace
+from typing import Any, AsyncIterator, Awaitable, TypeVar
+from urllib.parse import urlsplit
+
+import aiohttp
+
+from wb.config import CONFIG
+from wb.log import log
+
+__all__ = (
+    'HTTPClient',
+    'HTTPHostStats',
+    'connectors_http_client',
+)
+
+T = TypeVar('T')
+
+RETRY_STATUSES = frozenset({429, 502, 503, 504})
+IDEMPOTENT_METHODS = frozenset({'GET', 'HEAD', 'OPTIONS', 'PUT', 'DELETE'})
+
+
+@dataclass
+class HTTPHostStats:
+    requests: int = 0
+    errors: int = 0
+    retries: int = 0
+    latency: float = 0.0
+
+    @property
+    def avg_latency(self) -> float:
+        return self.latency / self.requests if self.requests else 0.0
+
+    def __sub__(self, other: 'HTTPHostStats') -> 'HTTPHostStats':
+        return HTTPHostStats(
+            requests=self.requests - other.requests,
+            errors=self.errors - other.errors,
+            retries=self.retries - other.retries,
+            latency=self.latency - other.latency,
+        )
+
+
+class HTTPClient:
+    """
+    Shared aiohttp client with a keep-alive connection pool.
+
+    One `aiohttp.ClientSession` is kept per running event loop (celery tasks run
+    every job in a new loop), so connections are reused between calls of the same
+    job. Idempotent requests are retried on connection errors, timeouts and
+    `RETRY_STATUSES` with exponential backoff and full jitter.
+    Request counters and latency are collected per host in `stats`.
+    """
+
+    def __init__(
+        self,
+        limit: int = 100,
+        limit_per_host: int = 10,
+        timeout: float = 60,
+        retries: int = 3,
+        backoff: float = 0.5,
+        backoff_max: float = 10,
+    ) -> None:
+        self.limit = limit
+        self.limit_per_host = limit_per_host
+        self.timeout = aiohttp.ClientTimeout(total=timeout)
+        self.retries = retries
+        self.backoff = backoff
+        self.backoff_max = backoff_max
+        self.stats: defaultdict[str, HTTPHostStats] = defaultdict(HTTPHostStats)
+        self._sessions: weakref.WeakKeyDictionary[
+            asyncio.AbstractEventLoop, aiohttp.ClientSession
+        ] = weakref.WeakKeyDictionary()
+
+    def _get_session(self) -> aiohttp.ClientSession:
+        loop = asyncio.get_running_loop()
+        session = self._sessions.get(loop)
+        if session is None or session.closed:
+            session = aiohttp.ClientSession(
+                connector=aiohttp.TCPConnector(
+                    limit=self.limit, limit_per_host=self.limit_per_host
+                ),
+                timeout=self.timeout,
+            )
+            self._sessions[loop] = session
+        return session
+
+    async def close(self) -> None:
+        session = self._sessions.pop(asyncio.get_running_loop(), None)
+        if session is not None and not session.closed:
+            await session.close()
+
+    async def run_closing(self, aw: Awaitable[T]) -> T:
+        """
+        Await `aw` and close the session of the current loop afterwards, the requests
+        made meanwhile are logged per host.
+        """
+        started = {host: replace(stats) for host, stats in self.stats.items()}
+        try:
+            return await aw
+        finally:
+            await self.close()
+            for host, total in list(self.stats.items()):
+                stats = total - started.get(host, HTTPHostStats())
+                if not stats.requests:
+                    continue
+                log.info(
+                    f'[http] {host}: {stats.requests} requests, {stats.errors} errors, '
+                    f'{stats.retries} retries, avg latency {stats.avg_latency:.3f}s'
+                )
+
+    def _backoff_delay(self, attempt: int) -> float:
+        return random.uniform(  # nosec random
+            0, min(self.backoff_max, self.backoff * 2**attempt)
+        )
+
+    @asynccontextmanager
+    async def request(
+        self,
+        method: str,
+        url: str,
+        retries: int | None = None,
+        **kwargs: Any,
+    ) -> AsyncIterator[aiohttp.ClientResponse]:
+        """
+        Perform a request and yield the response, the connection is returned to the
+        pool on exit. Accepts the same keyword arguments as
+        `aiohttp.ClientSession.request`.
+
+        :param retries: override the number of retries, by default only idempotent
+            methods are retried
+        """
+        if retries is None:
+            retries = self.retries if method.upper() in IDEMPOTENT_METHODS else 0
+        session = self._get_session()
+        stats = self.stats[urlsplit(url).netloc]
+        attempt = 0
+        while True:
+            started = time.monotonic()
+            stats.requests += 1
+            try:
+                response = await session.request(method, url, **kwargs)
+            except (aiohttp.ClientConnectionError, asyncio.TimeoutError) as err:
+                stats.errors += 1
+                stats.latency += time.monotonic() - started
+                if attempt >= retries:
+                    raise
+                log.debug(f'{method} {url} failed with error={err}, retrying')
+            else:
+                if response.status not in RETRY_STATUSES or attempt >= retries:
+                    break
+                response.release()
+                stats.errors += 1
+                stats.latency += time.monotonic() - started
+                log.debug(f'{method} {url} returned {response.status}, retrying')
+            stats.retries += 1
+            await asyncio.sleep(self._backoff_delay(attempt))
+            attempt += 1
+        try:
+            yield response
+        finally:
+            response.release()
+            stats.latency += time.monotonic() - started
+
+    async def read(self, method: str, url: str, **kwargs: Any) -> bytes:
+        async with self.request(method, url, **kwargs) as response:
+            return await response.read()
+
+    async def json(self, method: str, url: str, **kwargs: Any) -> Any:
+        return json.loads(await self.read(method, url, **kwargs))
+
+
+connectors_http_client = HTTPClient(
+    limit=CONFIG.HTTP_CLIENT_LIMIT,
+    limit_per_host=CONFIG.HTTP_CLIENT_LIMIT_PER_HOST,
+    timeout=CONFIG.HTTP_CLIENT_TIMEOUT,
+    retries=CONFIG.HTTP_CLIENT_RETRIES,
+)
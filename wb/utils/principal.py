@@ -0,0 +1,239 @@
+import asyncio
+from collections.abc import Coroutine, Iterable
+from dataclasses import dataclass
+from datetime import datetime, timedelta
+from itertools import chain
+from typing import Any
+
+import sqlalchemy as sa
+from sqlalchemy.event import listens_for
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import Session, aliased
+
+import wb.models as m
+from wb.config import CONFIG
+from wb.log import log
+from wb.utils.cache import flush_cache_many, lru_cache
+
+__all__ = (
+    'Principal',
+    'get_principal',
+    'get_login_principal',
+    'get_api_token_principal',
+)
+
+PRINCIPAL_LOCAL_TTL = 5
+STALE_PRINCIPAL_KEYS = 'stale_principal_keys'
+
+
+@dataclass(frozen=True)
+class Principal:
+    """
+    Authenticated employee as needed to accept a request, the current user of the
+    request context.
+    """
+
+    id: int
+    active: bool
+    roles: frozenset[str]
+    team_id: int | None
+    manager_ids: frozenset[int]
+
+    @property
+    def is_admin(self) -> bool:
+        return 'admin' in self.roles or 'super_admin' in self.roles
+
+    @property
+    def is_super_admin(self) -> bool:
+        return 'super_admin' in self.roles
+
+    @property
+    def is_hr(self) -> bool:
+        return 'hr' in self.roles or 'super_hr' in self.roles
+
+    @property
+    def is_super_hr(self) -> bool:
+        return 'super_hr' in self.roles
+
+
+@dataclass(frozen=True)
+class APITokenRef:
+    owner_id: int
+    expires: datetime | None
+
+
+def _principal_key(employee_id: int) -> str:
+    return f'principal-{employee_id}'
+
+
+def _login_key(login: str) -> str:
+    return f'principal-login-{login}'
+
+
+def _api_token_key(digest: str) -> str:
+    return f'principal-token-{digest}'
+
+
+@lru_cache(
+    ttl=CONFIG.PRINCIPAL_CACHE_TTL,
+    key_builder=lambda _, employee_id, *__, **___: _principal_key(employee_id),
+    local_ttl=PRINCIPAL_LOCAL_TTL,
+    namespace='principal',
+)
+async def get_principal(employee_id: int, session: AsyncSession) -> Principal | None:
+    emp = (
+        await session.execute(
+            sa.select(m.Employee.active, m.Employee.team_id).where(
+                m.Employee.id == employee_id
+            )
+        )
+    ).one_or_none()
+    if emp is None:
+        return None
+    roles = await session.scalars(
+        sa.select(m.EmployeeRole.role).where(m.EmployeeRole.employee_id == employee_id)
+    )
+    manager = aliased(m.Employee)
+    manager_ids = await session.scalars(
+        sa.select(manager.id)
+        .select_from(m.Employee)
+        .join(m.Employee.managers.of_type(manager))
+        .where(m.Employee.id == employee_id)
+    )
+    return Principal(
+        id=employee_id,
+        active=emp.active,
+        roles=frozenset(roles.all()),
+        team_id=emp.team_id,
+        manager_ids=frozenset(manager_ids.all()),
+    )
+
+
+@lru_cache(
+    ttl=CONFIG.PRINCIPAL_CACHE_TTL,
+    key_builder=lambda _, login, *__, **___: _login_key(login),
+    local_ttl=PRINCIPAL_LOCAL_TTL,
+    namespace='principal',
+)
+async def _get_login_employee_id(login: str, session: AsyncSession) -> int | None:
+    emp_id: int | None = await session.scalar(
+        sa.select(m.Employee.id).where(m.Employee.email == login)
+    )
+    return emp_id
+
+
+@lru_cache(
+    ttl=CONFIG.PRINCIPAL_CACHE_TTL,
+    key_builder=lambda _, digest, *__, **___: _api_token_key(digest),
+    local_ttl=PRINCIPAL_LOCAL_TTL,
+    namespace='principal',
+)
+async def _get_api_token_ref(digest: str, session: AsyncSession) -> APITokenRef | None:
+    token = (
+        await session.execute(
+            sa.select(
+                m.APIToken.owner_id, m.APIToken.created, m.APIToken.expires_in
+            ).where(m.APIToken.token_digest == digest)
+        )
+    ).one_or_none()
+    if token is None:
+        return None
+    return APITokenRef(
+        owner_id=token.owner_id,
+        expires=(
+            token.created + timedelta(seconds=token.expires_in)
+            if token.expires_in
+            else None
+        ),
+    )
+
+
+async def get_login_principal(login: str, session: AsyncSession) -> Principal | None:
+    """
+    Principal of the employee with the login (email), the subject of JWT tokens.
+    """
+    if (emp_id := await _get_login_employee_id(login, session=session)) is None:
+        return None
+    return await get_principal(emp_id, session=session)
+
+
+async def get_api_token_principal(
+    token: str, session: AsyncSession
+) -> Principal | None:
+    """
+    Principal of the owner of a valid API token.
+
+    The token is looked up by its keyed digest, which is also the cache key, so the
+    token itself is neither decrypted nor stored in the cache.
+    """
+    try:
+        m.APIToken.get_owner_id_from_token(token)
+    except m.APITokenParseException:
+        return None
+    ref = await _get_api_token_ref(m.make_api_token_digest(token), session=session)
+    if ref is None or (ref.expires and ref.expires < datetime.utcnow()):
+        return None
+    return await get_principal(ref.owner_id, session=session)
+
+
+@flush_cache_many(key_builder=lambda _, key, **__: key)
+async def _flush_principal_keys(_: Iterable[tuple[str]]) -> None:
+    pass
+
+
+_flush_tasks: set[asyncio.Task] = set()
+
+
+def _run_in_background(coro: Coroutine[Any, Any, None]) -> None:
+    try:
+        loop = asyncio.get_running_loop()
+    except RuntimeError:
+        coro.close()
+        log.warning('no event loop to flush principals, they expire by ttl')
+        return
+    task = loop.create_task(coro)
+    _flush_tasks.add(task)
+    task.add_done_callback(_flush_tasks.discard)
+
+
+def _employee_stale_keys(emp: m.Employee) -> set[str]:
+    state = sa.inspect(emp)
+    keys = set()
+    if any(
+        state.attrs[attr].history.has_changes()
+        for attr in ('active', '_roles', 'team_id', 'team', 'managers')
+    ):
+        keys.add(_principal_key(emp.id))
+    email = state.attrs.email.history
+    keys.update(_login_key(login) for login in chain(email.added, email.deleted))
+    return keys
+
+
+# noinspection PyUnusedLocal
+@listens_for(Session, 'after_flush')
+def _collect_stale_principals(session: Session, flush_context: Any) -> None:
+    """
+    Collect the cache keys of principals whose roles, activity, team, managers,
+    login or API tokens are changed by the flush, they are flushed after commit.
+    """
+    keys: set[str] = session.info.setdefault(STALE_PRINCIPAL_KEYS, set())
+    for obj in chain(session.new, session.dirty, session.deleted):
+        if isinstance(obj, m.Employee):
+            keys.update(_employee_stale_keys(obj))
+            if obj in session.deleted:
+                keys.update((_principal_key(obj.id), _login_key(obj.email)))
+        elif isinstance(obj, m.EmployeeRole):
+            keys.add(_principal_key(obj.employee_id))
+        elif isinstance(obj, m.APIToken) and obj in session.deleted:
+            keys.add(_api_token_key(obj.token_digest))
+
+
+@listens_for(Session, 'after_commit')
+def _flush_stale_principals(session: Session) -> None:
+    if keys := session.info.pop(STALE_PRINCIPAL_KEYS, None):
+        _run_in_background(_flush_principal_keys([(key,) for key in keys]))
+
+
+@listens_for(Session, 'after_rollback')
+def _drop_stale_principals(session: Session) -> None:
+    session.info.pop(STALE_PRINCIPAL_KEYS, None)
@@ -0,0 +1,301 @@
+import asyncio
+import contextlib
+from collections.abc import AsyncIterator, Coroutine, Sequence
+from dataclasses import dataclass, field
+from enum import StrEnum
+from typing import Any
+
+import orjson
+from sqlalchemy.event import listens_for
+from sqlalchemy.orm import Session
+
+import wb.models as m
+from wb.config import CONFIG
+from wb.log import log
+from wb.redis_db import choose_session_maker, session_maker
+
+__all__ = (
+    'PushEventType',
+    'PushEvent',
+    'PUSH_RESET_EVENT',
+    'publish_events',
+    'subscribe_events',
+)
+
+PUSH_STREAM = 'push-events'
+READ_BLOCK_MS = 15_000
+READ_COUNT = 500
+REPLAY_PAGE_SIZE = 500
+SUBSCRIBER_QUEUE_SIZE = 1000
+RECONNECT_DELAY = 1
+HUB_START_TIMEOUT = 5
+PENDING_PUSH_EVENTS = 'pending_push_events'
+
+
+class PushEventType(StrEnum):
+    TM_STATUS = 'tm-status'
+    NOTIFICATION = 'notification'
+    SCHEDULE_EXCLUSION = 'schedule-exclusion'
+    RESET = 'reset'
+
+
+@dataclass(frozen=True)
+class PushEvent:
+    """
+    An event pushed to the subscribers.
+
+    :param type: the event type
+    :param data: compact event payload, JSON serializable
+    :param recipient_id: the only employee receiving the event, all by default
+    :param id: the id of the event in the stream, set when it is read
+    """
+
+    type: PushEventType
+    data: dict[str, Any] = field(default_factory=dict)
+    recipient_id: int | None = None
+    id: str | None = None
+
+    def is_visible_to(self, employee_id: int) -> bool:
+        return self.recipient_id is None or self.recipient_id == employee_id
+
+
+# tells the subscriber that events were lost and the state has to be fetched again
+PUSH_RESET_EVENT = PushEvent(PushEventType.RESET)
+
+
+def _parse_id(event_id: str) -> tuple[int, int]:
+    ms, _, seq = event_id.partition('-')
+    return int(ms), int(seq or 0)
+
+
+def _decode(event_id: bytes, fields: dict[bytes, bytes]) -> PushEvent:
+    recipient = fields.get(b'recipient')
+    return PushEvent(
+        type=PushEventType(fields[b'type'].decode()),
+        data=orjson.loads(fields[b'data']),
+        recipient_id=int(recipient) if recipient else None,
+        id=event_id.decode(),
+    )
+
+
+async def publish_events(events: Sequence[PushEvent]) -> None:
+    """
+    Append the events to the push stream, failures are logged and ignored.
+
+    The stream is capped at ``PUSH_STREAM_MAXLEN`` events, which limits how far back
+    a reconnecting subscriber can resume.
+    """
+    if not events:
+        return
+    try:
+        async with choose_session_maker()() as redis:
+            async with redis.pipeline(transaction=False) as pipe:
+                for event in events:
+                    pipe.xadd(
+                        PUSH_STREAM,
+                        {
+                            'type': event.type.value,
+                            'data': orjson.dumps(event.data),
+                            'recipient': (
+                                str(event.recipient_id) if event.recipient_id else ''
+                            ),
+                        },
+                        maxlen=CONFIG.PUSH_STREAM_MAXLEN,
+                        approximate=True,
+                    )
+                await pipe.execute()
+    except Exception as err:  # pylint: disable=broad-exception-caught
+        log.warning(f'failed to publish {len(events)} push events: {err}')
+
+
+class _Subscriber:
+    __slots__ = ('queue', 'overflowed')
+
+    def __init__(self) -> None:
+        self.queue: asyncio.Queue[PushEvent] = asyncio.Queue(SUBSCRIBER_QUEUE_SIZE)
+        self.overflowed = False
+
+
+class PushEventHub:
+    """
+    Reads the push stream once per process and fans the events out to the subscribers.
+
+    The hub is started lazily in the running event loop and keeps the id of the last
+    read event, so no events are skipped when the connection to redis is restored.
+    A subscriber too slow to take its events is dropped with a reset event.
+    """
+
+    subscribers: set[_Subscriber]
+    _last_id: str | None
+    _started: asyncio.Event | None
+    _task: asyncio.Task | None
+
+    def __init__(self) -> None:
+        self.subscribers = set()
+        self._last_id = None
+        self._started = None
+        self._task = None
+
+    async def subscribe(self) -> _Subscriber:
+        """
+        Subscribe to the events read after the call, the hub is started if needed.
+        """
+        if self._task is None or self._task.done():
+            self._started = asyncio.Event()
+            self._task = asyncio.get_running_loop().create_task(self._listen())
+        subscriber = _Subscriber()
+        self.subscribers.add(subscriber)
+        if self._started is not None:
+            with contextlib.suppress(asyncio.TimeoutError):
+                await asyncio.wait_for(self._started.wait(), HUB_START_TIMEOUT)
+        return subscriber
+
+    def unsubscribe(self, subscriber: _Subscriber) -> None:
+        self.subscribers.discard(subscriber)
+
+    def _dispatch(self, event: PushEvent) -> None:
+        for subscriber in list(self.subscribers):
+            try:
+                subscriber.queue.put_nowait(event)
+            except asyncio.QueueFull:
+                subscriber.overflowed = True
+                self.unsubscribe(subscriber)
+
+    async def _listen(self) -> None:
+        while True:
+            try:
+                async with session_maker() as redis:
+                    if self._last_id is None:
+                        last = await redis.xrevrange(PUSH_STREAM, count=1)
+                        self._last_id = last[0][0].decode() if last else '0-0'
+                    if self._started is not None:
+                        self._started.set()
+                    while True:
+                        result = await redis.xread(
+                            {PUSH_STREAM: self._last_id},
+                            block=READ_BLOCK_MS,
+                            count=READ_COUNT,
+                        )
+                        for _, entries in result:
+                            for event_id, fields in entries:
+                                event = _decode(event_id, fields)
+                                self._last_id = event.id
+                                self._dispatch(event)
+            except asyncio.CancelledError:
+                raise
+            except Exception as err:  # pylint: disable=broad-exception-caught
+                log.warning(f'push event hub failed: {err}')
+            await asyncio.sleep(RECONNECT_DELAY)
+
+
+_hub = PushEventHub()
+
+
+async def _replay(last_event_id: str) -> AsyncIterator[PushEvent]:
+    """
+    The events after ``last_event_id`` still kept in the stream, a reset event if
+    some of them are trimmed.
+    """
+    async with session_maker() as redis:
+        first = await redis.xrange(PUSH_STREAM, count=1)
+        if first and _parse_id(first[0][0].decode()) > _parse_id(last_event_id):
+            yield PUSH_RESET_EVENT
+            return
+        start = f'({last_event_id}'
+        while entries := await redis.xrange(
+            PUSH_STREAM, min=start, count=REPLAY_PAGE_SIZE
+        ):
+            for event_id, fields in entries:
+                yield _decode(event_id, fields)
+            start = f'({entries[-1][0].decode()}'
+
+
+async def subscribe_events(
+    employee_id: int,
+    last_event_id: str | None = None,
+    keepalive: float = 15,
+) -> AsyncIterator[PushEvent | None]:
+    """
+    Events visible to the employee as they are published, ``None`` every ``keepalive``
+    seconds without events.
+
+    :param last_event_id: resume after the event, the events kept in the stream are
+        replayed, a reset event is sent if some of them are lost
+    """
+    subscriber = await _hub.subscribe()
+    try:
+        last_seen = (0, 0)
+        if last_event_id:
+            try:
+                last_seen = _parse_id(last_event_id)
+            except ValueError:
+                yield PUSH_RESET_EVENT
+            else:
+                async for event in _replay(last_event_id):
+                    if event.id:
+                        last_seen = _parse_id(event.id)
+                    if event.is_visible_to(employee_id):
+                        yield event
+        while True:
+            try:
+                event = await asyncio.wait_for(subscriber.queue.get(), keepalive)
+            except asyncio.TimeoutError:
+                if subscriber.overflowed:
+                    yield PUSH_RESET_EVENT
+                    return
+                yield None
+                continue
+            if event.id and _parse_id(event.id) <= last_seen:
+                continue
+            if event.is_visible_to(employee_id):
+                yield event
+            if subscriber.overflowed and subscriber.queue.empty():
+                yield PUSH_RESET_EVENT
+                return
+    finally:
+        _hub.unsubscribe(subscriber)
+
+
+_publish_tasks: set[asyncio.Task] = set()
+
+
+def _run_in_background(coro: Coroutine[Any, Any, None]) -> None:
+    try:
+        loop = asyncio.get_running_loop()
+    except RuntimeError:
+        coro.close()
+        log.warning('no event loop to publish push events')
+        return
+    task = loop.create_task(coro)
+    _publish_tasks.add(task)
+    task.add_done_callback(_publish_tasks.discard)
+
+
+# noinspection PyUnusedLocal
+@listens_for(Session, 'after_flush')
+def _collect_schedule_exclusion_events(session: Session, flush_context: Any) -> None:
+    """
+    Collect the schedule exclusion changes of the flush, they are published after commit.
+    """
+    events: dict[tuple[int, str], PushEvent] = session.info.setdefault(
+        PENDING_PUSH_EVENTS, {}
+    )
+    for obj in (*session.new, *session.dirty, *session.deleted):
+        if not isinstance(obj, m.EmployeeScheduleExclusion):
+            continue
+        day = obj.day.isoformat()
+        events[(obj.employee_id, day)] = PushEvent(
+            PushEventType.SCHEDULE_EXCLUSION,
+            {'employee_id': obj.employee_id, 'day': day},
+        )
+
+
+@listens_for(Session, 'after_commit')
+def _publish_pending_events(session: Session) -> None:
+    if events := session.info.pop(PENDING_PUSH_EVENTS, None):
+        _run_in_background(publish_events(list(events.values())))
+
+
+@listens_for(Session, 'after_rollback')
+def _drop_pending_events(session: Session) -> None:
+    session.info.pop(PENDING_PUSH_EVENTS, None)
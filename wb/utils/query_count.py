@@ -0,0 +1,88 @@
+from collections.abc import Iterator
+from contextlib import contextmanager
+from contextvars import ContextVar
+from typing import Any
+
+from prometheus_client import Histogram
+from sqlalchemy.engine import Engine
+from sqlalchemy.event import listens_for
+from starlette.types import ASGIApp, Receive, Scope, Send
+
+from wb.config import CONFIG
+from wb.log import log
+
+__all__ = (
+    'QueryCounter',
+    'count_queries',
+    'QueryCountMiddleware',
+)
+
+UNTEMPLATED_HANDLER = 'none'
+
+db_queries_per_request = Histogram(
+    'http_request_db_queries',
+    'Number of database queries executed while handling a request.',
+    labelnames=('handler', 'method'),
+    buckets=(1, 2, 5, 10, 20, 50, 100, 200, 500),
+)
+
+
+class QueryCounter:
+    __slots__ = ('count',)
+
+    def __init__(self) -> None:
+        self.count = 0
+
+
+_current_counter: ContextVar[QueryCounter | None] = ContextVar(
+    'db_query_counter', default=None
+)
+
+
+# noinspection PyUnusedLocal
+@listens_for(Engine, 'before_cursor_execute')
+def _count_query(*_: Any) -> None:
+    if (counter := _current_counter.get()) is not None:
+        counter.count += 1
+
+
+@contextmanager
+def count_queries() -> Iterator[QueryCounter]:
+    """
+    Count the database queries executed in the context, including the ones of tasks
+    and threads started from it.
+    """
+    counter = QueryCounter()
+    token = _current_counter.set(counter)
+    try:
+        yield counter
+    finally:
+        _current_counter.reset(token)
+
+
+class QueryCountMiddleware:
+    """
+    Record the number of database queries of every http request per endpoint and
+    warn about requests with more than ``DB_QUERY_COUNT_WARN`` queries.
+    """
+
+    def __init__(self, app: ASGIApp) -> None:
+        self.app = app
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope['type'] != 'http':
+            await self.app(scope, receive, send)
+            return
+        with count_queries() as counter:
+            try:
+                await self.app(scope, receive, send)
+            finally:
+                route = scope.get('route')
+                handler = getattr(route, 'path', UNTEMPLATED_HANDLER)
+                db_queries_per_request.labels(handler, scope['method']).observe(
+                    counter.count
+                )
+                if 0 < CONFIG.DB_QUERY_COUNT_WARN < counter.count:
+                    log.warning(
+                        f'{scope["method"]} {handler}: {counter.count} database queries'
+                    )
@@ -0,0 +1,58 @@
+import csv
+import io
+from collections.abc import (
+    AsyncIterable,
+    AsyncIterator,
+    Iterable,
+    Iterator,
+    Sequence,
+)
+from typing import IO, Any
+
+from fastapi.responses import StreamingResponse
+from starlette_context import context, request_cycle_context
+
+__all__ = (
+    'encode_csv_rows',
+    'iter_file',
+    'make_csv_streaming_response',
+)
+
+
+def encode_csv_rows(rows: Iterable[Sequence[Any]]) -> bytes:
+    output = io.StringIO()
+    csv.writer(output).writerows(rows)
+    return output.getvalue().encode()
+
+
+FILE_CHUNK_SIZE = 64 * 1024
+
+
+def iter_file(file: IO[bytes], chunk_size: int = FILE_CHUNK_SIZE) -> Iterator[bytes]:
+    """
+    Read the file by chunks, closing it once it is read or the client disconnects.
+    """
+    with file:
+        while chunk := file.read(chunk_size):
+            yield chunk
+
+
+def make_csv_streaming_response(
+    chunks: AsyncIterable[Iterable[Sequence[Any]]],
+    headers: dict[str, str] | None = None,
+) -> StreamingResponse:
+    """
+    Make a response sending every chunk of csv rows as soon as it is produced.
+
+    Dependencies with yield are finished before the response body is sent, so the request
+    context (the current user) is captured here and restored while the chunks are produced.
+    Chunks must not use the request session for the same reason.
+    """
+    data = context.copy() if context.exists() else {}
+
+    async def body() -> AsyncIterator[bytes]:
+        with request_cycle_context(data):
+            async for rows in chunks:
+                yield encode_csv_rows(rows)
+
+    return StreamingResponse(body(), media_type='text/csv', headers=headers)